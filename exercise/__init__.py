@@ -0,0 +1,74 @@
+"""
+Arithmetic exercise generation and grading.
+
+The package API mirrors the two command line tools::
+
+    import exercise
+    expressions, answers = exercise.generate(10, 10, seed=1)
+    correct, wrong = exercise.grade(expressions, answers)
+
+Importing the package only defines these functions; the generator and
+grader modules are imported on first call, so ``import exercise`` stays
+cheap. The command line tools are ``exercise-generate`` (need1),
+``exercise-grade`` (need2) and ``exercise-convert`` (binformat), or
+``python -m exercise.need1`` and so on.
+"""
+
+__all__ = ['generate', 'generate_files', 'grade', 'grade_files']
+
+
+def generate(num_expressions, range_limit, seed=None, dedup=True, workers=1):
+    """
+    Generate exercises; return (expressions, answers) lists of strings.
+
+    Expressions and answers are in need1's text format without the line
+    numbers. With a seed the result is reproducible and does not depend
+    on workers; without one the module-level random generator is used.
+    """
+    from .dedup import ExpressionIndex
+    from .need1 import iter_expressions, iter_sharded
+    index = ExpressionIndex(num_expressions) if dedup else None
+    if seed is None:
+        items = iter_expressions(num_expressions, range_limit, index)
+    else:
+        items = iter_sharded(num_expressions, range_limit, seed, workers, index)
+    expressions = []
+    answers = []
+    for expression, answer in items:
+        expressions.append(expression)
+        answers.append(answer)
+    return expressions, answers
+
+
+def generate_files(num_expressions, range_limit, seed=None, dedup=True, workers=1,
+                   answer_key=False, output_format='text'):
+    """
+    Write Exercises.txt/Answers.txt (or the .bin, .gz or .jsonl files) as need1 does; return the count.
+    """
+    from .dedup import ExpressionIndex
+    from .need1 import generate_and_write_expressions
+    index = ExpressionIndex() if dedup else None
+    return generate_and_write_expressions(num_expressions, range_limit, index, seed=seed,
+                                          workers=workers, answer_key=answer_key,
+                                          output_format=output_format)
+
+
+def grade(expressions, answers):
+    """
+    Grade answers against expressions; return (correct, wrong) lists of 1-based numbers.
+
+    Both sequences hold unnumbered strings as returned by generate().
+    """
+    from .need2 import check_answers
+    exercises = [f"{idx}. {expression}" for idx, expression in enumerate(expressions, start=1)]
+    given = [f"{idx}. {answer}" for idx, answer in enumerate(answers, start=1)]
+    return check_answers(exercises, given)
+
+
+def grade_files(exercise_file, answer_file, grade_file='Grade.txt'):
+    """
+    Grade two files line by line and write grade_file; return (correct, wrong) counts.
+    """
+    from .need2 import grade_stream, iter_lines, write_grades_stream
+    grades = grade_stream(iter_lines(exercise_file), iter_lines(answer_file))
+    return write_grades_stream(grades, grade_file)
@@ -0,0 +1,127 @@
+"""
+Binary answer-key sidecar files for repeat grading.
+
+A key file sits next to its exercise file (``Exercises.txt.key``). It
+starts with a header holding a magic tag, the BLAKE2b digest of the
+exercise file's bytes and the number of exercises, followed by one
+packed little-endian int64 (numerator, denominator) per exercise, in
+lowest terms. A denominator of 0 marks an exercise that has no valid
+answer. The key is only used while the digest still matches the
+exercise file, so an edited or regenerated file is never graded
+against a stale key.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+from .rational import normalize
+
+
+MAGIC = b'EXKEY1\0\0'
+# 文件头：标识、题目文件摘要、题目数
+HEADER = struct.Struct('<8s16sQ')
+# 每道题的答案：分子、分母
+ENTRY = struct.Struct('<qq')
+KEY_SUFFIX = '.key'
+# 计算摘要和写文件时每次处理的字节数 / 题目数
+READ_BLOCK = 1 << 20
+WRITE_BATCH = 4096
+
+
+def answer_key_path(exercise_file):
+    """
+    Return the default sidecar path of an exercise file.
+    """
+    return exercise_file + KEY_SUFFIX
+
+
+def file_digest(path):
+    """
+    Return the 16-byte BLAKE2b digest of a file's contents.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f_in:
+        for block in iter(lambda: f_in.read(READ_BLOCK), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def write_answer_key(exercise_file, answer_key, key_file=None):
+    """
+    Write (number, expected) items of an exercise file to its sidecar.
+
+    Items are streamed, so memory does not grow with the file. Return
+    False and leave no key file if the exercises are not numbered 1, 2,
+    3, ... or an answer does not fit in int64; such files are simply
+    evaluated on every run.
+    """
+    key_file = key_file or answer_key_path(exercise_file)
+    digest = file_digest(exercise_file)
+    count = 0
+    buffer = bytearray()
+    try:
+        with open(key_file, 'wb') as f_key:
+            f_key.write(HEADER.pack(MAGIC, digest, 0))
+            for count, (number, expected) in enumerate(answer_key, start=1):
+                if number.strip() != str(count):
+                    raise ValueError(f"exercise {count} is numbered '{number.strip()}'")
+                buffer += ENTRY.pack(*normalize(*expected)) if expected is not None \
+                    else ENTRY.pack(0, 0)
+                if len(buffer) >= WRITE_BATCH * ENTRY.size:
+                    f_key.write(buffer)
+                    buffer.clear()
+            f_key.write(buffer)
+            # 题目数最后才知道，回到文件头补写
+            f_key.seek(0)
+            f_key.write(HEADER.pack(MAGIC, digest, count))
+    except (ValueError, struct.error) as e_symbol:
+        print(f"Answer key not written: {e_symbol}")
+        os.remove(key_file)
+        return False
+    return True
+
+
+class AnswerKey:
+    """
+    Memory-mapped answer key; iterates (number, expected) items like need2.build_answer_key.
+    """
+
+    def __init__(self, mapped, count):
+        self._mapped = mapped
+        self._view = memoryview(mapped)[HEADER.size:HEADER.size + count * ENTRY.size]
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        """
+        Return the expected pair of the exercise at a 0-based position, or None.
+        """
+        if not 0 <= position < self._count:
+            raise IndexError('answer key index out of range')
+        num, den = ENTRY.unpack_from(self._view, position * ENTRY.size)
+        return (num, den) if den else None
+
+    def __iter__(self):
+        for number, (num, den) in enumerate(ENTRY.iter_unpack(self._view), start=1):
+            yield str(number), ((num, den) if den else None)
+
+
+def load_answer_key(exercise_file, key_file=None):
+    """
+    Map the sidecar of an exercise file, or return None if it is missing or stale.
+    """
+    key_file = key_file or answer_key_path(exercise_file)
+    try:
+        with open(key_file, 'rb') as f_key:
+            magic, digest, count = HEADER.unpack(f_key.read(HEADER.size))
+            if magic != MAGIC or digest != file_digest(exercise_file) \
+                    or os.fstat(f_key.fileno()).st_size != HEADER.size + count * ENTRY.size:
+                return None
+            mapped = mmap.mmap(f_key.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, struct.error):
+        return None
+    return AnswerKey(mapped, count)
@@ -0,0 +1,204 @@
+"""
+Vectorized evaluation of many expressions at once with NumPy.
+
+A batch of expressions with the same number of operators is stored as
+int64 numerator/denominator columns plus an int8 operator-code column
+and evaluated left to right with array operations. Rows whose values
+could overflow int64, and any row NumPy cannot represent, are evaluated
+with the exact rational.evaluate instead. Without NumPy every row takes
+the exact path.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 是可选依赖
+    np = None
+
+from itertools import chain
+
+from .compact import SYMBOLS
+from .rational import evaluate, equal
+
+
+OP_CODES = {'+': 0, '-': 1, '*': 2, '/': 3}
+INVALID_CODE = 255
+# 运算符字符到编码的查找表
+CODE_TABLE = None
+if np is not None:
+    CODE_TABLE = np.full(256, INVALID_CODE, dtype=np.uint8)
+    for _symbol, _code in OP_CODES.items():
+        CODE_TABLE[ord(_symbol)] = _code
+# compact 运算码到本模块编码的查找表；0 号（补位）当作加法，补位的操作数为 0/1
+COMPACT_TABLE = None
+if np is not None:
+    COMPACT_TABLE = np.array([OP_CODES['+']] + [OP_CODES[symbol] for symbol in SYMBOLS[1:]],
+                             dtype=np.uint8)
+# 因子绝对值小于 2**31 时，两个乘积之和不会超出 int64
+SAFE_LIMIT = 1 << 31
+# check_answers 等调用方每批处理的行数
+BATCH_SIZE = 65536
+
+
+def available():
+    """
+    Return True if NumPy is installed and batches are vectorized.
+    """
+    return np is not None
+
+
+def to_columns(rows, width):
+    """
+    Convert (pairs, operators) rows with width operators into column arrays.
+
+    Return (nums, dens, codes, irregular), where irregular marks rows with
+    an unknown operator or a value outside the int64-safe range. Raise
+    OverflowError if a value does not fit in int64 at all.
+    """
+    count = len(rows)
+    # 展平成一维整数序列再转换，比逐个元组转换快得多
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(pairs for pairs, _ in rows)),
+                       dtype=np.int64, count=count * (width + 1) * 2)
+    flat = flat.reshape(count, width + 1, 2)
+    nums = flat[:, :, 0]
+    dens = flat[:, :, 1]
+    # 运算符拼成一个字节串后查表，非法运算符编码为 255
+    symbols = ''.join(chain.from_iterable(operators for _, operators in rows))
+    symbols = symbols.encode('ascii', 'replace')
+    if len(symbols) != count * width:
+        raise ValueError('operators must be single characters')
+    codes = CODE_TABLE[np.frombuffer(symbols, dtype=np.uint8)].reshape(count, width)
+    irregular = ((np.abs(nums) >= SAFE_LIMIT) | (dens <= 0) | (dens >= SAFE_LIMIT)).any(axis=1)
+    irregular |= (codes == INVALID_CODE).any(axis=1)
+    return nums, dens, codes, irregular
+
+
+def evaluate_batch(nums, dens, codes, fallback=None):
+    """
+    Evaluate a batch column by column.
+
+    Return (num, den, fallback): reduced int64 results with positive
+    denominators, and a boolean mask of rows that must be re-evaluated
+    exactly because they could overflow or divide by zero. Rows already
+    set in the given fallback mask are skipped.
+    """
+    num = nums[:, 0].copy()
+    den = dens[:, 0].copy()
+    fallback = np.zeros(len(num), dtype=bool) if fallback is None else fallback.copy()
+    num = np.where(fallback, 0, num)
+    den = np.where(fallback, 1, den)
+    for col in range(codes.shape[1]):
+        other_num = nums[:, col + 1]
+        other_den = dens[:, col + 1]
+        code = codes[:, col]
+        fallback |= (np.abs(num) >= SAFE_LIMIT) | (den >= SAFE_LIMIT)
+        fallback |= (code == OP_CODES['/']) & (other_num == 0)
+        # 已标记的行清成安全值，避免溢出警告
+        num = np.where(fallback, 0, num)
+        den = np.where(fallback, 1, den)
+        other_num = np.where(fallback, 0, other_num)
+        other_den = np.where(fallback, 1, other_den)
+        cross_left = num * other_den
+        cross_right = other_num * den
+        new_num = np.select(
+            [code == OP_CODES['+'], code == OP_CODES['-'], code == OP_CODES['*']],
+            [cross_left + cross_right, cross_left - cross_right, num * other_num],
+            cross_left)
+        new_den = np.where(code == OP_CODES['/'], den * other_num, den * other_den)
+        new_den = np.where(fallback, 1, new_den)
+        sign = np.where(new_den < 0, -1, 1)
+        divisor = np.gcd(new_num, new_den)
+        divisor[divisor == 0] = 1
+        num = sign * new_num // divisor
+        den = sign * new_den // divisor
+    fallback |= (np.abs(num) >= SAFE_LIMIT) | (den >= SAFE_LIMIT)
+    return num, den, fallback
+
+
+def evaluate_many(rows):
+    """
+    Evaluate (pairs, operators) rows and return one result pair per row.
+
+    Rows are grouped by operator count and vectorized; malformed rows and
+    every row flagged by evaluate_batch use rational.evaluate.
+    """
+    if np is None:
+        return [evaluate(pairs, operators) for pairs, operators in rows]
+    results = [None] * len(rows)
+    groups = {}
+    for i, (pairs, operators) in enumerate(rows):
+        if len(pairs) == len(operators) + 1:
+            groups.setdefault(len(operators), []).append(i)
+        else:
+            results[i] = evaluate(pairs, operators)
+    for width, indices in groups.items():
+        group = [rows[i] for i in indices]
+        try:
+            nums, dens, codes, irregular = to_columns(group, width)
+        except (OverflowError, TypeError, ValueError):
+            for i in indices:
+                results[i] = evaluate(*rows[i])
+            continue
+        num, den, fallback = evaluate_batch(nums, dens, codes, irregular)
+        for i, result_num, result_den, exact in zip(indices, num.tolist(), den.tolist(),
+                                                    fallback.tolist()):
+            results[i] = evaluate(*rows[i]) if exact else (result_num, result_den)
+    return results
+
+
+def match_columns(nums, dens, codes, answers, irregular=None):
+    """
+    Compare column arrays with a (rows, 2) int64 array of expected answer pairs.
+
+    Return (same, fallback) boolean arrays; rows set in fallback (or in
+    the given irregular mask) must be compared exactly instead. An answer
+    with a zero denominator never matches.
+    """
+    if irregular is None:
+        irregular = ((np.abs(nums) >= SAFE_LIMIT) | (dens <= 0) | (dens >= SAFE_LIMIT)).any(axis=1)
+    irregular = irregular | (np.abs(answers) >= SAFE_LIMIT).any(axis=1)
+    num, den, fallback = evaluate_batch(nums, dens, codes, irregular)
+    answers = np.where(fallback[:, None], 0, answers)
+    same = (num * answers[:, 1] == answers[:, 0] * den) & (answers[:, 1] != 0)
+    return same, fallback
+
+
+def exact_match(row, expected):
+    """
+    Compare one row with its expected pair exactly; division by zero never matches.
+    """
+    try:
+        return equal(evaluate(*row), expected)
+    except ZeroDivisionError:
+        return False
+
+
+def matches_many(rows, expected):
+    """
+    Check each row's value against the expected pair at the same position.
+
+    Comparison is vectorized by cross-multiplication for every row that
+    evaluate_batch handled; other rows compare exactly in Python.
+    """
+    if np is None:
+        return [exact_match(row, answer) for row, answer in zip(rows, expected)]
+    matches = [False] * len(rows)
+    groups = {}
+    for i, (pairs, operators) in enumerate(rows):
+        if len(pairs) == len(operators) + 1:
+            groups.setdefault(len(operators), []).append(i)
+        else:
+            matches[i] = exact_match((pairs, operators), expected[i])
+    for width, indices in groups.items():
+        group = [rows[i] for i in indices]
+        try:
+            nums, dens, codes, irregular = to_columns(group, width)
+            answers = np.fromiter(chain.from_iterable(expected[i] for i in indices),
+                                  dtype=np.int64, count=2 * len(indices)).reshape(-1, 2)
+        except (OverflowError, TypeError, ValueError):
+            for i in indices:
+                matches[i] = exact_match(rows[i], expected[i])
+            continue
+        same, fallback = match_columns(nums, dens, codes, answers, irregular)
+        for i, match, exact in zip(indices, same.tolist(), fallback.tolist()):
+            matches[i] = exact_match(rows[i], expected[i]) if exact else match
+    return matches
@@ -0,0 +1,66 @@
+"""
+Benchmark parallel chunked grading of need2 with 1, 2, 4 and 8 workers.
+
+Usage: python -m exercise.bench_grading [-n NUMBER_OF_EXERCISES] [-r RANGE] [-j WORKERS ...]
+
+need1 writes the exercise and answer files once into a temporary
+directory; need2 then grades them with each worker count as a separate
+process, so the timings include pool start-up and the ordered merge.
+"""
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# 包所在的目录，子进程据此导入 exercise 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_script(module, arguments, cwd):
+    """
+    Run one of the exercise modules and return its wall-clock time in seconds.
+    """
+    python_path = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+    env = dict(os.environ, PYTHONPATH=python_path)
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-m', module] + arguments, cwd=cwd, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def main():
+    """
+    Generate the input files, grade them with every worker count and print the scaling.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark parallel grading.')
+    parser.add_argument('-n', type=int, default=1000000, help='Number of exercises')
+    parser.add_argument('-r', type=int, default=30, help='Range limit passed to need1')
+    parser.add_argument('-j', '--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Worker counts to compare')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run_script('exercise.need1', ['-n', str(args.n), '-r', str(args.r), '--seed', '0',
+                                '--no-dedup'], tmp_dir)
+        print(f"{os.cpu_count()} CPUs, {args.n} exercises")
+        baseline = None
+        for workers in args.workers:
+            grade_file = f"Grade-{workers}.txt"
+            elapsed = run_script('exercise.need2', ['-e', 'Exercises.txt', '-a', 'Answers.txt',
+                                              '-g', grade_file, '-j', str(workers), '--stream'],
+                                 tmp_dir)
+            baseline = baseline or elapsed
+            # 每种进程数的判分结果都必须与单进程一致
+            same = filecmp.cmp(os.path.join(tmp_dir, grade_file),
+                               os.path.join(tmp_dir, f"Grade-{args.workers[0]}.txt"),
+                               shallow=False)
+            print(f"-j {workers}: {elapsed:.2f} s  speedup {baseline / elapsed:.2f}x"
+                  f"  {'same' if same else 'DIFFERENT'} grades")
+
+
+if __name__ == "__main__":
+    main()
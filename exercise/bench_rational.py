@@ -0,0 +1,76 @@
+"""
+Benchmark the integer-pair rational kernel against fractions.Fraction.
+
+Usage: python -m exercise.bench_rational [-n NUMBER_OF_EXPRESSIONS]
+"""
+
+import argparse
+import fractions
+import random
+import timeit
+
+from .rational import evaluate, equal, format_rational
+
+
+def make_expressions(count, range_limit=10, seed=0):
+    """
+    Build random expressions as (fraction operands, pair operands, operators).
+    """
+    rng = random.Random(seed)
+    expressions = []
+    for _ in range(count):
+        values = [fractions.Fraction(rng.randint(1, range_limit - 1), rng.randint(1, range_limit))
+                  for _ in range(rng.randint(2, 4))]
+        operators = [rng.choice('+-*/') for _ in values[1:]]
+        pairs = [(value.numerator, value.denominator) for value in values]
+        expressions.append((values, pairs, operators))
+    return expressions
+
+
+def grade_with_fraction(expressions):
+    """
+    Evaluate, compare and format every expression with Fraction.
+    """
+    for values, _, operators in expressions:
+        result = values[0]
+        for op_symbol, value in zip(operators, values[1:]):
+            if op_symbol == '+':
+                result += value
+            elif op_symbol == '-':
+                result -= value
+            elif op_symbol == '*':
+                result *= value
+            else:
+                result /= value
+        result = result.limit_denominator()
+        _ = result == values[0]
+        str(result)
+
+
+def grade_with_pairs(expressions):
+    """
+    Evaluate, compare and format every expression with integer pairs.
+    """
+    for _, pairs, operators in expressions:
+        result = evaluate(pairs, operators)
+        _ = equal(result, pairs[0])
+        format_rational(*result)
+
+
+def main():
+    """
+    Run both variants and print their timings and the speedup.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the rational kernel.')
+    parser.add_argument('-n', type=int, default=100000, help='Number of expressions')
+    args = parser.parse_args()
+    expressions = make_expressions(args.n)
+    fraction_time = min(timeit.repeat(lambda: grade_with_fraction(expressions), number=1, repeat=3))
+    pair_time = min(timeit.repeat(lambda: grade_with_pairs(expressions), number=1, repeat=3))
+    print(f"Fraction: {fraction_time:.3f} s")
+    print(f"pairs:    {pair_time:.3f} s")
+    print(f"speedup:  {fraction_time / pair_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load-test the grading service on localhost.
+
+Usage: python -m exercise.bench_service -a ANSWERS [--port PORT] [--requests N] [--clients C]
+       python -m exercise.bench_service --spawn [-n EXERCISES] [-r RANGE] [--requests N] [--clients C]
+
+Each of the C clients posts the answer file to /grade over a new
+connection, one request after another, until N requests have been sent.
+The script prints the client-side throughput and latency percentiles and
+the server's own /metrics. With --spawn it first generates exercises with
+need1 in a temporary directory and starts the service there on a free
+port, so no server needs to be running.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from .service import request
+
+
+# 包所在的目录，子进程据此导入 exercise 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 等待被启动的服务就绪的最长秒数
+STARTUP_TIMEOUT = 30
+
+
+async def run_load(host, port, body, total, clients):
+    """
+    Send total grade requests from several concurrent clients; return the latencies in seconds.
+    """
+    latencies = []
+    remaining = [total]
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            status, _ = await request(host, port, 'POST', '/grade', body)
+            if status != 200:
+                raise RuntimeError(f"the service answered {status}")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return latencies
+
+
+async def wait_until_ready(host, port, timeout=STARTUP_TIMEOUT):
+    """
+    Poll /health until the service answers or the timeout passes.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            status, _ = await request(host, port, 'GET', '/health')
+            if status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        await asyncio.sleep(0.1)
+
+
+def free_port():
+    """
+    Return a TCP port on localhost that is free right now.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def report(host, port, body, args):
+    """
+    Run the load test against a ready service and print the results.
+    """
+    started = time.perf_counter()
+    latencies = sorted(asyncio.run(run_load(host, port, body, args.requests, args.clients)))
+    elapsed = time.perf_counter() - started
+    print(f"{args.requests} requests, {args.clients} clients, {len(body)} bytes each: "
+          f"{args.requests / elapsed:.1f} requests/s")
+    print(f"client latency p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.1f} ms")
+    _, metrics = asyncio.run(request(host, port, 'GET', '/metrics'))
+    print(f"server metrics: {json.dumps(json.loads(metrics))}")
+
+
+def main(argv=None):
+    """
+    Load-test a running service, or spawn one on generated exercises first.
+    """
+    parser = argparse.ArgumentParser(description='Load-test the grading service.')
+    parser.add_argument('-a', '--answer_file', help='Answer file posted by every request')
+    parser.add_argument('--host', default='127.0.0.1', help='Service address')
+    parser.add_argument('--port', type=int, default=8000, help='Service port')
+    parser.add_argument('--requests', type=int, default=200, help='Total number of requests')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--spawn', action='store_true',
+                        help='Generate exercises and start a service for the test')
+    parser.add_argument('-n', type=int, default=1000, help='Exercises to generate with --spawn')
+    parser.add_argument('-r', type=int, default=10, help='Range limit used with --spawn')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Service concurrency limit used with --spawn')
+    args = parser.parse_args(argv)
+    if not args.spawn:
+        if not args.answer_file:
+            parser.error('-a is required unless --spawn is given')
+        with open(args.answer_file, 'rb') as f_ans:
+            body = f_ans.read()
+        report(args.host, args.port, body, args)
+        return
+    python_path = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+    env = dict(os.environ, PYTHONPATH=python_path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        subprocess.run([sys.executable, '-m', 'exercise.need1', '-n', str(args.n),
+                        '-r', str(args.r), '--seed', '0', '--answer-key'],
+                       cwd=tmp_dir, env=env, check=True, stdout=subprocess.DEVNULL)
+        port = free_port()
+        server = subprocess.Popen([sys.executable, '-m', 'exercise.service',
+                                   '-e', 'Exercises.txt', '--port', str(port),
+                                   '--concurrency', str(args.concurrency)],
+                                  cwd=tmp_dir, env=env, stdout=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_until_ready(args.host, port))
+            with open(os.path.join(tmp_dir, 'Answers.txt'), 'rb') as f_ans:
+                body = f_ans.read()
+            report(args.host, port, body, args)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark the start-up time of the exercise package and its command line tools.
+
+Usage: python -m exercise.bench_startup [--runs RUNS] [--budget MILLISECONDS]
+
+Each command runs as a fresh interpreter several times; the median wall
+time of a bare ``python -c pass`` is subtracted, so the figures are the
+cost of importing the package and parsing the command line. The script
+exits with status 1 if any command exceeds the budget.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# 包所在的目录，子进程据此导入 exercise 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 逐项测量的命令：(名称, 解释器参数)
+COMMANDS = (
+    ('import exercise', ['-c', 'import exercise']),
+    ('import exercise.need1', ['-c', 'import exercise.need1']),
+    ('import exercise.need2', ['-c', 'import exercise.need2']),
+    ('need1 --help', ['-m', 'exercise.need1', '--help']),
+    ('need2 --help', ['-m', 'exercise.need2', '--help']),
+)
+# 默认预算：相对空解释器的额外启动时间（毫秒）
+DEFAULT_BUDGET = 100.0
+
+
+def median_time(arguments, runs, env):
+    """
+    Run the interpreter with the arguments several times; return the median wall time in ms.
+    """
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    """
+    Time every command, print the overhead over a bare interpreter and enforce the budget.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark package start-up time.')
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='Allowed start-up overhead per command in milliseconds')
+    args = parser.parse_args(argv)
+    python_path = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+    env = dict(os.environ, PYTHONPATH=python_path)
+    baseline = median_time(['-c', 'pass'], args.runs, env)
+    print(f"python -c pass: {baseline:.1f} ms")
+    over_budget = []
+    for name, arguments in COMMANDS:
+        overhead = median_time(arguments, args.runs, env) - baseline
+        within = overhead <= args.budget
+        print(f"{name}: +{overhead:.1f} ms  {'ok' if within else 'OVER BUDGET'}")
+        if not within:
+            over_budget.append(name)
+    if over_budget:
+        print(f"Over the {args.budget:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Benchmark suite for generation and grading across n, r and operator count.
+
+Usage: python -m exercise.bench_suite [-n N ...] [-r R ...] [--operators K ...]
+           [--bench NAME ...] [--save FILE] [--compare FILE] [--threshold FRACTION]
+
+Every benchmark runs for each combination of exercise count n, range
+limit r and operator count. Work is timed in chunks of CHUNK items, and
+p50/p99 are the per-item latencies of those chunks;
+generate_and_write_expressions writes whole files, so each call is one
+chunk. Peak memory is the tracemalloc peak of a second, untimed pass
+(skip it with --no-memory). Deduplicated generation is skipped when n
+exceeds the number of valid expressions of that r and operator count;
+closer to it, need1 samples the enumerated space instead of retrying.
+
+--save writes the results as a JSON baseline. --compare reads one and
+exits with status 1 if a case lost more than --threshold of its
+throughput or grew its peak memory by more than that fraction.
+Baselines are only comparable on the same machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+from .dedup import ExpressionIndex
+from .grades import GradeFlags
+from .need1 import generate_and_write_expressions, iter_expressions
+from .need2 import check_answers, parse_expression, write_grades
+from .space import ENUMERATE_MARGIN, estimate_space, expression_space
+
+
+# 每次计时的题目数
+CHUNK = 1000
+DEFAULT_COUNTS = (100, 1000, 10000)
+DEFAULT_RANGES = (5, 10, 100, 1000)
+DEFAULT_OPERATORS = (1, 2, 3)
+DEFAULT_THRESHOLD = 0.2
+# 每隔多少道题故意写一个错误答案，使判分结果两类都有
+WRONG_EVERY = 10
+
+
+def percentile(values, fraction):
+    """
+    Return the value at a fraction of a sorted list (nearest rank).
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_chunks(count, call):
+    """
+    Call call(start, size) for consecutive chunks of count items; return (items, seconds) samples.
+
+    call returns the number of items it handled. Fewer than size means
+    the work ran out (a used-up expression space), and no more chunks
+    are timed.
+    """
+    samples = []
+    for start in range(0, count, CHUNK):
+        size = min(CHUNK, count - start)
+        started = time.perf_counter()
+        items = call(start, size)
+        elapsed = time.perf_counter() - started
+        if items:
+            samples.append((items, elapsed))
+        if items < size:
+            break
+    return samples
+
+
+def make_grading_data(count, range_limit, num_operators):
+    """
+    Build numbered exercise and answer lines; every WRONG_EVERY-th answer is wrong.
+    """
+    rng = random.Random(1)
+    exercises = []
+    answers = []
+    for idx, (expression, answer) in enumerate(
+            iter_expressions(count, range_limit, None, rng, num_operators=num_operators),
+            start=1):
+        exercises.append(f"{idx}. {expression}\n")
+        # 在答案末尾追加数字，值一定改变
+        answers.append(f"{idx}. {answer}{'9' if idx % WRONG_EVERY == 0 else ''}\n")
+    return exercises, answers
+
+
+def bench_generate_expressions(case):
+    """
+    Generate case.n unique expressions from one stream, timed in chunks.
+    """
+    stream = iter_expressions(case.n, case.r, ExpressionIndex(case.n), random.Random(0),
+                              num_operators=case.operators)
+    return run_chunks(case.n, lambda start, size: len(list(islice(stream, size))))
+
+
+def bench_generate_and_write_expressions(case):
+    """
+    Generate and write Exercises.txt/Answers.txt into a temporary directory.
+    """
+    cwd = os.getcwd()
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            for _ in range(3 if case.n <= 10 * CHUNK else 1):
+                started = time.perf_counter()
+                count = generate_and_write_expressions(case.n, case.r, ExpressionIndex(), seed=0,
+                                                       num_operators=case.operators)
+                samples.append((count, time.perf_counter() - started))
+        finally:
+            os.chdir(cwd)
+    return samples
+
+
+def bench_parse_expression(case):
+    """
+    Parse every exercise text with the full tokenizer.
+    """
+    texts = [line.partition('. ')[2] for line in case.data()[0]]
+
+    def call(start, size):
+        for text in texts[start:start + size]:
+            parse_expression(text)
+        return size
+
+    return run_chunks(case.n, call)
+
+
+def bench_check_answers(case):
+    """
+    Grade the exercises chunk by chunk with check_answers.
+    """
+    exercises, answers = case.data()
+
+    def call(start, size):
+        check_answers(exercises[start:start + size], answers[start:start + size])
+        return size
+
+    return run_chunks(case.n, call)
+
+
+def bench_write_grades(case):
+    """
+    Write Grade.txt for each chunk of graded exercises.
+    """
+    chunks = []
+    for start in range(0, case.n, CHUNK):
+        numbers = range(start + 1, min(start + CHUNK, case.n) + 1)
+        chunks.append(GradeFlags(bytes(bool(idx % WRONG_EVERY) for idx in numbers)))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        grade_file = os.path.join(tmp_dir, 'Grade.txt')
+
+        def call(start, size):
+            write_grades(chunks[start // CHUNK], grade_file)
+            return size
+
+        return run_chunks(case.n, call)
+
+
+BENCHMARKS = {
+    'generate_expressions': bench_generate_expressions,
+    'generate_and_write_expressions': bench_generate_and_write_expressions,
+    'parse_expression': bench_parse_expression,
+    'check_answers': bench_check_answers,
+    'write_grades': bench_write_grades,
+}
+# 需要查重生成、受表达式空间大小限制的基准
+DEDUP_BENCHMARKS = ('generate_expressions', 'generate_and_write_expressions')
+
+
+class Case:
+    """
+    One (n, r, operators) combination; the grading input is built once and shared.
+    """
+
+    def __init__(self, count, range_limit, num_operators):
+        self.n = count
+        self.r = range_limit
+        self.operators = num_operators
+        self._data = None
+
+    def data(self):
+        """
+        Return the (exercises, answers) lines of this case, building them on first use.
+        """
+        if self._data is None:
+            self._data = make_grading_data(self.n, self.r, self.operators)
+        return self._data
+
+    def key(self, name):
+        """
+        Return the baseline key of a benchmark run on this case.
+        """
+        return f"{name} n={self.n} r={self.r} ops={self.operators}"
+
+
+def measure(name, case, memory=True):
+    """
+    Run one benchmark on one case; return its result dictionary.
+    """
+    samples = BENCHMARKS[name](case)
+    items = sum(size for size, _ in samples)
+    seconds = sum(elapsed for _, elapsed in samples)
+    latencies = sorted(elapsed / size for size, elapsed in samples)
+    result = {'benchmark': name, 'n': case.n, 'r': case.r, 'operators': case.operators,
+              'throughput': items / seconds if seconds else float('inf'),
+              'p50_us': percentile(latencies, 0.5) * 1e6,
+              'p99_us': percentile(latencies, 0.99) * 1e6}
+    if memory:
+        # 输入数据在计时前已经建好，峰值只反映被测函数本身
+        tracemalloc.start()
+        try:
+            BENCHMARKS[name](case)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a message for every case that regressed beyond threshold against baseline.
+    """
+    previous = {item['key']: item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        before = previous.get(item['key'])
+        if before is None:
+            continue
+        if item['throughput'] < before['throughput'] * (1 - threshold):
+            regressions.append(f"{item['key']}: throughput {item['throughput']:.0f}/s, "
+                               f"baseline {before['throughput']:.0f}/s")
+        if 'peak_bytes' in item and 'peak_bytes' in before \
+                and item['peak_bytes'] > before['peak_bytes'] * (1 + threshold):
+            regressions.append(f"{item['key']}: peak {item['peak_bytes']} B, "
+                               f"baseline {before['peak_bytes']} B")
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the selected benchmarks over the sweep, print a table and save or compare baselines.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark generation and grading.')
+    parser.add_argument('-n', type=int, nargs='+', default=list(DEFAULT_COUNTS),
+                        help='Exercise counts to sweep (up to 10000000)')
+    parser.add_argument('-r', type=int, nargs='+', default=list(DEFAULT_RANGES),
+                        help='Range limits to sweep')
+    parser.add_argument('--operators', type=int, nargs='+', choices=[1, 2, 3],
+                        default=list(DEFAULT_OPERATORS), help='Operator counts to sweep')
+    parser.add_argument('--bench', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help='Benchmarks to run')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the tracemalloc pass that measures peak memory')
+    parser.add_argument('--save', help='Write the results to this JSON baseline file')
+    parser.add_argument('--compare', help='Compare the results with this JSON baseline file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed relative regression before failing (default 0.2)')
+    args = parser.parse_args(argv)
+    results = []
+    print(f"{'benchmark':32} {'n':>8} {'r':>5} {'ops':>3} {'items/s':>11} "
+          f"{'p50 us':>8} {'p99 us':>8} {'peak MB':>8}")
+    for count in args.n:
+        for range_limit in args.r:
+            for num_operators in args.operators:
+                case = Case(count, range_limit, num_operators)
+                for name in args.bench:
+                    # 只有估计值接近 n 时才精确计数
+                    if name in DEDUP_BENCHMARKS and \
+                            count * ENUMERATE_MARGIN > estimate_space(range_limit, num_operators) \
+                            and count > len(expression_space(range_limit, num_operators)):
+                        print(f"{name:32} {count:>8} {range_limit:>5} {num_operators:>3} "
+                              f"skipped: n exceeds the expression space")
+                        continue
+                    result = measure(name, case, memory=not args.no_memory)
+                    result['key'] = case.key(name)
+                    results.append(result)
+                    peak = f"{result['peak_bytes'] / 2 ** 20:8.1f}" if 'peak_bytes' in result \
+                        else f"{'-':>8}"
+                    print(f"{name:32} {count:>8} {range_limit:>5} {num_operators:>3} "
+                          f"{result['throughput']:>11.0f} {result['p50_us']:>8.2f} "
+                          f"{result['p99_us']:>8.2f} {peak}")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f_out:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'results': results}, f_out, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f_in:
+            regressions = compare(results, json.load(f_in), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Binary columnar format for exercise and answer files.
+
+A binary file starts with a 32-byte header (magic tag, rows per group,
+row count) followed by row groups. Each group stores its rows column by
+column as fixed-width little-endian arrays, widest columns first, so
+every column of a group is 8-byte aligned and can be read through a
+``memoryview`` cast of the memory-mapped file without any per-line
+string handling.
+
+Exercises.bin columns, per row: four int32 (numerator, denominator)
+operand pairs (unused slots are 0/1), the uint8 operator count and
+three uint8 operator codes (compact.OPCODES; unused slots are 0). Answers.bin
+columns, per row: int64 numerator and denominator in lowest terms; a
+denominator of 0 marks an answer that could not be parsed.
+
+Usage: python -m exercise.binformat {to-bin,to-text} EXERCISES ANSWERS OUT_EXERCISES OUT_ANSWERS
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from itertools import chain, zip_longest
+
+from .compact import CompiledExpression, OPCODES, SYMBOLS
+from .rational import format_rational, normalize, parse_rational
+
+
+EXERCISE_MAGIC = b'EXBIN1\0\0'
+ANSWER_MAGIC = b'EXANS1\0\0'
+HEADER = struct.Struct('<8sIQ12x')
+# 每组的行数，取 8 的倍数以保证每一列都按 8 字节对齐
+GROUP_ROWS = 4096
+# need1 的题目最多 3 个运算符
+MAX_OPERATORS = 3
+# 列定义：(类型码, 每行的元素个数)
+EXERCISE_COLUMNS = (('i', 2 * (MAX_OPERATORS + 1)), ('B', 1), ('B', MAX_OPERATORS))
+ANSWER_COLUMNS = (('q', 2),)
+# 按运算符个数预先准备好的补位值
+OPERAND_PADDING = [(0, 1) * (MAX_OPERATORS - width) for width in range(MAX_OPERATORS + 1)]
+CODE_PADDING = [bytes(MAX_OPERATORS - width) for width in range(MAX_OPERATORS + 1)]
+# 运算符字符到编码的字节转换表
+CODE_TABLE = bytes.maketrans(''.join(OPCODES).encode('ascii'), bytes(OPCODES.values()))
+
+
+class ColumnWriter:
+    """
+    Write rows of fixed-width columns to a binary file, one row group at a time.
+    """
+
+    def __init__(self, path, magic, columns, group_rows=GROUP_ROWS):
+        self.magic = magic
+        self.columns = columns
+        self.group_rows = group_rows
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(magic, group_rows, 0))
+
+    def write_group(self, rows, *values):
+        """
+        Write one group of rows; values holds one flat list of ints per column.
+
+        Every group but the last must hold exactly group_rows rows. Raise
+        OverflowError if a value does not fit its column.
+        """
+        if self.count % self.group_rows:
+            raise ValueError('only the last row group may be short')
+        for (typecode, _), column in zip(self.columns, values):
+            self._file.write(array(typecode, column))
+        self.count += rows
+
+    def close(self):
+        """
+        Write the final row count into the header.
+        """
+        # 行数最后才知道，回到文件头补写
+        self._file.seek(0)
+        self._file.write(HEADER.pack(self.magic, self.group_rows, self.count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class ColumnReader:
+    """
+    Read-only memory-mapped view of a file written by ColumnWriter.
+    """
+
+    def __init__(self, path, magic, columns):
+        with open(path, 'rb') as f_in:
+            header = f_in.read(HEADER.size)
+            if len(header) < HEADER.size or header[:8] != magic:
+                raise ValueError(f"{path} is not a {magic[:6].decode('ascii')} file")
+            self._mapped = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+        _, self.group_rows, self.count = HEADER.unpack(header)
+        self.columns = columns
+        row_size = sum(array(typecode).itemsize * width for typecode, width in columns)
+        if len(self._mapped) != HEADER.size + self.count * row_size:
+            raise ValueError(f"{path} is truncated or corrupt")
+
+    def __len__(self):
+        return self.count
+
+    def iter_groups(self):
+        """
+        Yield (rows, columns) per row group; columns are memoryview casts into the file.
+        """
+        view = memoryview(self._mapped)
+        position = HEADER.size
+        remaining = self.count
+        while remaining:
+            rows = min(remaining, self.group_rows)
+            columns = []
+            for typecode, width in self.columns:
+                size = array(typecode).itemsize * width * rows
+                columns.append(view[position:position + size].cast(typecode))
+                position += size
+            yield rows, columns
+            remaining -= rows
+
+
+def is_binary(path, magic=EXERCISE_MAGIC):
+    """
+    Return True if the file starts with the given magic tag.
+    """
+    try:
+        with open(path, 'rb') as f_in:
+            return f_in.read(len(magic)) == magic
+    except OSError:
+        return False
+
+
+def iter_exercise_rows(path):
+    """
+    Yield (pairs, operators) for each row of an Exercises.bin file.
+    """
+    reader = ColumnReader(path, EXERCISE_MAGIC, EXERCISE_COLUMNS)
+    for rows, (operands, widths, codes) in reader.iter_groups():
+        for row in range(rows):
+            yield decode_row(operands, widths, codes, row)
+
+
+def decode_row(operands, widths, codes, row):
+    """
+    Return (pairs, operators) of one row of an Exercises.bin row group.
+    """
+    width = widths[row]
+    start = row * 2 * (MAX_OPERATORS + 1)
+    values = operands[start:start + 2 * width + 2]
+    operators = [SYMBOLS[code] for code in codes[row * MAX_OPERATORS:row * MAX_OPERATORS + width]]
+    return list(zip(values[::2], values[1::2])), operators
+
+
+def iter_answer_rows(path):
+    """
+    Yield each answer pair of an Answers.bin file, or None for an invalid answer.
+    """
+    reader = ColumnReader(path, ANSWER_MAGIC, ANSWER_COLUMNS)
+    for _, (answers,) in reader.iter_groups():
+        values = answers.tolist()
+        for num, den in zip(values[::2], values[1::2]):
+            yield (num, den) if den else None
+
+
+def write_binary(rows, exercise_file='Exercises.bin', answer_file='Answers.bin'):
+    """
+    Write (pairs, operators, answer) rows to binary exercise and answer files.
+
+    answer is a pair or None. Raise ValueError for an expression with more
+    than MAX_OPERATORS operators and OverflowError for a value too large
+    for its column. Return the number of rows written.
+    """
+    with ColumnWriter(exercise_file, EXERCISE_MAGIC, EXERCISE_COLUMNS) as exercise_writer, \
+            ColumnWriter(answer_file, ANSWER_MAGIC, ANSWER_COLUMNS) as answer_writer:
+        operands = []
+        widths = bytearray()
+        codes = bytearray()
+        answers = []
+        for pairs, operators, answer in rows:
+            width = len(operators)
+            if width > MAX_OPERATORS or len(pairs) != width + 1:
+                raise ValueError(f"expressions may have at most {MAX_OPERATORS} operators")
+            operands += chain.from_iterable(pairs)
+            operands += OPERAND_PADDING[width]
+            widths.append(width)
+            codes += ''.join(operators).encode('ascii').translate(CODE_TABLE)
+            codes += CODE_PADDING[width]
+            answers += normalize(*answer) if answer is not None else (0, 0)
+            if len(widths) == GROUP_ROWS:
+                exercise_writer.write_group(GROUP_ROWS, operands, widths, codes)
+                answer_writer.write_group(GROUP_ROWS, answers)
+                operands.clear()
+                widths.clear()
+                codes.clear()
+                answers.clear()
+        exercise_writer.write_group(len(widths), operands, widths, codes)
+        answer_writer.write_group(len(widths), answers)
+    return exercise_writer.count
+
+
+def parse_chain(expression):
+    """
+    Parse a need1 text chain such as '5  + 1 / (1/2)' into (pairs, operators).
+
+    Raise ValueError for anything that is not such a chain.
+    """
+    parts = expression.split()
+    if not len(parts) & 1:
+        raise ValueError(f"'{expression}' is not a left-to-right chain")
+    pairs = []
+    for text in parts[::2]:
+        if text[0] == '(' and text[-1] == ')':
+            text = text[1:-1]
+        pairs.append(parse_rational(text))
+    operators = parts[1::2]
+    if any(op_symbol not in OPCODES for op_symbol in operators):
+        raise ValueError(f"'{expression}' is not a left-to-right chain")
+    return pairs, operators
+
+
+def text_to_binary(exercise_text, answer_text, exercise_bin, answer_bin):
+    """
+    Convert Exercises.txt/Answers.txt into binary files; return the row count.
+
+    Answers that cannot be parsed are stored as invalid. Raise ValueError
+    if the two files do not have the same number of lines.
+    """
+    def rows():
+        with open(exercise_text, 'r', encoding='utf-8') as f_ex, \
+                open(answer_text, 'r', encoding='utf-8') as f_ans:
+            for line, (exercise, answer) in enumerate(zip_longest(f_ex, f_ans), start=1):
+                if exercise is None or answer is None:
+                    # 行数不同时不能静默丢掉多出的题目或答案
+                    shorter, longer = (answer_text, exercise_text) if answer is None \
+                        else (exercise_text, answer_text)
+                    raise ValueError(f"{shorter} has {line - 1} lines, fewer than {longer}")
+                pairs, operators = parse_chain(exercise.partition('. ')[2])
+                try:
+                    answer = parse_rational(answer.partition('. ')[2])
+                except (ValueError, ZeroDivisionError):
+                    answer = None
+                yield pairs, operators, answer
+
+    return write_binary(rows(), exercise_bin, answer_bin)
+
+
+def binary_to_text(exercise_bin, answer_bin, exercise_text, answer_text):
+    """
+    Convert binary exercise and answer files back into the text format; return the row count.
+    """
+    count = 0
+    with open(exercise_text, 'w', encoding='utf-8') as f_ex, \
+            open(answer_text, 'w', encoding='utf-8') as f_ans:
+        answers = iter_answer_rows(answer_bin)
+        for count, (pairs, operators) in enumerate(iter_exercise_rows(exercise_bin), start=1):
+            f_ex.write(f"{count}. {CompiledExpression.from_chain(pairs, operators).format()}\n")
+            answer = next(answers, None)
+            f_ans.write(f"{count}. {format_answer(answer)}\n")
+    return count
+
+
+def format_answer(answer):
+    """
+    Format an answer pair as need1 does; an invalid answer becomes '?'.
+    """
+    return format_rational(*answer) if answer is not None else '?'
+
+
+def main(argv=None):
+    """
+    Convert between the text and binary formats from the command line.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description='Convert exercise files between text and binary.')
+    parser.add_argument('direction', choices=['to-bin', 'to-text'], help='Conversion direction')
+    parser.add_argument('paths', nargs=4, metavar='PATH',
+                        help='Input exercises, input answers, output exercises, output answers')
+    args = parser.parse_args(argv)
+    convert = text_to_binary if args.direction == 'to-bin' else binary_to_text
+    try:
+        print(f"Converted {convert(*args.paths)} exercises")
+    except (OSError, ValueError, OverflowError) as e_symbol:
+        print(f"An error occurred: {e_symbol}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Checkpoints that let need1 resume or extend a text generation run in place.
+
+A run with checkpoints draws its exercises from seeded shards (see
+need1.iter_sharded), so the position of the random streams is just the
+next shard and the offset of the next candidate in it, plus the number
+of indices drawn from each enumerated expression space. Every
+``checkpoint_every`` exercises the writer is drained and two sidecars of
+Exercises.txt are updated:
+
+- ``Exercises.txt.ckpt``: JSON with the seed, the generation options, the
+  enumerated operator counts, the stream position, the number of exercises written, the byte sizes of
+  Exercises.txt and Answers.txt at that point and the number of valid
+  entries in the hash log. It is replaced atomically, so a run killed at
+  any moment leaves the previous checkpoint intact.
+- ``Exercises.txt.ckpt.hashes``: an append-only log of the canonical
+  hashes of the written exercises, little-endian uint64, from which the
+  duplicate index is rebuilt. Appending keeps each checkpoint cheap; the
+  whole table is never rewritten.
+
+On resume, the text files and the hash log are truncated to the sizes
+the checkpoint records, which drops whatever was written after it, and
+generation continues from the saved position with the next number.
+Checkpoints protect against a killed process; the files are not fsynced.
+"""
+
+import json
+import os
+import sys
+from array import array
+
+
+CHECKPOINT_SUFFIX = '.ckpt'
+HASHES_SUFFIX = '.hashes'
+# 默认每写出多少道题保存一次检查点
+CHECKPOINT_EVERY = 1000000
+VERSION = 1
+
+
+def checkpoint_path(exercise_file):
+    """
+    Return the checkpoint path of an exercise file.
+    """
+    return exercise_file + CHECKPOINT_SUFFIX
+
+
+def hashes_path(exercise_file):
+    """
+    Return the hash log path of an exercise file.
+    """
+    return checkpoint_path(exercise_file) + HASHES_SUFFIX
+
+
+def new_state(seed, range_limit, num_operators, dedup, shard_size):
+    """
+    Return the checkpoint state of a run that has not written anything yet.
+    """
+    return {'version': VERSION, 'seed': seed, 'range_limit': range_limit,
+            'num_operators': num_operators, 'dedup': dedup, 'shard_size': shard_size,
+            'shard': 0, 'offset': 0, 'count': 0, 'exercise_bytes': 0, 'answer_bytes': 0,
+            'hashes': 0, 'enumerated': [], 'drawn': {}}
+
+
+def write_checkpoint(exercise_file, state):
+    """
+    Atomically replace the checkpoint of an exercise file.
+    """
+    path = checkpoint_path(exercise_file)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f_out:
+        json.dump(state, f_out)
+    os.replace(path + '.tmp', path)
+
+
+def load_checkpoint(exercise_file):
+    """
+    Return the checkpoint state of an exercise file, or None if there is none.
+
+    Raise ValueError if the checkpoint cannot be read or does not match
+    the files, which are never shorter than what it records.
+    """
+    try:
+        with open(checkpoint_path(exercise_file), 'r', encoding='utf-8') as f_in:
+            state = json.load(f_in)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e_symbol:
+        raise ValueError(f"unreadable checkpoint: {e_symbol}") from e_symbol
+    if state.get('version') != VERSION:
+        raise ValueError(f"unsupported checkpoint version {state.get('version')}")
+    return state
+
+
+def restore_files(exercise_file, answer_file, state):
+    """
+    Truncate the text files and the hash log to the sizes the checkpoint records.
+    """
+    for path, size in ((exercise_file, state['exercise_bytes']),
+                       (answer_file, state['answer_bytes']),
+                       (hashes_path(exercise_file), state['hashes'] * 8)):
+        if not os.path.exists(path) and not size:
+            open(path, 'wb').close()
+        if os.path.getsize(path) < size:
+            raise ValueError(f"{path} is shorter than its checkpoint; it cannot be resumed")
+        os.truncate(path, size)
+
+
+def load_hashes(exercise_file, state):
+    """
+    Return the array of hashes the checkpoint counts as written.
+    """
+    hashes = array('Q')
+    with open(hashes_path(exercise_file), 'rb') as f_in:
+        hashes.fromfile(f_in, state['hashes'])
+    if sys.byteorder == 'big':
+        hashes.byteswap()
+    return hashes
+
+
+def append_hashes(f_log, hashes):
+    """
+    Append hashes to an open hash log.
+    """
+    hashes = array('Q', hashes)
+    if sys.byteorder == 'big':
+        hashes.byteswap()
+    hashes.tofile(f_log)
+    f_log.flush()
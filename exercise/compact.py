@@ -0,0 +1,156 @@
+"""
+Compiled, compact form of an arithmetic expression.
+
+An expression is stored once as postfix opcodes (a ``bytes`` object) and
+a flat tuple of operand numerators and denominators. need1 builds it
+directly while generating, need2 compiles each exercise line into it
+once, and both evaluate and format from it without reparsing text.
+"""
+
+from .rational import apply, format_rational, normalize, to_pair
+
+
+PUSH = 0
+OPCODES = {'+': 1, '-': 2, '*': 3, '/': 4}
+SYMBOLS = ' +-*/'
+# 题目文本约定从左到右计算，四种运算同一优先级；括号决定分组
+PRECEDENCE = {'+': 1, '-': 1, '*': 1, '/': 1}
+
+
+class CompiledExpression:
+    """
+    Postfix opcodes plus flat operand values of one expression.
+    """
+
+    __slots__ = ('code', 'values')
+
+    def __init__(self, code, values):
+        self.code = code
+        self.values = values
+
+    def __eq__(self, other):
+        return (isinstance(other, CompiledExpression)
+                and self.code == other.code and self.values == other.values)
+
+    def __hash__(self):
+        return hash((self.code, self.values))
+
+    def __repr__(self):
+        return f"CompiledExpression({self.format()!r})"
+
+    @classmethod
+    def from_chain(cls, operands, operators):
+        """
+        Compile a left-to-right chain of operands and operators.
+        """
+        code = bytearray([PUSH])
+        values = list(to_pair(operands[0]))
+        for op_symbol, operand in zip(operators, operands[1:]):
+            code.append(PUSH)
+            code.append(OPCODES[op_symbol])
+            values.extend(to_pair(operand))
+        return cls(bytes(code), tuple(values))
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        """
+        Compile an infix token sequence with the shunting-yard algorithm.
+
+        Tokens are operand pairs, operator symbols and the parentheses
+        '(' and ')'. Operators of equal precedence group to the left.
+        Raise ValueError on unbalanced parentheses or misplaced tokens.
+        """
+        code = bytearray()
+        values = []
+        pending = []
+        expect_operand = True
+        for token in tokens:
+            if isinstance(token, tuple):
+                if not expect_operand:
+                    raise ValueError('missing operator before operand')
+                code.append(PUSH)
+                values.extend(token)
+                expect_operand = False
+            elif token == '(':
+                if not expect_operand:
+                    raise ValueError("missing operator before '('")
+                pending.append(token)
+            elif token == ')':
+                if expect_operand:
+                    raise ValueError("missing operand before ')'")
+                while pending and pending[-1] != '(':
+                    code.append(OPCODES[pending.pop()])
+                if not pending:
+                    raise ValueError("unbalanced ')'")
+                pending.pop()
+            else:
+                if expect_operand:
+                    raise ValueError(f"missing operand before '{token}'")
+                while pending and pending[-1] != '(' \
+                        and PRECEDENCE[pending[-1]] >= PRECEDENCE[token]:
+                    code.append(OPCODES[pending.pop()])
+                pending.append(token)
+                expect_operand = True
+        if expect_operand:
+            raise ValueError('expression ends without an operand')
+        while pending:
+            op_symbol = pending.pop()
+            if op_symbol == '(':
+                raise ValueError("unbalanced '('")
+            code.append(OPCODES[op_symbol])
+        return cls(bytes(code), tuple(values))
+
+    def evaluate(self):
+        """
+        Evaluate the postfix code and return an unnormalized result pair.
+        """
+        values = self.values
+        stack = []
+        position = 0
+        for opcode in self.code:
+            if opcode == PUSH:
+                stack.append((values[position], values[position + 1]))
+                position += 2
+            else:
+                other_num, other_den = stack.pop()
+                num, den = stack.pop()
+                stack.append(apply(num, den, SYMBOLS[opcode], other_num, other_den))
+        return stack[0]
+
+    def chain(self):
+        """
+        Return (operand pairs, operators) if the expression is a left-to-right chain, else None.
+        """
+        code = self.code
+        if code[0] != PUSH or any(code[i] != PUSH for i in range(1, len(code), 2)) \
+                or any(code[i] == PUSH for i in range(2, len(code), 2)):
+            return None
+        values = self.values
+        pairs = [(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+        return pairs, [SYMBOLS[code[i]] for i in range(2, len(code), 2)]
+
+    def format(self):
+        """
+        Format the expression in the Exercises.txt text format.
+
+        The right operand of '-' and '/' and every compound right operand
+        is parenthesized; the first operand is followed by two spaces, as
+        need1 has always written it.
+        """
+        values = self.values
+        stack = []
+        position = 0
+        for opcode in self.code:
+            if opcode == PUSH:
+                num, den = normalize(values[position], values[position + 1])
+                stack.append((format_rational(num, den), True))
+                position += 2
+            else:
+                right, right_is_leaf = stack.pop()
+                left, left_is_leaf = stack.pop()
+                op_symbol = SYMBOLS[opcode]
+                if op_symbol in '-/' or not right_is_leaf:
+                    right = f"({right})"
+                separator = '  ' if left_is_leaf else ' '
+                stack.append((f"{left}{separator}{op_symbol} {right}", False))
+        return stack[0][0]
@@ -0,0 +1,151 @@
+"""
+Canonical forms and a duplicate index for generated expressions.
+
+Two exercises are duplicates when one can be turned into the other by
+commuting the operands of ``+``/``*`` or by regrouping a chain of
+``+``/``-`` (or ``*``/``/``) terms, e.g. ``1 + 2 - 3`` and ``2 - 3 + 1``.
+"""
+
+import hashlib
+from array import array
+
+
+# 叶子节点与运算链的标签，保证各种节点之间可以互相比较排序
+LEAF = '#'
+PRODUCT = '*'
+SUM = '+'
+
+
+def leaf_key(number):
+    """
+    Return the canonical key of a single operand.
+
+    The operand is an int, a Fraction or a reduced (numerator, denominator) pair.
+    """
+    if isinstance(number, int):
+        return (LEAF, number, 1)
+    if isinstance(number, tuple):
+        return (LEAF, number[0], number[1])
+    return (LEAF, number.numerator, number.denominator)
+
+
+def canonical_key(operands, operators):
+    """
+    Return the canonical form of a left-to-right expression.
+
+    Consecutive ``+``/``-`` operations are flattened into a sorted tuple
+    of added terms and a sorted tuple of subtracted terms; ``*``/``/`` are
+    handled the same way with multiplied and divided factors.
+    """
+    current = leaf_key(operands[0])
+    chain = None  # 当前正在累积的运算链：SUM 或 PRODUCT
+    positive = negative = None
+    for op_symbol, operand in zip(operators, operands[1:]):
+        kind = SUM if op_symbol in '+-' else PRODUCT
+        if kind != chain:
+            if chain is not None:
+                current = (chain, tuple(sorted(positive)), tuple(sorted(negative)))
+            chain = kind
+            positive = [current]
+            negative = []
+        if op_symbol in '+*':
+            positive.append(leaf_key(operand))
+        else:
+            negative.append(leaf_key(operand))
+    if chain is not None:
+        current = (chain, tuple(sorted(positive)), tuple(sorted(negative)))
+    return current
+
+
+def key_hash(key):
+    """
+    Return a stable, non-zero 64-bit hash of a canonical key.
+    """
+    digest = hashlib.blake2b(repr(key).encode('ascii'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class ExpressionIndex:
+    """
+    Set of canonical expression hashes with O(1) insert and lookup.
+
+    Hashes are kept in a flat open-addressing table of unsigned 64-bit
+    slots (16-32 bytes per entry), so a few million exercises fit in well
+    under 100 MB. ``rejected`` counts candidates refused as duplicates.
+    """
+
+    def __init__(self, capacity=1024):
+        size = 8
+        while size < capacity * 2:
+            size <<= 1
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        self.rejected = 0
+        self.last_hash = 0  # 最近一次成功插入的哈希
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key_or_hash):
+        key_hash_value = key_or_hash if isinstance(key_or_hash, int) else key_hash(key_or_hash)
+        slots = self._slots
+        mask = self._mask
+        pos = key_hash_value & mask
+        while True:
+            slot = slots[pos]
+            if slot == key_hash_value:
+                return True
+            if slot == 0:
+                return False
+            pos = (pos + 1) & mask
+
+    def add_hash(self, key_hash_value):
+        """
+        Insert a hash; return False (and count a rejection) if already present.
+        """
+        slots = self._slots
+        mask = self._mask
+        pos = key_hash_value & mask
+        while True:
+            slot = slots[pos]
+            if slot == key_hash_value:
+                self.rejected += 1
+                return False
+            if slot == 0:
+                break
+            pos = (pos + 1) & mask
+        slots[pos] = key_hash_value
+        self.last_hash = key_hash_value
+        self._count += 1
+        if self._count * 2 > len(slots):
+            self._grow()
+        return True
+
+    def update(self, key_hashes):
+        """
+        Insert many hashes, e.g. those saved by a checkpoint; return how many were new.
+        """
+        added = 0
+        for key_hash_value in key_hashes:
+            added += self.add_hash(key_hash_value)
+        return added
+
+    def add(self, operands, operators):
+        """
+        Insert an expression; return False if an equivalent one exists.
+        """
+        return self.add_hash(key_hash(canonical_key(operands, operators)))
+
+    def _grow(self):
+        """Double the table and reinsert every stored hash."""
+        old = self._slots
+        size = len(old) * 2
+        self._slots = slots = array('Q', bytes(8 * size))
+        self._mask = mask = size - 1
+        for key_hash_value in old:
+            if key_hash_value:
+                pos = key_hash_value & mask
+                while slots[pos]:
+                    pos = (pos + 1) & mask
+                slots[pos] = key_hash_value
@@ -0,0 +1,178 @@
+"""
+Compact grade tracking and the Grade.txt report.
+
+GradeFlags keeps one byte per exercise (1 correct, 0 wrong) in a
+bytearray, numbered from 1, instead of two lists of Python ints. Counts
+come from bytearray.count and runs of equal grades from bytearray.find,
+both of which scan in C, so the summary and the range-compressed report
+cost O(runs) Python steps and never build the index lists.
+
+The report lists the numbers of each kind as ranges, e.g.
+``Correct: 9998 (1-4000, 4002-9999)``; a run of one exercise is written
+as a single number. The verbose report keeps the original layout with
+every number listed. Both are produced in pieces, so no single string
+holds all of the numbers. iter_runs collapses a stream of grades into
+the same runs without keeping the flags, for reports written in
+constant memory (see need2.write_grades_stream).
+"""
+
+from itertools import chain, islice
+
+
+# 报告每段最多列出的题号或区间数
+REPORT_PIECE = 1 << 16
+_FLAG_BYTES = (b'\x00', b'\x01')
+
+
+class GradeFlags:
+    """
+    One byte per graded exercise, exercise numbers starting at 1.
+    """
+
+    def __init__(self, flags=b''):
+        self.flags = bytearray(flags)
+
+    @classmethod
+    def from_pairs(cls, grades):
+        """
+        Collect (index, is_correct) pairs whose indices run 1, 2, 3, ... in order.
+        """
+        grades_flags = cls()
+        append = grades_flags.flags.append
+        for _, is_correct in grades:
+            append(is_correct)
+        return grades_flags
+
+    @classmethod
+    def from_lists(cls, correct, wrong):
+        """
+        Build the flags of the lists of correct and wrong numbers.
+
+        Together the lists must hold every number from 1 to their total
+        length exactly once; raise ValueError otherwise.
+        """
+        total = len(correct) + len(wrong)
+        flags = bytearray(total)
+        seen = bytearray(total)
+        for value, numbers in ((1, correct), (0, wrong)):
+            for idx in numbers:
+                if not 1 <= idx <= total or seen[idx - 1]:
+                    raise ValueError(f"exercise number {idx!r} is outside 1-{total} "
+                                     f"or graded twice")
+                seen[idx - 1] = 1
+                flags[idx - 1] = value
+        return cls(flags)
+
+    def __len__(self):
+        return len(self.flags)
+
+    def append(self, is_correct):
+        """
+        Grade the next exercise.
+        """
+        self.flags.append(is_correct)
+
+    def extend(self, flags):
+        """
+        Grade the next exercises from bytes of 0 and 1.
+        """
+        self.flags += flags
+
+    def count(self, value=True):
+        """
+        Return the number of correct (or, with value False, wrong) exercises.
+        """
+        return self.flags.count(_FLAG_BYTES[value])
+
+    def ranges(self, value=True):
+        """
+        Yield (first, last) numbers of each run of correct (or wrong) exercises.
+        """
+        flags = self.flags
+        target = _FLAG_BYTES[value]
+        other = _FLAG_BYTES[not value]
+        start = flags.find(target)
+        while start != -1:
+            end = flags.find(other, start)
+            if end == -1:
+                end = len(flags)
+            yield start + 1, end
+            start = flags.find(target, end)
+
+    def indices(self, value=True):
+        """
+        Return the list of correct (or wrong) numbers.
+        """
+        numbers = []
+        for first, last in self.ranges(value):
+            numbers.extend(range(first, last + 1))
+        return numbers
+
+    def summary(self):
+        """
+        Return the counts, the accuracy and the number of runs without listing any numbers.
+        """
+        total = len(self.flags)
+        correct = self.count(True)
+        first_wrong = self.flags.find(b'\x00')
+        return {'exercises': total, 'correct': correct, 'wrong': total - correct,
+                'accuracy': correct / total if total else 0.0,
+                'correct_ranges': sum(1 for _ in self.ranges(True)),
+                'wrong_ranges': sum(1 for _ in self.ranges(False)),
+                'first_wrong': first_wrong + 1 if first_wrong != -1 else None}
+
+    def iter_report(self, verbose=False):
+        """
+        Yield the text of the grade report in pieces of at most REPORT_PIECE numbers or ranges.
+        """
+        for label, value in (("Correct", True), ("Wrong", False)):
+            yield f"{label}: {self.count(value)} ("
+            if verbose:
+                items = map(str, chain.from_iterable(
+                    range(first, last + 1) for first, last in self.ranges(value)))
+            else:
+                items = (str(first) if first == last else f"{first}-{last}"
+                         for first, last in self.ranges(value))
+            separator = ""
+            while True:
+                piece = list(islice(items, REPORT_PIECE))
+                if not piece:
+                    break
+                # 段与段之间补上分隔符
+                yield separator + ', '.join(piece)
+                separator = ", "
+            yield ")\n"
+
+    def report(self, verbose=False):
+        """
+        Return the text of the grade report.
+        """
+        return ''.join(self.iter_report(verbose))
+
+
+def iter_runs(grades):
+    """
+    Collapse (index, is_correct) pairs into (is_correct, first, last) runs of consecutive numbers.
+    """
+    value = first = last = None
+    for idx, is_correct in grades:
+        is_correct = bool(is_correct)
+        if is_correct is value and idx == last + 1:
+            last = idx
+            continue
+        if value is not None:
+            yield value, first, last
+        value, first, last = is_correct, idx, idx
+    if value is not None:
+        yield value, first, last
+
+
+def iter_run_text(first, last, verbose=False):
+    """
+    Yield the report text of one run, in pieces of at most REPORT_PIECE numbers.
+    """
+    if not verbose:
+        yield str(first) if first == last else f"{first}-{last}"
+        return
+    for start in range(first, last + 1, REPORT_PIECE):
+        yield ', '.join(map(str, range(start, min(start + REPORT_PIECE, last + 1))))
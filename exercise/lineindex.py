@@ -0,0 +1,296 @@
+"""
+Line-offset index sidecars for random access into exercise and answer files.
+
+An index file sits next to its text file (``Exercises.txt.idx``). It
+starts with a header holding a magic tag, the text file's size and
+modification time, the number of lines and the width of an entry,
+followed by the byte offset at which every line starts and a final entry
+holding the file size, as little-endian uint32 when the file is smaller
+than 4 GiB and uint64 otherwise. Line k then spans offsets k-1 to k, so
+a lookup reads two entries and one line through memory maps and never
+scans the file. The index is only used while the text file's size and
+modification time still match; a full digest as in answerkey would read
+the whole file and defeat the purpose.
+
+need1 --index writes the sidecars while it generates (IndexedTextSink);
+build_line_index rebuilds one for an existing file in a single pass of
+re.finditer over a memory map, so the scan runs in C.
+
+Usage: python -m exercise.lineindex build FILE [FILE ...]
+       python -m exercise.lineindex show EXERCISES ANSWERS FIRST [LAST]
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from itertools import repeat
+from operator import add
+
+from .writer import TextSink
+
+
+MAGIC = b'EXIDX1\0\0'
+# 文件头：标识、文本文件大小、修改时间（纳秒）、行数、每项字节数
+HEADER = struct.Struct('<8sQQQB7x')
+INDEX_SUFFIX = '.idx'
+# 文件小于 4 GiB 时偏移量用 uint32 保存
+WIDE_SIZE = 1 << 32
+NEWLINE_RE = re.compile(b'\n')
+
+
+def line_index_path(text_file):
+    """
+    Return the default sidecar path of a text file.
+    """
+    return text_file + INDEX_SUFFIX
+
+
+class OffsetBuilder:
+    """
+    Collect the line start offsets of a file fed block by block.
+    """
+
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.size = 0
+
+    def feed(self, data):
+        """
+        Record the lines starting after the newlines of the next block of bytes.
+        """
+        if self.size + len(data) >= WIDE_SIZE and self.offsets.typecode == 'I':
+            self.offsets = array('Q', self.offsets)
+        # 每个换行符之后是下一行的起点
+        self.offsets.extend(map(add, map(re.Match.end, NEWLINE_RE.finditer(data)),
+                                repeat(self.size)))
+        self.size += len(data)
+
+    def write(self, text_file, index_file=None):
+        """
+        Write the sidecar of text_file, which must now hold exactly the fed bytes.
+        """
+        offsets = self.offsets
+        if offsets[-1] != self.size:
+            # 最后一行没有换行符，补上文件末尾
+            offsets.append(self.size)
+        stat = os.stat(text_file)
+        if stat.st_size != self.size:
+            raise ValueError(f"{text_file} has {stat.st_size} bytes, not {self.size}")
+        if sys.byteorder == 'big':
+            offsets = array(offsets.typecode, offsets)
+            offsets.byteswap()
+        with open(index_file or line_index_path(text_file), 'wb') as f_index:
+            f_index.write(HEADER.pack(MAGIC, self.size, stat.st_mtime_ns, len(offsets) - 1,
+                                      offsets.itemsize))
+            offsets.tofile(f_index)
+        return len(offsets) - 1
+
+
+class IndexedTextSink(TextSink):
+    """
+    Text sink that also writes the line-offset index of its file when closed.
+    """
+
+    def __init__(self, path, field=0):
+        super().__init__(path, field)
+        self._builder = OffsetBuilder()
+
+    def _open(self, path):
+        return open(path, 'wb')
+
+    def write(self, text):
+        """
+        Encode and write a chunk, recording where its lines start.
+        """
+        data = text.encode('utf-8')
+        self._builder.feed(data)
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        """
+        Close the file, then write its index.
+        """
+        self._file.close()
+        self._builder.write(self.path)
+
+
+def build_line_index(text_file, index_file=None):
+    """
+    Index an existing text file in one pass; return its number of lines.
+    """
+    builder = OffsetBuilder()
+    with open(text_file, 'rb') as f_in:
+        if os.fstat(f_in.fileno()).st_size:
+            with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                builder.feed(mapped)
+    return builder.write(text_file, index_file)
+
+
+class LineIndex:
+    """
+    Memory-mapped text file and its offset index; lines are numbered from 1.
+    """
+
+    def __init__(self, text_mapped, index_mapped, count, width):
+        self._text = text_mapped
+        self._index = index_mapped
+        self._entry = struct.Struct('<I' if width == 4 else '<Q')
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def _offset(self, position):
+        return self._entry.unpack_from(self._index, HEADER.size + position * self._entry.size)[0]
+
+    def line(self, number):
+        """
+        Return line number (from 1) without its line ending.
+        """
+        if not 1 <= number <= self._count:
+            raise IndexError(f"line {number} is out of range 1-{self._count}")
+        start = self._offset(number - 1)
+        end = self._offset(number)
+        return self._text[start:end].decode('utf-8').rstrip('\r\n')
+
+    def lines(self, first, last):
+        """
+        Return the lines first to last inclusive, cut from one slice of the file.
+        """
+        first = max(first, 1)
+        last = min(last, self._count)
+        if first > last:
+            return []
+        data = self._text[self._offset(first - 1):self._offset(last)]
+        # 末尾的换行符会多切出一个空串，按行数截掉
+        return [line.rstrip('\r') for line in
+                data.decode('utf-8').split('\n')[:last - first + 1]]
+
+    def close(self):
+        """
+        Unmap both files.
+        """
+        if self._text is not None:
+            self._text.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_line_index(text_file, index_file=None):
+    """
+    Map a text file and its sidecar, or return None if the index is missing or stale.
+    """
+    index_file = index_file or line_index_path(text_file)
+    try:
+        with open(index_file, 'rb') as f_index:
+            magic, size, mtime_ns, count, width = HEADER.unpack(f_index.read(HEADER.size))
+            stat = os.stat(text_file)
+            if magic != MAGIC or width not in (4, 8) or (size, mtime_ns) != \
+                    (stat.st_size, stat.st_mtime_ns) or \
+                    os.fstat(f_index.fileno()).st_size != HEADER.size + (count + 1) * width:
+                return None
+            index_mapped = mmap.mmap(f_index.fileno(), 0, access=mmap.ACCESS_READ)
+        if not size:
+            return LineIndex(None, index_mapped, count, width)
+        with open(text_file, 'rb') as f_text:
+            text_mapped = mmap.mmap(f_text.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, struct.error):
+        return None
+    return LineIndex(text_mapped, index_mapped, count, width)
+
+
+def open_line_index(text_file, rebuild=True):
+    """
+    Return the LineIndex of a text file, rebuilding a missing or stale sidecar if allowed.
+    """
+    line_index = load_line_index(text_file)
+    if line_index is None and rebuild:
+        build_line_index(text_file)
+        line_index = load_line_index(text_file)
+    return line_index
+
+
+class ExerciseReader:
+    """
+    Random access to numbered exercises and their answers through two line indexes.
+    """
+
+    def __init__(self, exercise_file='Exercises.txt', answer_file='Answers.txt', rebuild=True):
+        self.exercises = open_line_index(exercise_file, rebuild)
+        self.answers = open_line_index(answer_file, rebuild)
+        if self.exercises is None or self.answers is None:
+            raise ValueError('no current line index; build one with python -m exercise.lineindex')
+
+    def __len__(self):
+        return len(self.exercises)
+
+    def get(self, number):
+        """
+        Return (expression, answer) of exercise number, without the 'N. ' prefixes.
+        """
+        return (self.exercises.line(number).partition('. ')[2],
+                self.answers.line(number).partition('. ')[2])
+
+    def get_range(self, first, last):
+        """
+        Return the (expression, answer) pairs of exercises first to last inclusive.
+        """
+        return [(exercise.partition('. ')[2], answer.partition('. ')[2])
+                for exercise, answer in zip(self.exercises.lines(first, last),
+                                            self.answers.lines(first, last))]
+
+    def close(self):
+        """
+        Unmap all files.
+        """
+        self.exercises.close()
+        self.answers.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main(argv=None):
+    """
+    Build line indexes or print exercises by number from the command line.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description='Index exercise files for random access.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='Write the .idx sidecar of each file')
+    build.add_argument('paths', nargs='+', metavar='FILE', help='Text files to index')
+    show = commands.add_parser('show', help='Print exercises FIRST to LAST with their answers')
+    show.add_argument('exercise_file', help='Path to the exercises file')
+    show.add_argument('answer_file', help='Path to the answers file')
+    show.add_argument('first', type=int, help='First exercise number')
+    show.add_argument('last', type=int, nargs='?', help='Last exercise number (default FIRST)')
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'build':
+            for path in args.paths:
+                print(f"Indexed {build_line_index(path)} lines of {path}")
+            return
+        with ExerciseReader(args.exercise_file, args.answer_file) as reader:
+            last = args.first if args.last is None else args.last
+            for number, (expression, answer) in enumerate(reader.get_range(args.first, last),
+                                                          start=max(args.first, 1)):
+                print(f"{number}. {expression} = {answer}")
+    except (OSError, ValueError) as e_symbol:
+        print(f"An error occurred: {e_symbol}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,62 +1,151 @@
+"""
+Generate arithmetic expressions and answers.
+
+Importing this module has no side effects; the command line is parsed by
+main(). Process pools, NumPy and the output writers are imported where
+they are used, so plain text generation starts quickly.
+"""
+
+import os
 import random
 import fractions
-import argparse
+import hashlib
+import itertools
+from collections import deque
 
-# 初始化argparse对象
-PARSER = argparse.ArgumentParser(description='Generate arithmetic expressions and answers.')
-# 添加-n参数，设置为必须
-PARSER.add_argument('-n', type=int, required=True, help='Number of expressions to generate')
-# 添加-r参数，设置为必须
-PARSER.add_argument('-r', type=int, required=True, help='Range limit for numbers in expressions')
+from .compact import CompiledExpression
+from .dedup import ExpressionIndex
+from .operands import operand_pool
+from .profiling import add_profile_arguments, add_stats_arguments, stage
+from .rational import to_pair, to_fraction, apply, evaluate, format_rational, parse_rational
+from .space import SampleStream, enumerated_operator_counts, expression_space
 
-# 解析命令行参数
-ARGS = PARSER.parse_args()
+# 每个分片生成的题目数，与进程数无关，保证同一种子的输出一致
+SHARD_SIZE = 1000
+# 写文件时每批最多缓冲的行数
+WRITE_BATCH = 4096
+# 构造式生成的计数：retries_saved 为从收窄范围内抽取减数的次数（盲抽可能得到负数），
+# restarts 为没有合法减数而重新构造的次数
+BUILD_STATS = {'retries_saved': 0, 'restarts': 0}
 
 # 生成自然数或真分数
-def generate_number(range_limit):
+def generate_number(range_limit, rng=random):
     """Generate a random natural number or a true fraction."""
-    return random.randint(1, range_limit - 1) \
-        if random.random() > 0.5 else generate_true_fraction(range_limit)
+    return rng.randint(1, range_limit - 1) \
+        if rng.random() > 0.5 else generate_true_fraction(range_limit, rng)
 
 # 生成真分数
-def generate_true_fraction(range_limit):
+def generate_true_fraction(range_limit, rng=random):
     """Generate a true fraction."""
-    numerator = random.randint(1, range_limit - 1)
-    denominator = random.randint(2, range_limit)  # 避免分母为1
+    numerator = rng.randint(1, range_limit - 1)
+    denominator = rng.randint(2, range_limit)  # 避免分母为1
     return fractions.Fraction(numerator, denominator)
 
 # 随机选择运算符
-def generate_operator(allow_subtract=False, allow_divide=False):
+def generate_operator(allow_subtract=False, allow_divide=False, rng=random):
     """Randomly select an operator."""
     operators = ['+', '*']
     if allow_subtract:
         operators.append('-')
     if allow_divide:
         operators.append('/')
-    return random.choice(operators)
+    return rng.choice(operators)
 
-# 生成算术表达式
-def generate_expression(range_limit, num_operators):
-    """Generate an arithmetic expression."""
-    operands = [generate_number(range_limit) for _ in range(num_operators + 1)]
-    operators = [generate_operator(allow_subtract=True, allow_divide=True) for _ in range(num_operators)]
+# 在不超过 limit 的操作数中按 generate_number 的分布抽取减数
+def generate_subtrahend(range_limit, limit, rng=random):
+    """
+    Draw an operand no greater than limit, or return None if none exists.
+
+    The draw follows the distribution of generate_number restricted to
+    values <= limit.
+    """
+    pool = operand_pool(range_limit)
+    position = draw_subtrahend(pool, to_pair(limit), rng)
+    return None if position is None else pool.number(position)
 
-    # 确保结果非负
+# 在操作数池中抽取不超过 limit 的减数的位置
+def draw_subtrahend(pool, limit, rng=random):
+    """Draw the pool position of a subtrahend no greater than the limit pair, or None."""
+    limit_num, limit_den = limit
+    if limit_num >= pool.span * limit_den:  # 所有操作数都合法
+        return pool.draw(rng)
+    BUILD_STATS['retries_saved'] += 1
+    return pool.draw_at_most(limit_num, limit_den, rng)
+
+# 构造每一步结果都非负的操作数池条目与运算符
+def build_chain(pool, num_operators, rng=random):
+    """
+    Build pool entries and operators whose every intermediate result is non-negative.
+
+    Only subtraction can go negative, so each subtrahend is drawn from the
+    operands no greater than the running result instead of rejecting the
+    whole expression afterwards. Return (entries, operators, result), where
+    entries are OperandPool entries and result is an unnormalized pair.
+    """
     while True:
-        result = calculate_expression(operands, operators)
-        if result >= 0:
-            break
-        operands = [generate_number(range_limit) for _ in range(num_operators + 1)]
-        operators = [generate_operator(allow_subtract=True, allow_divide=True) for _ in range(num_operators)]
-
-    # 创建表达式字符串，并在需要的地方添加括号
-    expression = f"{format_number(operands[0])} "
-    for op_symbol, operand in zip(operators, operands[1:]):
-        if op_symbol in ['-', '/']:
-            expression += f" {op_symbol} ({format_number(operand)})"
+        position = pool.draw(rng)
+        entry = pool.entry(position)
+        entries = [entry]
+        operators = []
+        num, den = entry[0]
+        for _ in range(num_operators):
+            op_symbol = generate_operator(allow_subtract=True, allow_divide=True, rng=rng)
+            if op_symbol == '-':
+                position = draw_subtrahend(pool, (num, den), rng)
+                if position is None:
+                    break
+            else:
+                position = pool.draw(rng)
+            entry = pool.entry(position)
+            num, den = apply(num, den, op_symbol, *entry[0])
+            entries.append(entry)
+            operators.append(op_symbol)
         else:
-            expression += f" {op_symbol} {format_number(operand)}"
-    return expression, format_number(result)
+            return entries, operators, (num, den)
+        # 当前结果太小（如 0），没有可减的操作数，只能重新构造
+        BUILD_STATS['restarts'] += 1
+
+# 构造每一步结果都非负的操作数与运算符
+def build_expression(range_limit, num_operators, rng=random):
+    """
+    Build operands and operators whose every intermediate result is non-negative.
+
+    Return (operands, operators, result); operands are reduced pairs and
+    result is an unnormalized (numerator, denominator) pair.
+    """
+    entries, operators, result = build_chain(operand_pool(range_limit), num_operators, rng)
+    return [entry[0] for entry in entries], operators, result
+
+# 用操作数池中预先格式化好的文本拼出题目
+def format_chain(entries, operators):
+    """Format pool entries and operators exactly like CompiledExpression.format."""
+    parts = [entries[0][1], ' ']
+    for op_symbol, entry in zip(operators, entries[1:]):
+        # 减号和除号后的操作数外加括号
+        parts.append(f" {op_symbol} {entry[2] if op_symbol in '-/' else entry[1]}")
+    return ''.join(parts)
+
+# 生成算术表达式
+def generate_expression(range_limit, num_operators, index=None, rng=random):
+    """Generate an arithmetic expression, skipping duplicates already in index."""
+    entries, operators, result = generate_chain(range_limit, num_operators, index, rng)
+    # 操作数文本都已预先格式化，只需拼接
+    return format_chain(entries, operators), format_rational(*result)
+
+# 生成一道不重复的题目，保留操作数池条目
+def generate_chain(range_limit, num_operators, index=None, rng=random):
+    """Build pool entries, operators and result of an expression not yet in index."""
+    pool = operand_pool(range_limit)
+    while True:
+        entries, operators, result = build_chain(pool, num_operators, rng)
+        if index is None or index.add([entry[0] for entry in entries], operators):
+            return entries, operators, result
+
+# 生成二进制格式的一行：操作数整数对、运算符与结果
+def generate_row(range_limit, num_operators, index=None, rng=random):
+    """Generate (operand pairs, operators, result pair) with no text formatting at all."""
+    entries, operators, result = generate_chain(range_limit, num_operators, index, rng)
+    return [entry[0] for entry in entries], operators, result
 
 # 格式化数字
 def format_number(number):
@@ -78,69 +167,563 @@ def format_number(number):
 
 # 计算表达式的结果
 def calculate_expression(operands, operators):
-    """Calculate the result of the expression."""
-    result = operands[0]
-    for op_symbol, operand in zip(operators, operands[1:]):
-        if op_symbol == '+':
-            result += operand
-        elif op_symbol == '-':
-            result -= operand
-        elif op_symbol == '*':
-            result *= operand
-        elif op_symbol == '/':
-            result = result / operand
-    return result
-
-def generate_expressions(num_expressions, range_limit):
-    """Generate a list of arithmetic expressions and their answers."""
+    """Calculate the exact result of the expression as a Fraction."""
+    return to_fraction(evaluate([to_pair(operand) for operand in operands], operators))
+
+def iter_expressions(num_expressions, range_limit, index=None, rng=random, hashes=None,
+                     rows=False, num_operators=None, deferred=None):
+    """
+    Yield (expression, answer) pairs one at a time.
+
+    Duplicates are skipped when index is given. If hashes is a list, the
+    canonical-form hash of every accepted expression is appended to it.
+    With rows, generate_row tuples are yielded instead of text; the same
+    rng gives the same exercises either way. num_operators fixes the
+    operator count; by default each expression draws 1 to 3.
+
+    With index, the operator counts that space.enumerated_operator_counts
+    finds small are drawn from their ExpressionSpace without replacement
+    instead of by rejection. Once such a space is used up its operator
+    count is no longer drawn, and when every operator count is used up
+    the stream ends early, so fewer than num_expressions items mean that
+    no more distinct exercises exist. deferred, a list of operator
+    counts, replaces that choice for seeded shards: for those counts the
+    count itself is yielded (with hash 0) for the caller to fill in, and
+    no other count is enumerated.
+    """
+    generate = generate_row if rows else generate_expression
+    operator_counts = [num_operators] if num_operators else [1, 2, 3]
+    streams = {}
+    if index is not None and deferred is None:
+        for count in enumerated_operator_counts(num_expressions, range_limit, operator_counts):
+            streams[count] = SampleStream(expression_space(range_limit, count),
+                                          rng.getrandbits(64))
+    deferred = deferred or ()
+    emitted = 0
+    while emitted < num_expressions:
+        if len(operator_counts) == 1:
+            num_operators = operator_counts[0]
+        elif len(operator_counts) == 3:
+            # 三种运算符数都可用时抽取方式不变，同一种子的输出也不变
+            num_operators = rng.randint(1, 3)
+        else:
+            num_operators = rng.choice(operator_counts)
+        stream = streams.get(num_operators)
+        if num_operators in deferred:
+            item = num_operators
+        elif stream is None:
+            item = generate(range_limit, num_operators, index, rng)
+        else:
+            chain = stream.next_unique(index)
+            if chain is None:
+                # 该运算符数的题目已全部用完
+                operator_counts.remove(num_operators)
+                if not operator_counts:
+                    return
+                continue
+            item = chain_item(chain, rows)
+        if hashes is not None:
+            hashes.append(index.last_hash if index is not None and item.__class__ is not int
+                          else 0)
+        yield item
+        emitted += 1
+
+def chain_item(chain, rows=False):
+    """Turn (entries, operators, result) into a generate_row tuple or an (expression, answer) pair."""
+    entries, operators, result = chain
+    if rows:
+        return [entry[0] for entry in entries], operators, result
+    return format_chain(entries, operators), format_rational(*result)
+
+def generate_expressions(num_expressions, range_limit, index=None, rng=random, hashes=None,
+                         num_operators=None):
+    """
+    Generate a list of unique arithmetic expressions and their answers.
+
+    The lists are shorter than num_expressions only when the range has
+    no more distinct exercises.
+    """
+    if index is None:
+        index = ExpressionIndex(num_expressions)
     expressions = []
     answers = []
-    for _ in range(num_expressions):
-        num_operators = random.randint(1, 3)  # 限制运算符数量
+    for expr, answer in iter_expressions(num_expressions, range_limit, index, rng, hashes,
+                                         num_operators=num_operators):
+        expressions.append(expr)
+        answers.append(answer)
+    return expressions, answers
+
+# 由总种子和分片编号派生出互相独立的随机数流
+def shard_rng(seed, shard):
+    """Return the random generator for one shard of a seeded run."""
+    digest = hashlib.blake2b(f"{seed}:{shard}".encode('ascii'), digest_size=16).digest()
+    return random.Random(int.from_bytes(digest, 'little'))
+
+def generate_shard(job):
+    """
+    Generate one shard; job is (seed, shard, count, range_limit, dedup, rows, num_operators,
+    deferred).
+
+    Return the pairs (or rows), their canonical hashes, the duplicate count
+    and the BUILD_STATS increments made while generating the shard. For
+    the operator counts in deferred (see iter_expressions) the pair is
+    the operator count itself, filled in by the caller.
+    """
+    seed, shard, count, range_limit, dedup, rows, num_operators, deferred = job
+    index = ExpressionIndex(count) if dedup else None
+    hashes = []
+    before = dict(BUILD_STATS)
+    pairs = list(iter_expressions(count, range_limit, index, shard_rng(seed, shard), hashes,
+                                  rows, num_operators, deferred))
+    build_stats = {key: BUILD_STATS[key] - before[key] for key in BUILD_STATS}
+    return pairs, hashes, index.rejected if dedup else 0, build_stats
+
+def iter_shard_results(jobs, workers):
+    """Yield generate_shard results in job order, keeping a few shards in flight."""
+    if workers <= 1:
+        # 同一进程内 BUILD_STATS 已直接累加，清零分片增量以免重复计数
+        for job in jobs:
+            with stage('shard'):
+                pairs, hashes, rejected, _ = generate_shard(job)
+            yield pairs, hashes, rejected, {}
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(workers)
+    pending = deque(executor.submit(generate_shard, next(jobs)) for _ in range(2 * workers))
+    try:
         while True:
-            expr, answer = generate_expression(range_limit, num_operators)
-            if not contains_negative_result(expr):
-                expressions.append(expr)
-                answers.append(answer)
-                break
+            future = pending.popleft()
+            pending.append(executor.submit(generate_shard, next(jobs)))
+            # 主进程等待各分片结果的时间
+            with stage('shard'):
+                result = future.result()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+def iter_sharded(num_expressions, range_limit, seed, workers=1, index=None,
+                 shard_size=SHARD_SIZE, rows=False, num_operators=None, hashes=None,
+                 position=None, enumerated=None, drawn=None):
+    """
+    Yield expressions generated in fixed-size seeded shards, optionally in parallel.
+
+    Shards are consumed in shard order and deduplicated against index, so
+    the result depends only on the seed and never on the worker count.
+    With rows, generate_row tuples are yielded instead of text. If hashes
+    is a list, the hash of every yielded expression is appended to it.
+    Every shard holds shard_size candidates whatever num_expressions is,
+    so the expressions of a seeded run are a prefix of those of any
+    longer run with the same seed. position, a [shard, offset] list,
+    makes the stream resumable: the first shard is position's shard, its
+    first offset candidates are skipped, and position is updated to the
+    candidate after each yielded expression.
+
+    With index, the operator counts in enumerated (by default those of
+    sharded_enumeration) are left as placeholders by the shards and
+    filled in here, in shard order, from one SampleStream per count keyed
+    by the seed. drawn maps each of those counts to the number of
+    indices its stream has drawn; it is updated in place and, with
+    position, is all a resumed run needs. The prefix rule above holds
+    between runs that enumerate the same operator counts; a checkpoint
+    records them, so a resumed run keeps them. The stream ends early
+    once every operator count is used up.
+    """
+    if num_expressions <= 0:
+        return
+    operator_counts = [num_operators] if num_operators else [1, 2, 3]
+    if index is None:
+        enumerated = []
+    elif enumerated is None:
+        enumerated = sharded_enumeration(num_expressions, range_limit, num_operators, shard_size)
+    if drawn is None:
+        drawn = {}
+    # 枚举的运算符数在合并时按编号依次抽取，分片只留下占位
+    streams = {count: SampleStream(expression_space(range_limit, count), space_key(seed, count),
+                                   drawn.get(count, 0))
+               for count in enumerated}
+    exhausted = set()
+    # 分片大小与 num_expressions 无关，n 道题的输出总是更大 n 的前缀
+    first_shard, skip = (0, 0) if position is None else position
+    jobs = ((seed, shard, shard_size, range_limit, index is not None, rows, num_operators,
+             tuple(enumerated))
+            for shard in itertools.count(first_shard))
+    emitted = 0
+    # 跨分片的重复题目在合并时丢弃，不够就继续取下一个分片
+    for shard, (pairs, shard_hashes, rejected, build_stats) in \
+            zip(itertools.count(first_shard), iter_shard_results(jobs, workers)):
+        if index is not None:
+            index.rejected += rejected
+        for key, value in build_stats.items():
+            BUILD_STATS[key] += value
+        candidates = zip(pairs, shard_hashes)
+        if skip:
+            # 续写时跳过检查点之前已经用过的候选题目
+            candidates = itertools.islice(candidates, skip, None)
+        for offset, (pair, key_hash) in enumerate(candidates, start=skip):
+            if pair.__class__ is int:
+                stream = streams[pair]
+                chain = stream.next_unique(index)
+                drawn[pair] = stream.drawn
+                if chain is None:
+                    # 该运算符数的题目已全部用完
+                    exhausted.add(pair)
+                    if exhausted.issuperset(operator_counts):
+                        return
+                    continue
+                pair = chain_item(chain, rows)
+                key_hash = index.last_hash
+            elif index is not None and not index.add_hash(key_hash):
+                continue
+            if hashes is not None:
+                hashes.append(key_hash)
+            if position is not None:
+                position[0] = shard
+                position[1] = offset + 1
+            yield pair
+            emitted += 1
+            if emitted == num_expressions:
+                return
+        skip = 0
+
+# 分片运行要枚举的运算符数
+def sharded_enumeration(num_expressions, range_limit, num_operators=None, shard_size=SHARD_SIZE):
+    """
+    Return the operator counts a deduplicated sharded run enumerates.
+
+    Every shard draws shard_size candidates against its own index
+    whatever num_expressions is, so the load is at least one shard.
+    """
+    operator_counts = [num_operators] if num_operators else [1, 2, 3]
+    return enumerated_operator_counts(max(num_expressions, shard_size), range_limit,
+                                      operator_counts)
+
+# 由总种子和运算符数派生出枚举抽样的置换密钥
+def space_key(seed, num_operators):
+    """Return the permutation key of one enumerated expression space of a seeded run."""
+    digest = hashlib.blake2b(f"{seed}:space:{num_operators}".encode('ascii'),
+                             digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def generate_sharded(num_expressions, range_limit, seed, workers=1, index=None,
+                     shard_size=SHARD_SIZE):
+    """Generate lists of expressions and answers from seeded shards."""
+    if index is None:
+        index = ExpressionIndex(num_expressions)
+    expressions = []
+    answers = []
+    for expr, answer in iter_sharded(num_expressions, range_limit, seed, workers, index,
+                                     shard_size):
+        expressions.append(expr)
+        answers.append(answer)
     return expressions, answers
 
 def contains_negative_result(expression):
-    """Check if the expression contains a negative result."""
-    operands = []
-    operators = []
-    num_str = ""
-    for char in expression:
-        if char.isdigit() or char in "*/+-":
-            if char in "*/+-":
-                if num_str:
-                    operands.append(fractions.Fraction(num_str))
-                    num_str = ""
-                operators.append(char)
-            else:
-                num_str += char
-    if num_str:  # 添加最后一个操作数
-        operands.append(fractions.Fraction(num_str))
-
-    result = calculate_expression(operands, operators)
-    return result < 0
-
-def generate_and_write_expressions(num_expressions, range_limit):
-    """Generate and write expressions and answers to files."""
-    expressions, answers = generate_expressions(num_expressions, range_limit)
-    with open('Exercises.txt', 'w', encoding='utf-8') as f_ex:
-        for i, expr in enumerate(expressions, start=1):
-            f_ex.write(f"{i}. {expr}\n")
-    with open('Answers.txt', 'w', encoding='utf-8') as f_ans:
-        for i, answer in enumerate(answers, start=1):
-            f_ans.write(f"{i}. {answer}\n")
-    return expressions, answers
+    """Check if the expression (text or CompiledExpression) has a negative result."""
+    if not isinstance(expression, CompiledExpression):
+        # 用 need2 的分词器解析，分数、带分数与括号都按 need1 的写法读取
+        from .need2 import compile_expression
+        expression = compile_expression(expression)
+    return expression.evaluate()[0] < 0
+
+def contains_negative_results(expressions):
+    """
+    Check many expressions (texts or CompiledExpressions) with the vectorized batch evaluator.
+
+    Texts are compiled with need2's tokenizer; expressions that are not
+    left-to-right chains are evaluated one at a time.
+    """
+    from .batch import evaluate_many
+    from .need2 import compile_expression
+    negative = []
+    positions = []
+    rows = []
+    for expression in expressions:
+        if not isinstance(expression, CompiledExpression):
+            expression = compile_expression(expression)
+        row = expression.chain()
+        if row is None:
+            negative.append(expression.evaluate()[0] < 0)
+            continue
+        positions.append(len(negative))
+        negative.append(None)
+        rows.append(row)
+    for position, (num, _) in zip(positions, evaluate_many(rows)):
+        negative[position] = num < 0
+    return negative
+
+def write_expressions(pairs, exercise_file='Exercises.txt', answer_file='Answers.txt',
+                      batch_size=WRITE_BATCH, sinks=None):
+    """
+    Write numbered (expression, answer) pairs to both files as they arrive.
+
+    Pairs are handed to a writer.BulkWriter in batches whose size doubles
+    up to batch_size, so the first exercises reach disk immediately while
+    memory stays bounded, and the files are written from a background
+    thread while generation goes on. sinks replaces the two text files,
+    e.g. with gzip or JSONL sinks. Return the number of pairs written.
+    """
+    from .writer import BulkWriter, TextSink
+    if sinks is None:
+        sinks = [TextSink(exercise_file), TextSink(answer_file, field=1)]
+    with BulkWriter(sinks, batch_size) as writer:
+        count = writer.write_records(pairs)
+    return count
+
+def output_sinks(output_format):
+    """Open the sinks of a text-based output format ('gzip' or 'jsonl')."""
+    from .writer import open_sink
+    if output_format == 'gzip':
+        return [open_sink('Exercises.txt.gz'), open_sink('Answers.txt.gz', field=1)]
+    return [open_sink('Exercises.jsonl')]
 
-def main():
+def iter_answer_items(answer_file='Answers.txt'):
+    """Yield (number, answer pair) for each line of a written answer file."""
+    with open(answer_file, 'r', encoding='utf-8') as f_ans:
+        for line in f_ans:
+            number, _, answer = line.partition('. ')
+            yield number, parse_rational(answer)
+
+def write_resumable(num_expressions, range_limit, index=None, seed=None, workers=1,
+                    num_operators=None, resume=False, checkpoint_every=None,
+                    exercise_file='Exercises.txt', answer_file='Answers.txt'):
+    """
+    Generate and write exercises, saving a checkpoint every checkpoint_every of them.
+
+    The exercises come from seeded shards, so a run gives the same files
+    as generate_and_write_expressions with the same seed. With resume the
+    run recorded in the checkpoint continues: the files are cut back to
+    the checkpoint, index is refilled from its hash log, and numbering
+    goes on from the exercises already written. Generation stops once the
+    files hold num_expressions exercises. Raise ValueError if there is no
+    checkpoint to resume or it was written with other options. Return the
+    number of exercises in the files.
+    """
+    from .checkpoint import CHECKPOINT_EVERY, append_hashes, hashes_path, load_checkpoint, \
+        load_hashes, new_state, restore_files, write_checkpoint
+    from .writer import BulkWriter, TextSink
+    checkpoint_every = checkpoint_every or CHECKPOINT_EVERY
+    state = load_checkpoint(exercise_file) if resume else None
+    if state is None:
+        if resume:
+            raise ValueError(f"{exercise_file} has no checkpoint to resume")
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        state = new_state(seed, range_limit, num_operators, index is not None, SHARD_SIZE)
+    else:
+        given = {'seed': seed, 'range_limit': range_limit, 'num_operators': num_operators,
+                 'dedup': index is not None}
+        for key, value in given.items():
+            if key != 'seed' or value is not None:
+                if state[key] != value:
+                    raise ValueError(f"the checkpoint was written with {key} {state[key]}, "
+                                     f"not {value}")
+    restore_files(exercise_file, answer_file, state)
+    if index is not None:
+        with stage('restore_index'):
+            index.update(load_hashes(exercise_file, state))
+        # 续写沿用已枚举的运算符数；续写到更多题目时新需要枚举的运算符数从检查点处开始枚举
+        enumerated = set(state.get('enumerated', ())) | set(sharded_enumeration(
+            num_expressions, state['range_limit'], state['num_operators'], state['shard_size']))
+        state['enumerated'] = sorted(enumerated)
+    # JSON 的键是字符串，运行时按运算符数记录
+    drawn = {int(k): number for k, number in state.get('drawn', {}).items()}
+    position = [state['shard'], state['offset']]
+    hashes = []
+    pairs = iter_sharded(num_expressions - state['count'], state['range_limit'], state['seed'],
+                         workers, index, state['shard_size'],
+                         num_operators=state['num_operators'], hashes=hashes, position=position,
+                         enumerated=state.get('enumerated'), drawn=drawn)
+    sinks = [TextSink(exercise_file, append=True), TextSink(answer_file, field=1, append=True)]
+    previous = state['count']
+    with BulkWriter(sinks, first_number=previous + 1) as writer, \
+            open(hashes_path(exercise_file), 'ab') as f_log:
+        while True:
+            count = writer.write_records(itertools.islice(pairs, checkpoint_every))
+            with stage('checkpoint'):
+                # 检查点只记录已经完整写进文件的题目
+                writer.flush()
+                if index is not None:
+                    append_hashes(f_log, hashes)
+                    state['hashes'] += len(hashes)
+                hashes.clear()
+                state.update(shard=position[0], offset=position[1], count=count,
+                             drawn={str(k): number for k, number in drawn.items()},
+                             exercise_bytes=os.path.getsize(exercise_file),
+                             answer_bytes=os.path.getsize(answer_file))
+                write_checkpoint(exercise_file, state)
+            if count >= num_expressions or count == previous:
+                break
+            previous = count
+    return state['count']
+
+def generate_and_write_expressions(num_expressions, range_limit, index=None, seed=None, workers=1,
+                                   answer_key=False, output_format='text', num_operators=None,
+                                   line_index=False, checkpoint_every=0, resume=False):
+    """
+    Generate expressions and stream them with their answers to files.
+
+    Duplicates are rejected only when index is given. output_format 'bin'
+    writes Exercises.bin/Answers.bin columns instead of text, 'gzip'
+    writes Exercises.txt.gz/Answers.txt.gz and 'jsonl' writes both
+    columns to Exercises.jsonl; with answer_key and 'text' the binary
+    answer key of the text files is written too, and with line_index and
+    'text' the .idx line-offset sidecars of both files are written while
+    they are generated (see lineindex). num_operators fixes the operator
+    count of every expression. Return the number of exercises written.
+    Generation is lazy, so the 'generate_and_write' stage includes the
+    nested 'write' stage. checkpoint_every or resume write the text
+    files through write_resumable instead.
+    """
+    if checkpoint_every or resume:
+        if output_format != 'text':
+            raise ValueError('checkpoints are only written for the text format')
+        with stage('generate_and_write'):
+            count = write_resumable(num_expressions, range_limit, index, seed, workers,
+                                    num_operators, resume, checkpoint_every)
+        if line_index:
+            # 续写的文件只能整体重建索引
+            from .lineindex import build_line_index
+            with stage('line_index'):
+                build_line_index('Exercises.txt')
+                build_line_index('Answers.txt')
+        if answer_key:
+            write_text_answer_key()
+        return count
+    rows = output_format == 'bin'
+    if seed is None and workers == 1:
+        pairs = iter_expressions(num_expressions, range_limit, index, rows=rows,
+                                 num_operators=num_operators)
+    else:
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        pairs = iter_sharded(num_expressions, range_limit, seed, workers, index, rows=rows,
+                             num_operators=num_operators)
+    if rows:
+        # 二进制格式的结果本身就是答案，不需要再写答案文件缓存
+        from .binformat import write_binary
+        with stage('generate_and_write'):
+            return write_binary(pairs)
+    if output_format != 'text':
+        with stage('generate_and_write'):
+            return write_expressions(pairs, sinks=output_sinks(output_format))
+    sinks = None
+    if line_index:
+        from .lineindex import IndexedTextSink
+        sinks = [IndexedTextSink('Exercises.txt'), IndexedTextSink('Answers.txt', field=1)]
+    with stage('generate_and_write'):
+        count = write_expressions(pairs, sinks=sinks)
+    if answer_key:
+        write_text_answer_key()
+    return count
+
+def write_text_answer_key():
+    """Write the binary answer key of Exercises.txt from the answers in Answers.txt."""
+    # 题目文件写完后才能计算摘要，答案从刚写出的答案文件流式读回
+    from .answerkey import write_answer_key
+    with stage('answer_key'):
+        write_answer_key('Exercises.txt', iter_answer_items())
+
+def build_parser():
+    """Build the command line parser of need1."""
+    import argparse
+    # 初始化argparse对象
+    parser = argparse.ArgumentParser(description='Generate arithmetic expressions and answers.')
+    # 添加-n参数，设置为必须
+    parser.add_argument('-n', type=int, required=True, help='Number of expressions to generate')
+    # 添加-r参数，设置为必须
+    parser.add_argument('-r', type=int, required=True, help='Range limit for numbers in expressions')
+    # 添加--seed参数，固定随机种子以便复现题目
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed; the same seed always produces the same files')
+    # 添加-j参数，设置并行生成的进程数
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help='Number of worker processes used for generation')
+    # 添加--no-dedup参数，关闭查重以保证内存占用恒定
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Skip duplicate checking so memory use does not grow with -n')
+    # 添加--format参数，选择文本、二进制列式、gzip 压缩文本或 JSONL 输出
+    parser.add_argument('--format', choices=['text', 'bin', 'gzip', 'jsonl'], default='text',
+                        help='Write Exercises.txt/Answers.txt (text), Exercises.bin/Answers.bin '
+                             '(bin), Exercises.txt.gz/Answers.txt.gz (gzip) or Exercises.jsonl')
+    # 添加--answer-key参数，同时写出供 need2 直接使用的二进制答案文件
+    parser.add_argument('--answer-key', action='store_true',
+                        help='Also write Exercises.txt.key so need2 can skip evaluating the exercises')
+    # 添加--index参数，同时写出按题号随机读取用的行偏移索引
+    parser.add_argument('--index', action='store_true',
+                        help='Also write Exercises.txt.idx/Answers.txt.idx line-offset indexes')
+    # 添加--checkpoint-every参数，定期保存检查点以便中断后续写
+    parser.add_argument('--checkpoint-every', type=int, default=0, metavar='N',
+                        help='Save Exercises.txt.ckpt every N exercises so the run can be resumed')
+    # 添加--resume参数，从检查点继续生成，直到文件中共有 -n 道题
+    parser.add_argument('--resume', '--append', dest='resume', action='store_true',
+                        help='Continue the run saved in Exercises.txt.ckpt, numbering on from '
+                             'the exercises on disk, until the files hold -n exercises')
+    # 添加--profile参数，分析生成过程本身的耗时或内存
+    add_profile_arguments(parser, 'need1_profile.json')
+    # 添加--stats参数，输出热点计数与各阶段耗时直方图
+    add_stats_arguments(parser)
+    return parser
+
+def main(argv=None):
     """Main function to generate and write expressions."""
-    num_expressions = ARGS.n
-    range_limit = ARGS.r
-    generate_and_write_expressions(num_expressions, range_limit)
+    # 解析命令行参数；argv 为 None 时读取 sys.argv
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        from .profiling import run_profiled
+        run_profiled(args.profile, args.profile_output, run, args)
+    else:
+        run(args)
+
+def run(args):
+    """Generate and write expressions as the parsed command line asks."""
+    index = None if args.no_dedup else ExpressionIndex()
+    stats = args.stats or args.stats_output
+    if stats:
+        from .profiling import start_stats
+        start_stats()
+    try:
+        count = generate_and_write_expressions(args.n, args.r, index,
+                                       seed=args.seed, workers=args.workers,
+                                       answer_key=args.answer_key, output_format=args.format,
+                                       line_index=args.index,
+                                       checkpoint_every=args.checkpoint_every,
+                                       resume=args.resume)
+    except OverflowError as e_symbol:
+        # 二进制格式的列宽固定，-r 过大时装不下
+        print(f"Error: a value does not fit the binary format - {e_symbol}")
+        return
+    except ValueError as e_symbol:
+        # 没有检查点，或检查点与当前参数不一致
+        print(f"Error: {e_symbol}")
+        return
+    if index is not None:
+        if count < args.n:
+            # 表达式空间已用完，不再反复抽取
+            print(f"Error: -r {args.r} has only {count} distinct exercises, fewer than -n {args.n}; "
+                  f"all of them were written")
+        print(f"Rejected {index.rejected} duplicate candidates")
+    print(f"Saved {BUILD_STATS['retries_saved']} retries "
+          f"({BUILD_STATS['restarts']} restarts)")
+    if stats:
+        from .profiling import finish_stats
+        finish_stats(generation_counters(count, index), args.stats_output)
+
+def generation_counters(count, index=None):
+    """
+    Return the --stats counters of a generation run that produced count expressions.
+
+    Every build attempt is a candidate. Subtrahends are drawn so results
+    never go negative; an attempt is only rejected as negative when no
+    valid subtrahend exists and the build restarts.
+    """
+    rejected_duplicate = index.rejected if index is not None else 0
+    return {'generated': count,
+            'candidates': count + rejected_duplicate + BUILD_STATS['restarts'],
+            'rejected_negative': BUILD_STATS['restarts'],
+            'rejected_duplicate': rejected_duplicate,
+            'subtrahends_narrowed': BUILD_STATS['retries_saved']}
 
 if __name__ == "__main__":
     main()
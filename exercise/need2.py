@@ -1,41 +1,107 @@
 """
 Check the answers of arithmetic exercises.
+
+Importing this module has no side effects; the command line is parsed by
+main(). NumPy, process pools and the spooling helpers are imported where
+they are used.
 """
 
-import fractions
-import argparse
+import mmap
+import os
 import re
+from collections import deque
+from itertools import islice, zip_longest
+
+from .answerkey import load_answer_key, write_answer_key
+from .binformat import ANSWER_COLUMNS, ANSWER_MAGIC, EXERCISE_COLUMNS, EXERCISE_MAGIC, \
+    ColumnReader, decode_row, is_binary, iter_answer_rows, iter_exercise_rows
+from .compact import CompiledExpression
+from .grades import GradeFlags, iter_run_text, iter_runs
+from .profiling import add_profile_arguments, add_stats_arguments, stage
+from .rational import to_pair, to_fraction, evaluate, equal, parse_rational
+
+
+# 一次扫描的词法规则：带分数、分数、整数、运算符与括号；其余非空白字符都是错误
+TOKEN_RE = re.compile(r"(\d+)’(\d+)/(\d+)|(\d+)/(\d+)|(\d+)|([-+*/()])|(\S)")
+
+
+# 并行判分时每个分块包含的题目文件字节数
+CHUNK_SIZE = 1 << 22
+# 在答案文件中定位行号时，每次整块统计换行符的字节数
+SCAN_BLOCK = 1 << 16
+# 流式写分数文件时，每次从临时文件读回的字符数
+SPOOL_PIECE = 1 << 20
+# 多份提交判分时汇总文件的名字，提交的分数文件不能占用
+SUMMARY_NAME = 'Summary.txt'
+
 
+# --stats 的计数：无法解析的题目或答案、行数或题号对不上的行、已判分的行；
+# 只在出错或整批写出时累加，平时不增加开销
+GRADE_STATS = {'parse_errors': 0, 'line_mismatches': 0, 'lines_graded': 0}
+
+
+# 操作数文本到整数对的缓存，超过上限时整体清空
+OPERAND_CACHE = {}
+OPERAND_CACHE_LIMIT = 1 << 16
+
+
+class ExpressionSyntaxError(ValueError):
+    """
+    Raised when an expression cannot be tokenized; offset is the exact position.
+    """
 
-# 设置命令行参数解析
-PARSER = argparse.ArgumentParser(description="Check the answers of arithmetic exercises.")
-PARSER.add_argument("-e", "--exercise_file", required=True, help="Path to the exercises file")
-PARSER.add_argument("-a", "--answer_file", required=True, help="Path to the answers file")
-ARGS = PARSER.parse_args()
+    def __init__(self, message, offset):
+        super().__init__(f"{message} at position {offset}")
+        self.offset = offset
 
 
 def parse_fraction(fraction_str):
     """
     Parse a fraction string and return a Fraction object.
     """
-    fraction_str = fraction_str.strip()
-    # 处理带分数，如 '1’1/3'
-    if '’' in fraction_str:
-        whole_part, fractional_part = fraction_str.split('’')
-        whole = int(whole_part)
-        if '/' in fractional_part:
-            num, denom = map(int, fractional_part.split('/'))
-            return fractions.Fraction(whole, 1) + fractions.Fraction(num, denom)
+    # 支持整数、分数 '3/4' 与带分数 '1’1/3'
+    return to_fraction(parse_rational(fraction_str))
+
+
+def tokenize(expression):
+    """
+    Split an expression into tokens in a single regex pass.
+
+    Numbers become (numerator, denominator) pairs, mixed numbers such as
+    '1’1/3' included; operators and parentheses stay one-character strings.
+    Raise ExpressionSyntaxError with the offset of the first bad character.
+    """
+    tokens = []
+    for whole, mixed_num, mixed_den, num, den, integer, symbol, bad in TOKEN_RE.findall(expression):
+        if integer:
+            tokens.append((int(integer), 1))
+        elif symbol:
+            tokens.append(symbol)
+        elif num:
+            if den.strip('0') == '':
+                raise _locate_error(expression)
+            tokens.append((int(num), int(den)))
+        elif whole:
+            if mixed_den.strip('0') == '':
+                raise _locate_error(expression)
+            mixed_den = int(mixed_den)
+            tokens.append((int(whole) * mixed_den + int(mixed_num), mixed_den))
         else:
-            num = int(fractional_part)
-            return fractions.Fraction(whole, 1) + fractions.Fraction(num, 1)
-    # 处理普通分数
-    elif '/' in fraction_str:
-        num, denom = map(int, fraction_str.split('/'))
-        return fractions.Fraction(num, denom)
-    # 处理整数
-    else:
-        return fractions.Fraction(int(fraction_str))
+            raise _locate_error(expression)
+    return tokens
+
+
+def _locate_error(expression):
+    """
+    Build the ExpressionSyntaxError for the first bad token of an expression.
+    """
+    for match in TOKEN_RE.finditer(expression):
+        if match.group(8):
+            return ExpressionSyntaxError(f"Unexpected character '{match.group(8)}'", match.start())
+        den = match.group(5) or match.group(3)
+        if den is not None and int(den) == 0:
+            return ExpressionSyntaxError(f"Zero denominator in '{match.group()}'", match.start())
+    return ExpressionSyntaxError("Invalid expression", 0)
 
 def read_files(exercise_file, answer_file):
     """
@@ -55,106 +121,843 @@ def read_files(exercise_file, answer_file):
         return None, None
 
 
+def map_file(f_in):
+    """
+    Memory-map an open binary file read-only; return None for an empty file.
+    """
+    if os.fstat(f_in.fileno()).st_size == 0:  # 空文件不能映射
+        return None
+    return mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_lines(path, start=0, end=None):
+    """
+    Yield the lines of a UTF-8 text file through a read-only memory map.
+
+    Only the current line is held in Python memory, so files of any size
+    can be streamed. start and end limit reading to a byte range that
+    begins and ends on line boundaries.
+    """
+    with open(path, 'rb') as f_in:
+        mapped = map_file(f_in)
+        if mapped is None:
+            return
+        with mapped:
+            end = len(mapped) if end is None else end
+            mapped.seek(start)
+            while mapped.tell() < end:
+                yield mapped.readline().decode('utf-8')
+
+
+def chunk_ranges(path, chunk_size=CHUNK_SIZE):
+    """
+    Cut a file into (start, end, line_count) byte ranges of about chunk_size bytes.
+
+    Every range ends just after a newline (or at the end of the file).
+    """
+    ranges = []
+    with open(path, 'rb') as f_in:
+        mapped = map_file(f_in)
+        if mapped is None:
+            return ranges
+        with mapped:
+            size = len(mapped)
+            start = 0
+            while start < size:
+                end = mapped.find(b'\n', min(start + chunk_size, size) - 1) + 1 or size
+                line_count = mapped[start:end].count(b'\n')
+                if end == size and mapped[size - 1:] != b'\n':
+                    line_count += 1  # 最后一行没有换行符
+                ranges.append((start, end, line_count))
+                start = end
+    return ranges
+
+
+def line_offsets(path, line_numbers):
+    """
+    Return the byte offset at which each of the sorted line_numbers begins.
+
+    Lines are counted from 0. Newlines are counted a whole SCAN_BLOCK at a
+    time, and only the block holding a target is searched line by line. A
+    line past the end of the file maps to the file size.
+    """
+    offsets = []
+    with open(path, 'rb') as f_in:
+        mapped = map_file(f_in)
+        if mapped is None:
+            return [0] * len(line_numbers)
+        with mapped:
+            size = len(mapped)
+            position = 0
+            seen = 0
+            for target in line_numbers:
+                while seen < target and position < size:
+                    block = mapped[position:position + SCAN_BLOCK]
+                    newlines = block.count(b'\n')
+                    if seen + newlines < target:
+                        seen += newlines
+                        position += len(block)
+                        continue
+                    # 目标行就在这一块里，逐个换行符前进
+                    for _ in range(target - seen):
+                        position = mapped.find(b'\n', position) + 1
+                    seen = target
+                offsets.append(position)
+    return offsets
+
+
 def calculate_expression(operands, operators):
     """
-    Calculate the result of the expression.
+    Calculate the exact result of the expression as a Fraction.
     """
-    # 初始结果为第一个操作数
-    result = operands[0]
-    # 遍历操作符和后续操作数
-    for op_symbol, operand in zip(operators, operands[1:]):
-        if op_symbol == '+':
-            result += operand
-        elif op_symbol == '-':
-            result -= operand
-        elif op_symbol == '*':
-            result *= operand
-        elif op_symbol == '/':
-            result /= operand
-    return result.limit_denominator()
+    # 用整数对运算，只在最后约分一次
+    return to_fraction(evaluate([to_pair(operand) for operand in operands], operators))
 
 
 
 def parse_expression(expression):
     """
     Parse the expression and return operands and operators.
+
+    Parentheses are dropped; use compile_expression to keep the grouping.
     """
     operands = []
     operators = []
-    num_str = ""
-    skip_next = False  # 用于跳过操作符后的空格
+    for token in tokenize(expression):
+        if isinstance(token, tuple):
+            operands.append(to_fraction(token))
+        elif token not in '()':
+            operators.append(token)
+    return operands, operators
 
-    for char in expression:
-        if skip_next:
-            skip_next = False
-            continue
-        if char.isspace():
-            if num_str:  # 如果当前有数字字符串，则记录操作数
-                operands.append(parse_fraction(num_str))
-                num_str = ""
-            continue
-        elif char in "*/+-":
-            if num_str:  # 如果当前有数字字符串，则记录操作数
-                operands.append(parse_fraction(num_str))
-                num_str = ""
-            operators.append(char)
-            skip_next = True  # 跳过操作符后的空格
-        elif char in "’":
-            if num_str:  # 如果当前有数字字符串，则记录操作数
-                operands.append(parse_fraction(num_str))
-                num_str = ""
-            operators.append(char)  # 添加带分数符号作为操作符
-            skip_next = True
+def compile_expression(expression):
+    """
+    Parse the expression once into a CompiledExpression.
+    """
+    return CompiledExpression.from_tokens(tokenize(expression))
+
+
+def compile_exercise(exercise):
+    """
+    Compile an exercise line such as '1. 1 + 2'; compiled exercises pass through.
+
+    A line without the 'N. ' prefix, such as a blank line, raises
+    ExpressionSyntaxError.
+    """
+    if isinstance(exercise, CompiledExpression):
+        return exercise
+    _, separator, expression = exercise.partition('. ')
+    if not separator:
+        raise ExpressionSyntaxError("the exercise has no 'N. ' number", 0)
+    return compile_expression(expression)
+
+
+def parse_chain_operand(text):
+    """
+    Parse one operand of a need1-style chain, e.g. '7', '(1/2)' or '1’1/3'.
+
+    Return a pair, or None if the text is not a plain operand. Results are
+    memoized in OPERAND_CACHE, since a given -r has few distinct operands.
+    """
+    pair = OPERAND_CACHE.get(text)
+    if pair is not None:
+        return pair
+    if text[0] == '(':
+        if text[-1] != ')':
+            return None
+        pair = parse_plain_number(text[1:-1])
+    else:
+        pair = parse_plain_number(text)
+    if pair is not None:
+        if len(OPERAND_CACHE) >= OPERAND_CACHE_LIMIT:
+            OPERAND_CACHE.clear()
+        OPERAND_CACHE[text] = pair
+    return pair
+
+
+def parse_plain_number(text):
+    """
+    Parse '7', '1/2' or '1’1/3' without regexes; return None for anything else.
+    """
+    if text.isdecimal():
+        return int(text), 1
+    whole, mixed, fraction = text.partition('’')
+    if not mixed:
+        whole, fraction = '0', text
+    num, slash, den = fraction.partition('/')
+    if not (slash and whole.isdecimal() and num.isdecimal() and den.isdecimal()):
+        return None
+    den = int(den)
+    if den == 0:
+        return None
+    return int(whole) * den + int(num), den
+
+
+def evaluate_chain(expression):
+    """
+    Evaluate a need1-style chain such as '5  + 1 / (1/2)' in one pass.
+
+    need1 always puts spaces around operators and never inside operands,
+    so str.split() tokenizes the line at C speed. Return the unnormalized
+    result pair, or None if the expression is not such a chain (or divides
+    by zero) and needs the full tokenizer.
+    """
+    parts = expression.split()
+    if not len(parts) & 1:
+        return None
+    cached = OPERAND_CACHE.get
+    first = cached(parts[0]) or parse_chain_operand(parts[0])
+    if first is None:
+        return None
+    num, den = first
+    for op_symbol, text in zip(parts[1::2], parts[2::2]):
+        operand = cached(text) or parse_chain_operand(text)
+        if operand is None:
+            return None
+        other_num, other_den = operand
+        if op_symbol == '+':
+            num, den = num * other_den + other_num * den, den * other_den
+        elif op_symbol == '-':
+            num, den = num * other_den - other_num * den, den * other_den
+        elif op_symbol == '*':
+            num, den = num * other_num, den * other_den
+        elif op_symbol == '/' and other_num:
+            num, den = num * other_den, den * other_num
         else:
-            num_str += char
+            return None
+    return num, den
 
-    if num_str:  # 添加最后一个操作数
-        operands.append(parse_fraction(num_str))
 
-    return operands, operators
+def expected_answer(exercise):
+    """
+    Evaluate an exercise; return its result pair, or None if it is invalid.
 
-def check_answers(exercises, answers):
+    Text lines in need1's chain format are evaluated in one pass; anything
+    else is compiled with the full tokenizer.
+    """
+    if isinstance(exercise, str):
+        result = evaluate_chain(exercise.partition('. ')[2])
+        if result is not None:
+            return result
+    try:
+        return compile_exercise(exercise).evaluate()
+    except (ValueError, ZeroDivisionError) as e_symbol:
+        print(f"Error parsing exercise '{str(exercise).strip()}': {e_symbol}")
+        GRADE_STATS['parse_errors'] += 1
+        return None
+
+
+def parse_answer(answer):
+    """
+    Parse an answer line such as '1. 1’1/2'; return its pair, or None if it is invalid.
+    """
+    given_answer_str = answer.partition('. ')[2].strip()
+    # 绝大多数答案是整数、分数或带分数，先走不用正则的快速路径
+    given_answer = parse_chain_operand(given_answer_str) \
+        if given_answer_str and given_answer_str[0] != '(' else None
+    if given_answer is not None:
+        return given_answer
+    try:
+        return parse_rational(given_answer_str)
+    except (ValueError, ZeroDivisionError) as e_symbol:
+        print(f"Error parsing answer '{given_answer_str}': {e_symbol}")
+        GRADE_STATS['parse_errors'] += 1
+        return None
+
+
+def check_answers(exercises, answers, vectorized=False):
     """
     Check the answers and return the list of correct and wrong answers.
+
+    Each exercise may be a line of Exercises.txt or a CompiledExpression
+    that is graded without being parsed again.
+    """
+    grades = grade_answers(exercises, answers, vectorized)
+    return grades.indices(True), grades.indices(False)
+
+
+def grade_answers(exercises, answers, vectorized=False):
+    """
+    Check the answers and return their GradeFlags, one byte per exercise.
+    """
+    if vectorized:
+        return check_answers_batched(exercises, answers)
+    grades = GradeFlags()
+    append = grades.flags.append
+    for exercise, answer in zip(exercises, answers):
+        append(grade_line(exercise, answer))
+    return grades
+
+
+def grade_answers_with_key(answer_key, answers):
+    """
+    Check the answers against (number, expected) items and return their GradeFlags.
+
+    Items and answers are paired exactly as grade_answers pairs exercises
+    and answers, so an answer key only saves evaluating the exercises.
+    """
+    grades = GradeFlags()
+    append = grades.flags.append
+    for (_, calculated_result), answer in zip(answer_key, answers):
+        given_answer = parse_answer(answer)
+        append(calculated_result is not None and given_answer is not None
+               and equal(calculated_result, given_answer))
+    return grades
+
+
+def grade_line(exercise, answer):
+    """
+    Return True if the answer line is a correct answer to the exercise.
+    """
+    calculated_result = expected_answer(exercise)
+    given_answer = parse_answer(answer)
+    return calculated_result is not None and given_answer is not None \
+        and equal(calculated_result, given_answer)
+
+
+def grade_stream(exercise_lines, answer_lines, start=1):
+    """
+    Grade two line iterables in lockstep and yield (index, is_correct).
+
+    The 'N.' prefixes of each pair of lines must agree; a pair whose
+    numbers differ is reported and graded wrong. If the answers run out
+    first, the remaining exercises are graded wrong; surplus answers are
+    reported and ignored. start is the index of the first line.
+    """
+    return grade_submission(iter_answer_key(exercise_lines), answer_lines, start)
+
+
+def iter_answer_key(exercise_lines):
+    """
+    Yield (number, expected) for each exercise line.
+
+    number is the 'N' of the 'N. ' prefix and expected is the result pair,
+    or None if the exercise is invalid.
+    """
+    for exercise in exercise_lines:
+        yield exercise.partition('. ')[0], expected_answer(exercise)
+
+
+def build_answer_key(exercise_lines):
+    """
+    Evaluate every exercise once and return the answer key as a list.
+    """
+    return list(iter_answer_key(exercise_lines))
+
+
+def load_or_build_answer_key(exercise_file, save_key=False):
+    """
+    Return the answer key of an exercise file.
+
+    A sidecar whose digest matches the file is memory-mapped and nothing
+    is parsed or evaluated; otherwise every exercise is evaluated, and the
+    result is saved as a new sidecar if save_key is set.
+    """
+    answer_key = load_answer_key(exercise_file)
+    if answer_key is None:
+        answer_key = build_answer_key(iter_lines(exercise_file))
+        if save_key:
+            write_answer_key(exercise_file, answer_key)
+    return answer_key
+
+
+def grade_submission(answer_key, answer_lines, start=1):
+    """
+    Grade answer lines against (number, expected) items and yield (index, is_correct).
+
+    Mismatched numbers and missing or surplus answers are handled as in
+    grade_stream.
+    """
+    pairs = zip_longest(answer_key, answer_lines)
+    for idx, (item, answer) in enumerate(pairs, start=start):
+        if item is None:
+            print(f"Line {idx}: the answer file has more lines than the exercise file")
+            GRADE_STATS['line_mismatches'] += 1
+            return
+        if answer is None:
+            print(f"Line {idx}: the answer file ends before the exercise file")
+            GRADE_STATS['line_mismatches'] += 1
+            yield idx, False
+            # 剩下的题目都没有答案
+            for idx, _ in enumerate(pairs, start=idx + 1):
+                yield idx, False
+            return
+        exercise_number, calculated_result = item
+        answer_number = answer.partition('. ')[0]
+        if exercise_number != answer_number:
+            print(f"Line {idx}: exercise number '{exercise_number.strip()}' "
+                  f"does not match answer number '{answer_number.strip()}'")
+            GRADE_STATS['line_mismatches'] += 1
+            yield idx, False
+            continue
+        given_answer = parse_answer(answer)
+        yield idx, calculated_result is not None and given_answer is not None \
+            and equal(calculated_result, given_answer)
+
+
+def grade_binary(exercise_file, answer_file):
     """
-    correct = []
-    wrong = []
-    for idx, (exercise, answer) in enumerate(zip(exercises, answers), start=1):
-        expression = exercise.split('. ')[1].strip()
-        operands, operators = parse_expression(expression)
-        calculated_result = calculate_expression(operands, operators)
-        given_answer_str = answer.split('. ')[1].strip()
+    Grade Exercises.bin against Answers.bin and yield (index, is_correct).
+
+    Both files are read column by column through memory maps, so no text
+    is split or parsed. Missing or surplus answers are handled as in
+    grade_stream.
+    """
+    missing = object()
+    from .batch import exact_match
+    pairs = zip_longest(iter_exercise_rows(exercise_file), iter_answer_rows(answer_file),
+                        fillvalue=missing)
+    for idx, (row, given_answer) in enumerate(pairs, start=1):
+        if row is missing:
+            print(f"Line {idx}: the answer file has more lines than the exercise file")
+            GRADE_STATS['line_mismatches'] += 1
+            return
+        if given_answer is missing:
+            print(f"Line {idx}: the answer file ends before the exercise file")
+            GRADE_STATS['line_mismatches'] += 1
+            yield idx, False
+            for idx, _ in enumerate(pairs, start=idx + 1):
+                yield idx, False
+            return
+        yield idx, given_answer is not None and exact_match(row, given_answer)
+
+
+def grade_binary_batched(exercise_file, answer_file):
+    """
+    Grade binary files group by group with the vectorized evaluator.
+
+    Each row group's columns are viewed as NumPy arrays straight from the
+    memory maps; unused operand slots are 0/1 behind a '+', so chains of
+    every length share one array. Rows the evaluator cannot handle are
+    compared exactly. Falls back to grade_binary without NumPy or when
+    the two files differ in length.
+    """
+    from .batch import COMPACT_TABLE, available, exact_match, match_columns, np
+    exercises = ColumnReader(exercise_file, EXERCISE_MAGIC, EXERCISE_COLUMNS)
+    answers = ColumnReader(answer_file, ANSWER_MAGIC, ANSWER_COLUMNS)
+    if not available() or len(exercises) != len(answers) \
+            or exercises.group_rows != answers.group_rows:
+        yield from grade_binary(exercise_file, answer_file)
+        return
+    idx = 0
+    for (count, group), (_, (answer_values,)) in zip(exercises.iter_groups(),
+                                                    answers.iter_groups()):
+        operands, _, codes = group
+        with stage("match_group"):
+            values = np.frombuffer(operands, dtype=np.int32).reshape(count, -1).astype(np.int64)
+            expected = np.frombuffer(answer_values, dtype=np.int64).reshape(count, 2)
+            same, fallback = match_columns(values[:, 0::2], values[:, 1::2],
+                                           COMPACT_TABLE[np.frombuffer(codes, dtype=np.uint8)
+                                                         .reshape(count, -1)], expected)
+        for offset, (match, exact) in enumerate(zip(same.tolist(), fallback.tolist())):
+            idx += 1
+            if exact:
+                # 可能溢出或除以零的行逐个精确判定
+                answer = answer_values[2 * offset], answer_values[2 * offset + 1]
+                match = answer[1] != 0 and exact_match(decode_row(*group, offset), answer)
+            yield idx, match
+
+
+def list_submissions(paths):
+    """
+    Expand answer files and directories into a list of answer files.
+
+    A directory contributes its *.txt files in name order.
+    """
+    submissions = []
+    for path in paths:
+        if os.path.isdir(path):
+            submissions.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                               if name.endswith('.txt')
+                               and os.path.isfile(os.path.join(path, name)))
+        else:
+            submissions.append(path)
+    return submissions
+
+
+def grade_file_names(answer_files):
+    """
+    Return the name of each submission's grade file, unique within the grade directory.
+
+    A name is the submission's file name. If that is already taken, by an
+    earlier submission or by SUMMARY_NAME (compared case-insensitively),
+    a -2, -3, ... suffix is added before the extension.
+    """
+    taken = {SUMMARY_NAME.lower()}
+    names = []
+    for answer_file in answer_files:
+        name = os.path.basename(answer_file)
+        stem, extension = os.path.splitext(name)
+        suffix = 1
+        while name.lower() in taken:
+            suffix += 1
+            name = f"{stem}-{suffix}{extension}"
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+
+def grade_submissions(exercise_file, answer_files, grade_dir='Grades', save_key=False,
+                      verbose=False):
+    """
+    Grade many answer files against one exercise file.
+
+    Exercises are evaluated once into an answer key (or taken from its
+    sidecar, see load_or_build_answer_key); each submission is
+    then streamed against it and its grades are written to grade_dir under
+    the name grade_file_names gives it. A combined Summary.txt lists every
+    submission's counts and the totals. Return [(answer_file, correct, wrong)].
+    """
+    answer_key = load_or_build_answer_key(exercise_file, save_key)
+    os.makedirs(grade_dir, exist_ok=True)
+    answer_files = list(answer_files)
+    results = []
+    for answer_file, name in zip(answer_files, grade_file_names(answer_files)):
+        grade_file = os.path.join(grade_dir, name)
         try:
-            given_answer = parse_fraction(given_answer_str)
-            if calculated_result == given_answer:
-                correct.append(idx)
-            else:
-                wrong.append(idx)
-        except ValueError as e_symbol:
-            print(f"Error parsing answer '{given_answer_str}': {e_symbol}")
-            wrong.append(idx)
-    return correct, wrong
+            grades = grade_submission(answer_key, iter_lines(answer_file))
+            correct, wrong = write_grades_stream(grades, grade_file, verbose)
+        except (OSError, UnicodeDecodeError) as e_symbol:
+            # 单个提交读不了不影响其他提交
+            print(f"An error occurred: {e_symbol}")
+            continue
+        results.append((answer_file, correct, wrong))
+    write_summary(results, os.path.join(grade_dir, SUMMARY_NAME))
+    return results
 
 
-def write_grades(correct, wrong, grade_file):
+def write_summary(results, summary_file):
     """
-    Write the grades to a file.
+    Write one line per graded submission and a total line.
     """
-    with open(grade_file, 'w', encoding='utf-8') as f_grade:
-        f_grade.write(f"Correct: {len(correct)} ({', '.join(map(str, correct))})\n")
-        f_grade.write(f"Wrong: {len(wrong)} ({', '.join(map(str, wrong))})\n")
+    with open(summary_file, 'w', encoding='utf-8') as f_summary:
+        for answer_file, correct, wrong in results:
+            f_summary.write(f"{answer_file}: Correct: {correct}, Wrong: {wrong}\n")
+        total_correct = sum(correct for _, correct, _ in results)
+        total_wrong = sum(wrong for _, _, wrong in results)
+        f_summary.write(f"Total: {len(results)} submissions, "
+                        f"Correct: {total_correct}, Wrong: {total_wrong}\n")
 
 
-def main():
+def check_answers_batched(exercises, answers, batch_size=None):
+    """
+    Check the answers batch by batch with the vectorized evaluator.
+
+    Gives the same GradeFlags as grade_answers; each batch of compiled
+    left-to-right chains is evaluated and compared by batch.matches_many.
+    """
+    from .batch import BATCH_SIZE, matches_many
+    batch_size = batch_size or BATCH_SIZE
+    flags = bytearray()
+    items = enumerate(zip(exercises, answers))
+    while True:
+        chunk = list(islice(items, batch_size))
+        if not chunk:
+            break
+        # 先记为错误，再按下标填入正确的结果
+        flags.extend(bytes(len(chunk)))
+        indices = []
+        rows = []
+        expected = []
+        for idx, (exercise, answer) in chunk:
+            given_answer = parse_answer(answer)
+            try:
+                compiled = compile_exercise(exercise)
+            except ValueError as e_symbol:
+                print(f"Error parsing exercise '{str(exercise).strip()}': {e_symbol}")
+                GRADE_STATS['parse_errors'] += 1
+                compiled = None
+            row = compiled.chain() if compiled is not None else None
+            if row is None or given_answer is None:
+                # 非链式或无效的题目逐个判定
+                calculated_result = expected_answer(compiled) if compiled is not None else None
+                flags[idx] = calculated_result is not None and given_answer is not None \
+                    and equal(calculated_result, given_answer)
+                continue
+            indices.append(idx)
+            rows.append(row)
+            expected.append(given_answer)
+        with stage("match_batch"):
+            matches = matches_many(rows, expected)
+        for idx, match in zip(indices, matches):
+            flags[idx] = bool(match)
+    return GradeFlags(flags)
+
+
+def format_grades(grades, verbose=False):
+    """
+    Return the text of a grade file for GradeFlags; numbers are range-compressed unless verbose.
+    """
+    return grades.report(verbose)
+
+
+def write_grades(grades, grade_file, verbose=False):
+    """
+    Write the report of GradeFlags to a file through the background writer.
+
+    The report is handed over in pieces, so no string holds every number;
+    a .gz name is gzip-compressed. The older call with the lists of
+    correct and wrong numbers, write_grades(correct, wrong, grade_file),
+    is still accepted.
+    """
+    from .writer import BulkWriter, open_sink
+    if not isinstance(grades, GradeFlags):
+        # 旧的调用形式：正确题号列表、错误题号列表、分数文件
+        grades, grade_file, verbose = GradeFlags.from_lists(grades, grade_file), verbose, False
+    with BulkWriter([open_sink(grade_file)]) as writer:
+        for piece in grades.iter_report(verbose):
+            writer.write_text(piece)
+    GRADE_STATS['lines_graded'] += len(grades)
+
+
+def grade_chunk(job):
+    """
+    Grade one chunk job; return one byte per exercise (1 if it is correct)
+    and the GRADE_STATS increments made while grading it.
+
+    job is (exercise_file, exercise_start, exercise_end, answer_file,
+    answer_start, answer_end, first_index); both byte ranges cover the
+    same exercise numbers. answer_file is None for a chunk after the one
+    where the answers ran out: its exercises are still evaluated, as
+    grade_stream would, but graded wrong without another report.
+    """
+    exercise_file, exercise_start, exercise_end, answer_file, answer_start, answer_end, \
+        first_index = job
+    before = dict(GRADE_STATS)
+    exercise_lines = iter_lines(exercise_file, exercise_start, exercise_end)
+    if answer_file is None:
+        grades = bytes(sum(1 for _ in iter_answer_key(exercise_lines)))
+    else:
+        grades = grade_stream(exercise_lines, iter_lines(answer_file, answer_start, answer_end),
+                              first_index)
+        grades = bytes(is_correct for _, is_correct in grades)
+    return grades, {key: GRADE_STATS[key] - before[key] for key in GRADE_STATS}
+
+
+def iter_chunk_results(jobs, workers):
+    """
+    Yield grade_chunk results in job order, keeping a few chunks in flight.
+    """
+    jobs = iter(jobs)
+    if workers <= 1:
+        # 同一进程内 GRADE_STATS 已直接累加，清零分块增量以免重复计数
+        for job in jobs:
+            with stage("grade_chunk"):
+                grades, _ = grade_chunk(job)
+            yield grades, {}
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(workers)
+    pending = deque(executor.submit(grade_chunk, job) for job in islice(jobs, 2 * workers))
+    try:
+        while pending:
+            future = pending.popleft()
+            for job in islice(jobs, 1):
+                pending.append(executor.submit(grade_chunk, job))
+            # 主进程等待各分块结果的时间
+            with stage("grade_chunk"):
+                result = future.result()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def grade_parallel(exercise_file, answer_file, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Grade two files in line-aligned chunks and yield (index, is_correct) in order.
+
+    The exercise file is cut into byte ranges at line boundaries and the
+    answer file at the same line numbers, so every chunk pairs the same
+    lines grade_stream would; the merged result equals the serial one.
+    If the answers run out, only the chunk where they end reports it.
+    """
+    chunk_size = max(1, min(chunk_size, os.path.getsize(exercise_file) // (4 * workers)))
+    ranges = chunk_ranges(exercise_file, chunk_size)
+    first_lines = [0]
+    for _, _, line_count in ranges:
+        first_lines.append(first_lines[-1] + line_count)
+    # 同时定位每个分块前一行的答案：前一行已没有答案时，答案用完已由前面的分块报告
+    targets = sorted(set(first_lines) | {line - 1 for line in first_lines[1:]})
+    offsets = dict(zip(targets, line_offsets(answer_file, targets)))
+    answer_size = os.path.getsize(answer_file)
+    answer_offsets = [offsets[line] for line in first_lines]
+    # 最后一个分块读到答案文件末尾，多出的答案行由它报告
+    answer_offsets[-1] = answer_size
+    jobs = [(exercise_file, start, end,
+             None if i and offsets[first_lines[i] - 1] == answer_size else answer_file,
+             answer_offsets[i], answer_offsets[i + 1], first_lines[i] + 1)
+            for i, (start, end, _) in enumerate(ranges)]
+    if not jobs:
+        # 题目文件为空时仍要报告多余的答案
+        yield from grade_stream([], iter_lines(answer_file))
+        return
+    for job, (grades, grade_stats) in zip(jobs, iter_chunk_results(jobs, workers)):
+        for key, value in grade_stats.items():
+            GRADE_STATS[key] += value
+        yield from zip(range(job[-1], job[-1] + len(grades)), map(bool, grades))
+
+
+def write_grades_stream(grades, grade_file, verbose=False):
+    """
+    Write (index, is_correct) pairs to a grade file as they arrive.
+
+    Runs of equal grades are formatted as they end and spooled to one
+    temporary file per kind while the counts are kept, so memory stays
+    constant; the output is identical to write_grades. Return (correct,
+    wrong) counts.
+    """
+    import tempfile
+    from .writer import BulkWriter, open_sink
+    counts = [0, 0]
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as correct_spool, \
+            tempfile.TemporaryFile('w+', encoding='utf-8') as wrong_spool:
+        spools = (wrong_spool, correct_spool)
+        for is_correct, first, last in iter_runs(grades):
+            spool = spools[is_correct]
+            # 第一个编号前不加分隔符
+            separator = ", " if counts[is_correct] else ""
+            for piece in iter_run_text(first, last, verbose):
+                spool.write(separator + piece)
+                separator = ", "
+            counts[is_correct] += last - first + 1
+        with BulkWriter([open_sink(grade_file)]) as writer:
+            for label, spool, count in (("Correct", correct_spool, counts[1]),
+                                        ("Wrong", wrong_spool, counts[0])):
+                spool.seek(0)
+                writer.write_text(f"{label}: {count} (")
+                for piece in iter(lambda: spool.read(SPOOL_PIECE), ''):
+                    writer.write_text(piece)
+                writer.write_text(")\n")
+    GRADE_STATS['lines_graded'] += counts[0] + counts[1]
+    return counts[1], counts[0]
+
+
+def build_parser():
+    """
+    Build the command line parser of need2.
+    """
+    import argparse
+    # 设置命令行参数解析
+    parser = argparse.ArgumentParser(description="Check the answers of arithmetic exercises.")
+    parser.add_argument("-e", "--exercise_file", required=True, help="Path to the exercises file")
+    parser.add_argument("-a", "--answer_file", required=True, nargs="+",
+                        help="Path to the answers file; several files or directories grade "
+                             "every submission against one answer key")
+    parser.add_argument("--batch", action="store_true",
+                        help="Evaluate exercises in vectorized NumPy batches")
+    parser.add_argument("-g", "--grade_file", default="Grade.txt", help="Path to the grades file")
+    parser.add_argument("--grade_dir", default="Grades",
+                        help="Directory for per-submission grades and Summary.txt")
+    parser.add_argument("--save_key", action="store_true",
+                        help="Save the evaluated answers next to the exercise file for later runs")
+    parser.add_argument("--stream", action="store_true",
+                        help="Grade both files line by line in constant memory")
+    parser.add_argument("--verbose", action="store_true",
+                        help="List every exercise number in the grade file instead of ranges")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Number of worker processes; more than one grades file chunks "
+                             "in parallel")
+    # 分析判分过程本身的耗时或内存
+    add_profile_arguments(parser, "need2_profile.json")
+    # 输出解析错误、判分行数等计数与各阶段耗时直方图
+    add_stats_arguments(parser)
+    return parser
+
+
+def main(argv=None):
     """
     Main function to check the answers of arithmetic exercises.
     """
-    exercise_file = ARGS.exercise_file
-    answer_file = ARGS.answer_file
-    grade_file = r'E:\com\pythonProject\exercise\Grade.txt'
-    exercises, answers = read_files(exercise_file, answer_file)
-    correct, wrong = check_answers(exercises, answers)
-    write_grades(correct, wrong, grade_file)
+    args = build_parser().parse_args(argv)
+    stats = args.stats or args.stats_output
+    if stats:
+        from .profiling import start_stats
+        start_stats()
+    if args.profile:
+        from .profiling import run_profiled
+        run_profiled(args.profile, args.profile_output, run, args)
+    else:
+        run(args)
+    if stats:
+        from .profiling import finish_stats
+        finish_stats(dict(GRADE_STATS), args.stats_output)
+
+
+def run(args):
+    """
+    Grade the answers as the parsed command line asks.
+    """
+    exercise_file = args.exercise_file
+    grade_file = args.grade_file
+    if len(args.answer_file) > 1 or os.path.isdir(args.answer_file[0]):
+        # 多份答案共用一份标准答案，每道题只计算一次
+        try:
+            with stage("grade_submissions"):
+                grade_submissions(exercise_file, list_submissions(args.answer_file),
+                                  args.grade_dir, args.save_key, args.verbose)
+        except FileNotFoundError as e_symbol:
+            print(f"Error: The file was not found - {e_symbol}")
+        except (OSError, UnicodeDecodeError) as e_symbol:
+            print(f"An error occurred: {e_symbol}")
+        return
+    answer_file = args.answer_file[0]
+    if is_binary(exercise_file):
+        # 二进制列式格式，答案也必须是二进制格式
+        if not is_binary(answer_file, ANSWER_MAGIC):
+            print(f"Error: {answer_file} is not a binary answer file; "
+                  f"convert it with python -m exercise.binformat to-bin")
+            return
+        try:
+            grade = grade_binary_batched if args.batch else grade_binary
+            with stage("grade_and_write"):
+                write_grades_stream(grade(exercise_file, answer_file), grade_file, args.verbose)
+        except (OSError, ValueError) as e_symbol:
+            print(f"An error occurred: {e_symbol}")
+        return
+    with stage("load_answer_key"):
+        answer_key = load_answer_key(exercise_file)
+    if args.save_key and answer_key is None:
+        try:
+            with stage("build_answer_key"):
+                answer_key = load_or_build_answer_key(exercise_file, save_key=True)
+        except FileNotFoundError as e_symbol:
+            print(f"Error: The file was not found - {e_symbol}")
+            return
+        except (OSError, UnicodeDecodeError) as e_symbol:
+            print(f"An error occurred: {e_symbol}")
+            return
+    if args.stream or args.workers > 1:
+        # 两个文件同步逐行读取，边判分边写出；有答案文件缓存时直接用缓存，
+        # 多进程时按行对齐的分块并行判分
+        try:
+            if answer_key is not None:
+                grades = grade_submission(answer_key, iter_lines(answer_file))
+            elif args.workers > 1:
+                grades = grade_parallel(exercise_file, answer_file, args.workers)
+            else:
+                grades = grade_stream(iter_lines(exercise_file), iter_lines(answer_file))
+            with stage("grade_and_write"):
+                write_grades_stream(grades, grade_file, args.verbose)
+        except FileNotFoundError as e_symbol:
+            print(f"Error: The file was not found - {e_symbol}")
+        except (OSError, UnicodeDecodeError) as e_symbol:
+            print(f"An error occurred: {e_symbol}")
+        return
+    with stage("read_files"):
+        exercises, answers = read_files(exercise_file, answer_file)
+    if exercises is None:
+        # read_files 已经报告了错误
+        return
+    with stage("check_answers"):
+        if answer_key is not None:
+            # 缓存只省去计算标准答案，配对规则与不用缓存时相同
+            grades = grade_answers_with_key(answer_key, answers)
+        else:
+            grades = grade_answers(exercises, answers, vectorized=args.batch)
+    with stage("write_grades"):
+        write_grades(grades, grade_file, args.verbose)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""
+Precomputed operand pools for expression generation.
+
+For a range limit r, generate_number draws an integer 1..r-1 with
+probability 1/2 and otherwise a fraction n/d with n in 1..r-1 and d in
+2..r. An OperandPool numbers all of these outcomes once, so a draw is a
+single randrange, and keeps for every drawn outcome its reduced pair and
+its Exercises.txt text. Entries are built on first use and kept while
+the pool has at most CACHE_LIMIT positions; larger pools (r above 512)
+build each drawn entry afresh so memory stays flat.
+"""
+
+import fractions
+
+from .rational import format_rational, normalize
+
+
+# 带约束抽取减数时，先整体抽取再拒绝的最多次数；仍未命中则按权重精确抽取
+REJECTION_TRIES = 4
+# 位置数不超过此值的操作数池缓存全部条目
+CACHE_LIMIT = 1 << 18
+
+
+class OperandPool:
+    """
+    All operands of one range limit, sampled by position.
+
+    Positions 0..span-1 are the integers 1..span (span = r - 1); position
+    span + (n - 1) * span + (d - 2) is the fraction n/d. Each integer
+    weighs span and each fraction 1, which gives both halves probability
+    1/2 as in generate_number. An entry is (pair, text, wrapped), where
+    wrapped is the text in the parentheses need1 puts after '-' and '/'.
+    """
+
+    __slots__ = ('range_limit', 'span', 'entries')
+
+    def __init__(self, range_limit):
+        self.range_limit = range_limit
+        self.span = range_limit - 1
+        size = self.span + self.span * self.span
+        self.entries = [None] * size if size <= CACHE_LIMIT else None
+
+    def draw(self, rng):
+        """
+        Draw one position with generate_number's distribution.
+        """
+        span = self.span
+        pick = rng.randrange(2 * span * span)
+        if pick < span * span:
+            return pick // span
+        return pick - span * (span - 1)
+
+    def value(self, position):
+        """
+        Return the unreduced (numerator, denominator) pair at a position.
+        """
+        span = self.span
+        if position < span:
+            return position + 1, 1
+        numerator, denominator = divmod(position - span, span)
+        return numerator + 1, denominator + 2
+
+    def entry(self, position):
+        """
+        Return the (pair, text, wrapped) entry at a position, building it once.
+        """
+        entries = self.entries
+        entry = entries[position] if entries is not None else None
+        if entry is None:
+            pair = normalize(*self.value(position))
+            text = format_rational(*pair)
+            entry = (pair, text, f"({text})")
+            if entries is not None:
+                entries[position] = entry
+        return entry
+
+    def number(self, position):
+        """
+        Return the operand at a position as an int or a Fraction.
+        """
+        num, den = self.entry(position)[0]
+        return num if den == 1 else fractions.Fraction(num, den)
+
+    def draw_at_most(self, limit_num, limit_den, rng):
+        """
+        Draw a position whose value is <= limit_num/limit_den, or None if none is.
+
+        The draw follows draw()'s distribution restricted to those values.
+        A few plain draws are tried first and rejected if too large; after
+        that the valid operands are counted and one is picked by weight.
+        Both steps sample the same restricted distribution.
+        """
+        for _ in range(REJECTION_TRIES):
+            position = self.draw(rng)
+            num, den = self.value(position)
+            if num * limit_den <= limit_num * den:
+                return position
+        span = self.span
+        num_integers = min(span, limit_num // limit_den)
+        # 每个分母 d 下合法分子的个数
+        counts = [min(span, limit_num * d // limit_den) for d in range(2, self.range_limit + 1)]
+        integer_weight = num_integers * span
+        total = integer_weight + sum(counts)
+        if not total:
+            return None
+        pick = rng.randrange(total)
+        if pick < integer_weight:
+            return pick // span
+        pick -= integer_weight
+        for offset, count in enumerate(counts):
+            if pick < count:
+                return span + pick * span + offset
+            pick -= count
+        raise AssertionError("unreachable")
+
+
+# 每个范围的操作数池只建一次
+POOLS = {}
+
+
+def operand_pool(range_limit):
+    """
+    Return the shared OperandPool of a range limit.
+    """
+    pool = POOLS.get(range_limit)
+    if pool is None:
+        pool = POOLS[range_limit] = OperandPool(range_limit)
+    return pool
@@ -0,0 +1,228 @@
+"""
+Pre-generated exercise pool with background refill.
+
+An ExercisePool keeps up to ``capacity`` ready (expression, answer) pairs.
+A feeder thread tops the buffer up to capacity whenever it drops to the
+low-water mark, so take(k) only pops ready pairs and never waits for a
+rejection loop; its cost is O(1) per exercise. If the buffer holds fewer
+than k pairs, the rest are generated on the spot and the take counts as
+a miss.
+
+Batches are need1.generate_shard jobs, each drawn from its own stream
+derived from the pool's seed. With ``processes=True`` the batches are
+generated in a worker process and the feeder thread only merges them, so
+refilling does not compete with the clients for the GIL. Duplicates are
+rejected across the whole lifetime of the pool through one
+ExpressionIndex, whose memory grows with the number of exercises handed
+out; pass ``dedup=False`` for a pool that runs indefinitely.
+
+Small ranges have few distinct exercises. Once STALL_BATCHES batches in
+a row bring nothing new, the pool draws the rest from need1's exact
+enumeration (space.ExpressionSpace) against its own index, under the
+lock. When that stream ends every distinct exercise has been handed
+out: the feeder stops, and a take the buffer cannot cover raises
+ValueError instead of generating forever.
+"""
+
+import itertools
+import random
+import threading
+from collections import deque
+
+from .dedup import ExpressionIndex
+from .need1 import generate_shard, iter_expressions
+from .space import estimate_space
+
+
+DEFAULT_CAPACITY = 4096
+# 后台每次补充的题目数
+REFILL_BATCH = 256
+# 连续这么多批都没有新题目时，改为精确枚举剩下的题目
+STALL_BATCHES = 8
+
+
+class ExercisePool:
+    """
+    Bounded buffer of ready exercises refilled by a background thread.
+    """
+
+    def __init__(self, range_limit, capacity=DEFAULT_CAPACITY, low_water=None, seed=None,
+                 dedup=True, processes=False, batch_size=REFILL_BATCH):
+        self.range_limit = range_limit
+        self.capacity = capacity
+        self.low_water = capacity // 4 if low_water is None else low_water
+        if not 0 <= self.low_water < capacity:
+            raise ValueError('the low-water mark must be below the capacity')
+        self.batch_size = batch_size
+        self.seed = random.randrange(2 ** 63) if seed is None else seed
+        self._index = ExpressionIndex() if dedup else None
+        self._shards = itertools.count()
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stalled = 0
+        self._stream = None
+        self._exhausted = False
+        self._executor = None
+        if processes:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(1)
+        # 命中：缓冲区足够，直接取走；未命中：不足部分当场生成
+        self._stats = {'hits': 0, 'misses': 0, 'served': 0, 'generated_on_demand': 0,
+                       'refills': 0, 'rejected_duplicate': 0}
+        self._feeder = threading.Thread(target=self._refill_loop, name='exercise-pool',
+                                        daemon=True)
+        self._feeder.start()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._buffer)
+
+    def take(self, count):
+        """
+        Return a list of count (expression, answer) pairs.
+
+        Raise ValueError if the pool has handed out every distinct exercise
+        of its range and cannot serve count pairs.
+        """
+        with self._cond:
+            buffer = self._buffer
+            if self._exhausted and len(buffer) < count:
+                raise ValueError(self._exhausted_message())
+            ready = min(count, len(buffer))
+            items = [buffer.popleft() for _ in range(ready)]
+            self._stats['hits' if ready == count else 'misses'] += 1
+            if ready == count:
+                self._stats['served'] += count
+            if len(buffer) <= self.low_water:
+                self._cond.notify_all()
+        if ready < count:
+            try:
+                items += self._generate(count - ready)
+            except ValueError:
+                with self._cond:
+                    # 已取出的题目也放回缓冲区，池用完时不丢题
+                    self._buffer.extendleft(reversed(items))
+                raise
+            with self._cond:
+                # 只统计真正交出去的题目
+                self._stats['served'] += count
+        return items
+
+    def stats(self):
+        """
+        Return the hit, miss and refill counters and the current buffer size.
+        """
+        with self._cond:
+            return dict(self._stats, buffered=len(self._buffer))
+
+    def close(self):
+        """
+        Stop the feeder thread and the worker process, if any.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._feeder.join()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _next_job(self, count):
+        """
+        Return the generate_shard job of the next unused shard.
+        """
+        dedup = self._index is not None
+        return self.seed, next(self._shards), count, self.range_limit, dedup, False, None, None
+
+    def _merge(self, pairs, hashes):
+        """
+        Return the pairs not yet handed out or buffered; the caller holds the lock.
+        """
+        if self._index is None:
+            return pairs
+        fresh = [pair for pair, key_hash in zip(pairs, hashes) if self._index.add_hash(key_hash)]
+        self._stats['rejected_duplicate'] += len(pairs) - len(fresh)
+        self._stalled = 0 if fresh else self._stalled + 1
+        if self._stalled >= STALL_BATCHES and self._stream is None:
+            # 题目数足以让 iter_expressions 枚举所有运算符数
+            total = sum(estimate_space(self.range_limit, count) for count in (1, 2, 3))
+            self._stream = iter_expressions(total, self.range_limit, self._index,
+                                            random.Random(self.seed))
+        return fresh
+
+    def _draw_stream(self, count):
+        """
+        Return up to count pairs of the exact enumeration; the caller holds the lock.
+        """
+        pairs = list(itertools.islice(self._stream, count))
+        if len(pairs) < count:
+            self._exhausted = True
+            self._cond.notify_all()
+        return pairs
+
+    def _exhausted_message(self):
+        """
+        Describe a pool that has handed out every distinct exercise.
+        """
+        return (f"the pool has used up all {len(self._index)} distinct exercises "
+                f"of range {self.range_limit}")
+
+    def _generate(self, count):
+        """
+        Generate count pairs in the calling thread for a take the buffer could not cover.
+
+        If the pool is used up first, the pairs are put back into the buffer.
+        """
+        items = []
+        while len(items) < count:
+            with self._cond:
+                if self._stream is not None:
+                    pairs = self._draw_stream(count - len(items))
+                    self._stats['generated_on_demand'] += len(pairs)
+                    items += pairs
+                    if self._exhausted and len(items) < count:
+                        # 取不满时把已生成的题目放回缓冲区
+                        self._buffer.extendleft(reversed(items))
+                        raise ValueError(self._exhausted_message())
+                    continue
+                job = self._next_job(count - len(items))
+            pairs, hashes, _, _ = generate_shard(job)
+            with self._cond:
+                items += self._merge(pairs, hashes)
+                self._stats['generated_on_demand'] += len(pairs)
+        return items[:count]
+
+    def _refill_loop(self):
+        """
+        Fill the buffer to capacity, then sleep until it drops to the low-water mark.
+        """
+        filling = True  # 启动时先装满
+        while True:
+            with self._cond:
+                if len(self._buffer) >= self.capacity:
+                    filling = False
+                while not self._closed and not filling and len(self._buffer) > self.low_water:
+                    self._cond.wait()
+                if self._closed or self._exhausted:
+                    return
+                filling = True
+                size = min(self.capacity - len(self._buffer), self.batch_size)
+                if self._stream is not None:
+                    self._buffer.extend(self._draw_stream(size))
+                    self._stats['refills'] += 1
+                    continue
+                job = self._next_job(size)
+            if self._executor is not None:
+                pairs, hashes, _, _ = self._executor.submit(generate_shard, job).result()
+            else:
+                pairs, hashes, _, _ = generate_shard(job)
+            with self._cond:
+                # 只有补充线程往缓冲区里放题目，一批不会超出容量
+                self._buffer.extend(self._merge(pairs, hashes))
+                self._stats['refills'] += 1
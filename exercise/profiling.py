@@ -0,0 +1,191 @@
+"""
+Profiling and statistics shared by need1 and need2 (``--profile``, ``--stats``).
+
+Three profilers are available:
+
+- ``cprofile``: per-function call counts and times from cProfile.
+- ``tracemalloc``: current and peak traced memory and the source lines
+  that allocated the most.
+- ``stages``: wall time of the named stages each tool marks with stage().
+
+The report is written as JSON to ``--profile-output``. Only the main
+process is profiled; worker processes started by ``-j`` are not. The
+profiler modules are imported when a profile is requested.
+
+``--stats`` is the lightweight counterpart: each tool keeps a few hot-path
+counters that are only updated in bulk or on error paths, and stage()
+feeds a power-of-two latency histogram per stage. finish_stats() prints
+both and can write them as JSON. While neither a stages profile nor
+--stats is active, stage() costs two global lookups.
+"""
+
+import time
+from contextlib import contextmanager
+
+
+PROFILERS = ('cprofile', 'tracemalloc', 'stages')
+# 报告中列出的函数 / 分配位置条数
+TOP_ENTRIES = 30
+# 正在运行 stages 分析时，阶段名到累计秒数与次数的映射；未分析时为 None
+STAGE_TIMES = None
+# --stats 打开时，阶段名到 [累计秒数, 次数, 各桶计数] 的映射；未打开时为 None
+STAGE_HISTOGRAMS = None
+# 直方图第 i 个桶统计耗时小于 2**i 微秒（且不小于 2**(i-1) 微秒）的次数，最后一个桶不设上限
+HISTOGRAM_BUCKETS = 32
+
+
+def add_profile_arguments(parser, default_output):
+    """
+    Add the --profile and --profile-output options to a command line parser.
+    """
+    parser.add_argument('--profile', choices=PROFILERS, default=None,
+                        help='Profile this run and write a JSON report')
+    parser.add_argument('--profile-output', default=default_output,
+                        help=f'Path of the JSON profile report (default {default_output})')
+
+
+def add_stats_arguments(parser):
+    """
+    Add the --stats and --stats-output options to a command line parser.
+    """
+    parser.add_argument('--stats', action='store_true',
+                        help='Print hot-path counters and per-stage timing histograms')
+    parser.add_argument('--stats-output', default=None,
+                        help='Write the counters and histograms as JSON to this path')
+
+
+@contextmanager
+def stage(name):
+    """
+    Time the enclosed block as a named stage while a stages profile or --stats runs.
+    """
+    if STAGE_TIMES is None and STAGE_HISTOGRAMS is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if STAGE_TIMES is not None:
+            total, calls = STAGE_TIMES.get(name, (0.0, 0))
+            STAGE_TIMES[name] = (total + elapsed, calls + 1)
+        if STAGE_HISTOGRAMS is not None:
+            record_histogram(name, elapsed)
+
+
+def record_histogram(name, elapsed):
+    """
+    Add one duration in seconds to the histogram of a stage.
+    """
+    histogram = STAGE_HISTOGRAMS.get(name)
+    if histogram is None:
+        histogram = STAGE_HISTOGRAMS[name] = [0.0, 0, [0] * HISTOGRAM_BUCKETS]
+    histogram[0] += elapsed
+    histogram[1] += 1
+    bucket = min(int(elapsed * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+    histogram[2][bucket] += 1
+
+
+def start_stats():
+    """
+    Start collecting stage histograms for --stats.
+    """
+    global STAGE_HISTOGRAMS
+    STAGE_HISTOGRAMS = {}
+
+
+def finish_stats(counters, output=None):
+    """
+    Print the counters and stage histograms, write them as JSON to output if given, and stop.
+
+    Histogram buckets are reported as {'below_us': bound, 'count': count};
+    the last bucket has no bound (None).
+    """
+    global STAGE_HISTOGRAMS
+    stages = []
+    for name, (total, calls, buckets) in (STAGE_HISTOGRAMS or {}).items():
+        stages.append({'stage': name, 'calls': calls, 'seconds': total, 'histogram': [
+            {'below_us': 2 ** bucket if bucket < HISTOGRAM_BUCKETS - 1 else None,
+             'count': count} for bucket, count in enumerate(buckets) if count]})
+    STAGE_HISTOGRAMS = None
+    print("Counters:")
+    for name, value in counters.items():
+        print(f"  {name}: {value}")
+    for entry in stages:
+        print(f"Stage {entry['stage']}: {entry['calls']} calls, {entry['seconds']:.3f} s")
+        for bucket in entry['histogram']:
+            bound = f"< {bucket['below_us']} us" if bucket['below_us'] else "longer"
+            print(f"  {bound:>14}: {bucket['count']}")
+    if output:
+        import json
+        with open(output, 'w', encoding='utf-8') as f_out:
+            json.dump({'counters': counters, 'stages': stages}, f_out, indent=2)
+        print(f"Statistics written to {output}")
+
+
+def run_profiled(profiler, output, func, *args):
+    """
+    Call func(*args) under a profiler, write the JSON report to output and return func's result.
+
+    The report is written even if func raises, so a failing run can be
+    inspected too.
+    """
+    global STAGE_TIMES
+    import json
+    import sys
+    report = {'profiler': profiler, 'argv': sys.argv}
+    started = time.perf_counter()
+    try:
+        if profiler == 'cprofile':
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args)
+            finally:
+                report['functions'] = cprofile_entries(profile)
+        elif profiler == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+            try:
+                return func(*args)
+            finally:
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+                report['current_bytes'] = current
+                report['peak_bytes'] = peak
+                report['allocations'] = [
+                    {'file': stat.traceback[0].filename, 'line': stat.traceback[0].lineno,
+                     'size': stat.size, 'count': stat.count}
+                    for stat in snapshot.statistics('lineno')[:TOP_ENTRIES]]
+        elif profiler == 'stages':
+            STAGE_TIMES = {}
+            try:
+                return func(*args)
+            finally:
+                report['stages'] = [{'stage': name, 'seconds': total, 'calls': calls}
+                                    for name, (total, calls) in STAGE_TIMES.items()]
+                STAGE_TIMES = None
+        else:
+            raise ValueError(f"unknown profiler '{profiler}'")
+    finally:
+        report['wall_seconds'] = time.perf_counter() - started
+        with open(output, 'w', encoding='utf-8') as f_out:
+            json.dump(report, f_out, indent=2)
+        print(f"Profile written to {output}")
+
+
+def cprofile_entries(profile):
+    """
+    Return the TOP_ENTRIES functions of a cProfile.Profile by cumulative time.
+    """
+    import pstats
+    stats = pstats.Stats(profile).stats
+    entries = [{'function': f"{file_name}:{line}({function})", 'calls': calls,
+                'primitive_calls': primitive_calls, 'total_seconds': total,
+                'cumulative_seconds': cumulative}
+               for (file_name, line, function), (primitive_calls, calls, total, cumulative, _)
+               in stats.items()]
+    entries.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+    return entries[:TOP_ENTRIES]
@@ -0,0 +1,132 @@
+"""
+Integer-pair rational arithmetic for the generation and grading hot paths.
+
+A rational is a plain ``(numerator, denominator)`` tuple of ints with a
+positive denominator. Arithmetic never reduces by gcd; normalize() is
+called only where a canonical form is needed, e.g. when formatting an
+answer. Comparisons use cross-multiplication, so they work on
+unnormalized pairs too.
+"""
+
+import fractions
+import re
+from math import gcd
+
+
+def to_pair(number):
+    """
+    Convert an int, a Fraction or a pair into a (numerator, denominator) pair.
+    """
+    if isinstance(number, int):
+        return number, 1
+    if isinstance(number, tuple):
+        return number
+    return number.numerator, number.denominator
+
+
+def to_fraction(pair):
+    """
+    Convert a pair into a Fraction.
+    """
+    return fractions.Fraction(pair[0], pair[1])
+
+
+def normalize(num, den):
+    """
+    Reduce a pair to lowest terms with a positive denominator.
+    """
+    if den < 0:
+        num, den = -num, -den
+    divisor = gcd(num, den)
+    if divisor > 1:
+        return num // divisor, den // divisor
+    return num, den
+
+
+def apply(num, den, op_symbol, other_num, other_den):
+    """
+    Apply one operator to two pairs and return the unnormalized result.
+    """
+    if op_symbol == '+':
+        return num * other_den + other_num * den, den * other_den
+    if op_symbol == '-':
+        return num * other_den - other_num * den, den * other_den
+    if op_symbol == '*':
+        return num * other_num, den * other_den
+    if other_num == 0:
+        raise ZeroDivisionError('division by zero')
+    if other_num < 0:
+        return -num * other_den, -den * other_num
+    return num * other_den, den * other_num
+
+
+def evaluate(operands, operators):
+    """
+    Evaluate pairs left to right and return the unnormalized result pair.
+    """
+    num, den = operands[0]
+    for op_symbol, (other_num, other_den) in zip(operators, operands[1:]):
+        # 内联四则运算，避免每一步创建对象或求最大公约数
+        if op_symbol == '+':
+            num, den = num * other_den + other_num * den, den * other_den
+        elif op_symbol == '-':
+            num, den = num * other_den - other_num * den, den * other_den
+        elif op_symbol == '*':
+            num, den = num * other_num, den * other_den
+        else:
+            num, den = apply(num, den, op_symbol, other_num, other_den)
+    return num, den
+
+
+def equal(left, right):
+    """
+    Check whether two pairs denote the same number.
+    """
+    return left[0] * right[1] == right[0] * left[1]
+
+
+def less_than(left, right):
+    """
+    Check whether left < right for pairs with positive denominators.
+    """
+    return left[0] * right[1] < right[0] * left[1]
+
+
+def format_rational(num, den):
+    """
+    Format a pair the way need1.format_number formats a Fraction.
+    """
+    num, den = normalize(num, den)
+    if num == 0:
+        return "0"
+    if den == 1:
+        return str(num)
+    if num < den:  # 真分数
+        return f"{num}/{den}"
+    whole, rest = divmod(num, den)  # 带分数
+    return f"{whole}’{rest}/{den}"
+
+
+# 答案的写法：整数、分数 a/b，或带分数 w’a/b（也接受 w a/b 与 w+a/b）
+ANSWER_RE = re.compile(r"\s*(-?\d+)(?:(?:\s*[’+]\s*|\s+)(\d+)/(\d+)|/(\d+))?\s*\Z")
+
+
+def parse_rational(text):
+    """
+    Parse an integer, 'a/b' or mixed 'w’a/b' string into an unnormalized pair.
+    """
+    match = ANSWER_RE.match(text)
+    if match is None:
+        raise ValueError(f"Cannot parse '{text.strip()}' as a number")
+    whole, num, den, plain_den = match.groups()
+    if plain_den is not None:  # 普通分数
+        num, den, whole = int(whole), int(plain_den), 0
+    elif num is not None:  # 带分数
+        whole, num, den = int(whole), int(num), int(den)
+    else:  # 整数
+        return int(whole), 1
+    if den == 0:
+        raise ZeroDivisionError(f"Fraction({num}, 0)")
+    if whole < 0:
+        return whole * den - num, den
+    return whole * den + num, den
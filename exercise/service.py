@@ -0,0 +1,260 @@
+"""
+Asyncio HTTP grading service with a warm answer key.
+
+Usage: python -m exercise.service -e EXERCISES [--host HOST] [--port PORT] [--concurrency N]
+
+The exercise file is turned into an answer key once at start-up (from its
+sidecar if there is one, see need2.load_or_build_answer_key) and kept in
+memory, so a submission is only parsed and compared. Endpoints:
+
+- ``POST /grade``: the body is an answer file; the response is the grade
+  file need2 would write (``Correct: ...`` / ``Wrong: ...``).
+- ``GET /metrics``: request counts and request-latency percentiles as JSON.
+- ``GET /health``: ``ok`` once the answer key is loaded.
+
+At most ``--concurrency`` submissions are graded at a time and the rest
+wait for a slot; the reported latency includes that wait. Grading runs in
+worker threads so the event loop keeps accepting connections, although
+the GIL still runs one grading at a time.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .grades import GradeFlags
+from .need2 import format_grades, grade_submission, load_or_build_answer_key
+
+
+DEFAULT_CONCURRENCY = 4
+# 请求体的最大字节数，超过时返回 413
+MAX_BODY = 64 << 20
+# 计算延迟分位数时保留的最近请求数
+LATENCY_WINDOW = 1024
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large'}
+
+
+class LatencyMetric:
+    """
+    Request count, total time and the latencies of the last LATENCY_WINDOW requests.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds):
+        """
+        Record the latency of one request in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def snapshot(self):
+        """
+        Return the count and the mean, p50, p99 and max latency in milliseconds.
+        """
+        recent = sorted(self.recent)
+        if not recent:
+            return {'count': 0}
+        return {'count': self.count,
+                'mean_ms': self.total / self.count * 1000,
+                'p50_ms': recent[len(recent) // 2] * 1000,
+                'p99_ms': recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000,
+                'max_ms': recent[-1] * 1000}
+
+
+class GradingService:
+    """
+    Grades submissions against one exercise file whose answer key stays in memory.
+    """
+
+    def __init__(self, exercise_file, concurrency=DEFAULT_CONCURRENCY, verbose=False):
+        self.exercise_file = exercise_file
+        self.verbose = verbose
+        # 服务启动时只计算一次标准答案
+        self.answer_key = load_or_build_answer_key(exercise_file)
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(concurrency)
+        self.slots = None
+        self.latency = LatencyMetric()
+        self.in_flight = 0
+        self.waiting = 0
+        self.errors = 0
+        self.lines_graded = 0
+
+    def grade_text(self, text):
+        """
+        Grade the text of an answer file; return its GradeFlags.
+        """
+        return GradeFlags.from_pairs(grade_submission(self.answer_key, text.splitlines(True)))
+
+    async def grade(self, body):
+        """
+        Grade one submission body once a concurrency slot is free; return the grade file text.
+        """
+        if self.slots is None:
+            # 信号量要在事件循环内创建
+            self.slots = asyncio.Semaphore(self.concurrency)
+        self.waiting += 1
+        async with self.slots:
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                grades = await loop.run_in_executor(self.executor, self.grade_text,
+                                                    body.decode('utf-8'))
+            finally:
+                self.in_flight -= 1
+        # 计数只在事件循环线程里修改
+        self.lines_graded += len(grades)
+        return format_grades(grades, self.verbose)
+
+    def metrics(self):
+        """
+        Return the service metrics as a dictionary.
+        """
+        return {'exercises': len(self.answer_key), 'concurrency': self.concurrency,
+                'in_flight': self.in_flight, 'waiting': self.waiting, 'errors': self.errors,
+                'lines_graded': self.lines_graded, 'latency': self.latency.snapshot()}
+
+    async def dispatch(self, method, path, body):
+        """
+        Route one request; return (status, content type, payload bytes).
+        """
+        if path == '/grade':
+            if method != 'POST':
+                return 405, 'text/plain', b'use POST\n'
+            started = time.perf_counter()
+            try:
+                grades = await self.grade(body)
+            except UnicodeDecodeError:
+                return 400, 'text/plain', b'the answer file must be UTF-8\n'
+            finally:
+                self.latency.record(time.perf_counter() - started)
+            return 200, 'text/plain; charset=utf-8', grades.encode('utf-8')
+        if path == '/metrics' and method == 'GET':
+            return 200, 'application/json', json.dumps(self.metrics()).encode('utf-8')
+        if path == '/health' and method == 'GET':
+            return 200, 'text/plain', b'ok\n'
+        return 404, 'text/plain', b'not found\n'
+
+    async def handle(self, reader, writer):
+        """
+        Serve the HTTP/1.1 requests of one connection, keeping it alive unless asked not to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    await self.respond(writer, 400, 'text/plain', b'malformed request\n', False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, 'text/plain', b'answer file too large\n',
+                                       False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, content_type, payload = await self.dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self.respond(writer, status, content_type, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, content_type, payload, keep_alive):
+        """
+        Write one HTTP response.
+        """
+        if status >= 400:
+            self.errors += 1
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + payload)
+        await writer.drain()
+
+
+async def start_server(service, host='127.0.0.1', port=8000):
+    """
+    Start serving a GradingService; return the asyncio server.
+    """
+    return await asyncio.start_server(service.handle, host, port)
+
+
+async def request(host, port, method, path, body=b''):
+    """
+    Send one request on a new connection; return (status, response body bytes).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+                     .encode('latin-1') + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split(b' ', 2)[1]), payload
+
+
+async def serve(service, host, port):
+    """
+    Serve until cancelled.
+    """
+    server = await start_server(service, host, port)
+    address = server.sockets[0].getsockname()
+    print(f"Grading {service.exercise_file} ({len(service.answer_key)} exercises) "
+          f"on http://{address[0]}:{address[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    """
+    Load the answer key and serve it over HTTP.
+    """
+    parser = argparse.ArgumentParser(description='Serve exercise grading over HTTP.')
+    parser.add_argument('-e', '--exercise_file', required=True, help='Path to the exercises file')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Submissions graded at the same time; others wait')
+    parser.add_argument('--verbose', action='store_true',
+                        help='List every exercise number in the grades instead of ranges')
+    args = parser.parse_args(argv)
+    try:
+        service = GradingService(args.exercise_file, args.concurrency, args.verbose)
+    except (OSError, UnicodeDecodeError) as e_symbol:
+        print(f"An error occurred: {e_symbol}")
+        return
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Exhaustive enumeration of the exercises of small ranges.
+
+With a small range limit the set of valid exercises is finite: -r 5 has
+15 distinct operand values, 795 valid one-operator chains and 585 of
+them distinct up to canonical form. Random draws with duplicate checking
+collide more and more as n approaches that size and never finish once
+it is used up.
+
+An ExpressionSpace numbers every valid chain of one range limit and
+operator count. Operand values are the distinct reduced values of the
+OperandPool in increasing order, operators come in the order + - * /,
+and a subtrahend never exceeds the running result, so every
+intermediate result is non-negative. The number of completions of each
+(running result, operators left) state is counted once and memoised;
+with one operator left it is 3V plus the number of values not above the
+result, found by bisect. chain(i) unranks index i by descending through
+the cumulative counts of each state, in O(k log V) steps for k operators
+and V values. A SampleStream draws the indices in the order of a keyed
+permutation (a Feistel network walked back into range), so n draws
+without replacement cost O(n) time and O(1) memory whatever the size of
+the space, and a stream resumes from its key and the number of indices
+drawn.
+
+Only operator counts whose space n comes close to are enumerated;
+smaller loads keep the builder's operand and operator distribution.
+
+Chains are distinct as written, but several can share a canonical form
+(1 + 2 and 2 + 1); with an ExpressionIndex, iter_unique skips those and
+ends after the last distinct exercise. Sampling is uniform over chains,
+not weighted like generate_number's operand draws.
+"""
+
+import random
+from bisect import bisect_right
+from fractions import Fraction
+from functools import lru_cache
+from itertools import accumulate
+
+from .rational import apply, format_rational, normalize
+
+
+# 运算符在编号中的顺序
+OPERATORS = ('+', '-', '*', '/')
+# 某个运算符数分到的题目数超过其表达式空间估计值的 1/ENUMERATE_MARGIN 时改为枚举抽样
+ENUMERATE_MARGIN = 8
+# 精确统计不同操作数取值的范围上限，更大的范围只给出上界
+EXACT_VALUES_LIMIT = 100
+# 置换的 Feistel 轮数与轮函数的乘数
+FEISTEL_ROUNDS = 4
+FEISTEL_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def operand_values(range_limit):
+    """
+    Return the distinct reduced operand pairs of a range limit in increasing order.
+    """
+    span = range_limit - 1
+    pairs = {normalize(num, den) for num in range(1, span + 1)
+             for den in range(1, range_limit + 1)}
+    return sorted(pairs, key=lambda pair: Fraction(*pair))
+
+
+@lru_cache(maxsize=None)
+def count_values(range_limit):
+    """
+    Return the number of distinct operand values, exactly up to EXACT_VALUES_LIMIT.
+    """
+    span = range_limit - 1
+    if range_limit <= EXACT_VALUES_LIMIT:
+        return len(operand_values(range_limit))
+    return span + span * span
+
+
+def estimate_space(range_limit, num_operators):
+    """
+    Estimate the number of distinct expressions of a range limit and operator count.
+
+    Distinct operand values are counted exactly up to r = 100 and bounded
+    above beyond that; the estimate ignores the non-negative rule and the
+    canonical forms, so it is an upper bound.
+    """
+    return count_values(range_limit) ** (num_operators + 1) * 4 ** num_operators
+
+
+def enumerated_operator_counts(num_expressions, range_limit, operator_counts):
+    """
+    Return the operator counts whose space is too small for random draws with duplicate checking.
+
+    Every operator count is expected to take an equal share of the
+    exercises. A small space runs out before its share is drawn and the
+    rest of its share falls to the other counts, so those are checked
+    again with the larger load until no more counts turn out small.
+    """
+    operator_counts = list(operator_counts)
+    share = num_expressions / len(operator_counts)
+    enumerated = []
+    while len(enumerated) < len(operator_counts):
+        rest = [count for count in operator_counts if count not in enumerated]
+        used = sum(min(estimate_space(range_limit, count), share) for count in enumerated)
+        load = (num_expressions - used) / len(rest)
+        small = [count for count in rest
+                 if load * ENUMERATE_MARGIN > estimate_space(range_limit, count)]
+        if not small:
+            break
+        enumerated += small
+    return enumerated
+
+
+class ExpressionSpace:
+    """
+    Every valid chain of one range limit and operator count, numbered from 0.
+
+    chain(i) returns (entries, operators, result) like need1.build_chain:
+    entries are (pair, text, wrapped) operand entries and result is an
+    unnormalized pair.
+    """
+
+    def __init__(self, range_limit, num_operators):
+        if range_limit < 2 or num_operators < 1:
+            raise ValueError('the range limit must be at least 2 and the operator count at least 1')
+        self.range_limit = range_limit
+        self.num_operators = num_operators
+        self._pairs = operand_values(range_limit)
+        # 浮点值只用来二分定位，边界再用整数精确校正
+        self._floats = [num / den for num, den in self._pairs]
+        self.entries = []
+        for pair in self._pairs:
+            text = format_rational(*pair)
+            self.entries.append((pair, text, f"({text})"))
+        self._memo = {}
+        # 按第一个操作数累计的题目数
+        self._first = list(accumulate(self._count(pair, num_operators) for pair in self._pairs))
+
+    def __len__(self):
+        return self._first[-1]
+
+    def _at_most(self, num, den):
+        """
+        Return the number of operand values no greater than num/den.
+        """
+        pairs = self._pairs
+        position = bisect_right(self._floats, num / den)
+        while position < len(pairs) and pairs[position][0] * den <= num * pairs[position][1]:
+            position += 1
+        while position and pairs[position - 1][0] * den > num * pairs[position - 1][1]:
+            position -= 1
+        return position
+
+    def _count(self, pair, remaining):
+        """
+        Return the number of valid completions of a chain at result pair with remaining operators.
+        """
+        if remaining == 1:
+            return 3 * len(self._pairs) + self._at_most(*pair)
+        return self._children(pair, remaining)[-1]
+
+    def _children(self, pair, remaining):
+        """
+        Return the cumulative completion counts of each choice at a state with 2 or more operators left.
+        """
+        key = (pair, remaining)
+        cumulative = self._memo.get(key)
+        if cumulative is None:
+            num, den = pair
+            subtrahends = self._at_most(num, den)
+            counts = []
+            for op_symbol in OPERATORS:
+                values = self._pairs[:subtrahends] if op_symbol == '-' else self._pairs
+                for value in values:
+                    child = normalize(*apply(num, den, op_symbol, *value))
+                    counts.append(self._count(child, remaining - 1))
+            cumulative = self._memo[key] = list(accumulate(counts))
+        return cumulative
+
+    def _choice(self, position, subtrahends):
+        """
+        Return the operator and value position of choice number position at a state.
+        """
+        size = len(self._pairs)
+        if position < size:
+            return '+', position
+        position -= size
+        if position < subtrahends:
+            return '-', position
+        position -= subtrahends
+        return ('*', position) if position < size else ('/', position - size)
+
+    def chain(self, index):
+        """
+        Return (entries, operators, result) of chain number index.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"chain {index} is out of range 0-{len(self) - 1}")
+        first = bisect_right(self._first, index)
+        if first:
+            index -= self._first[first - 1]
+        entries = [self.entries[first]]
+        operators = []
+        num, den = self._pairs[first]
+        for remaining in range(self.num_operators, 0, -1):
+            pair = normalize(num, den)
+            if remaining == 1:
+                # 最后一个运算符的每种选择都只有一种补全
+                position = index
+            else:
+                cumulative = self._children(pair, remaining)
+                position = bisect_right(cumulative, index)
+                if position:
+                    index -= cumulative[position - 1]
+            op_symbol, value = self._choice(position, self._at_most(*pair))
+            entry = self.entries[value]
+            num, den = apply(num, den, op_symbol, *entry[0])
+            entries.append(entry)
+            operators.append(op_symbol)
+        return entries, operators, (num, den)
+
+    def sample(self, rng=random):
+        """
+        Yield every chain once, in the pseudo-random order of a key drawn from rng.
+        """
+        stream = SampleStream(self, rng.getrandbits(64))
+        while stream.drawn < len(self):
+            yield self.chain(stream.next_index())
+
+    def iter_unique(self, index=None, rng=random):
+        """
+        Yield the sampled chains not yet in index; the stream ends when the space is used up.
+        """
+        stream = SampleStream(self, rng.getrandbits(64))
+        while True:
+            chain = stream.next_unique(index)
+            if chain is None:
+                return
+            yield chain
+
+
+class SampleStream:
+    """
+    The chains of one ExpressionSpace in the order of a keyed permutation.
+
+    The permutation is a Feistel network over the smallest even power of
+    two not below the size of the space, walked again while it lands out
+    of range, so every index comes up exactly once and each draw costs a
+    few rounds of integer arithmetic. The whole state of a stream is its
+    key and the number of indices drawn.
+    """
+
+    def __init__(self, space, key, drawn=0):
+        self.space = space
+        self.key = key
+        self.drawn = drawn
+        bits = max(2, (len(space) - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._round_keys = [(key >> shift) & 0xFFFF for shift in range(0, 16 * FEISTEL_ROUNDS, 16)]
+
+    def _permute(self, value):
+        """
+        Apply the Feistel rounds once.
+        """
+        half = self._half
+        mask = self._mask
+        left = value >> half
+        right = value & mask
+        for round_key in self._round_keys:
+            mixed = ((right ^ round_key) + round_key) * FEISTEL_MULTIPLIER
+            left, right = right, left ^ ((mixed ^ (mixed >> 29)) & mask)
+        return (left << half) | right
+
+    def next_index(self):
+        """
+        Return the next index of the permutation.
+        """
+        size = len(self.space)
+        index = self._permute(self.drawn)
+        # 超出范围时继续置换，直到落回 [0, size)
+        while index >= size:
+            index = self._permute(index)
+        self.drawn += 1
+        return index
+
+    def next_unique(self, index=None):
+        """
+        Return the next chain not yet in index, or None once every chain has been drawn.
+        """
+        space = self.space
+        while self.drawn < len(space):
+            entries, operators, result = space.chain(self.next_index())
+            if index is None or index.add([entry[0] for entry in entries], operators):
+                return entries, operators, result
+        return None
+
+
+# 每个范围与运算符数的表达式空间只建一次
+SPACES = {}
+
+
+def expression_space(range_limit, num_operators):
+    """
+    Return the shared ExpressionSpace of a range limit and operator count.
+    """
+    space = SPACES.get((range_limit, num_operators))
+    if space is None:
+        space = SPACES[(range_limit, num_operators)] = ExpressionSpace(range_limit, num_operators)
+    return space
@@ -0,0 +1,57 @@
+"""
+Unit tests for the binary answer-key sidecar.
+"""
+
+import os
+import tempfile
+import unittest
+from exercise.answerkey import write_answer_key, load_answer_key, answer_key_path
+
+
+class TestAnswerKey(unittest.TestCase):
+    """
+    Test class for testing writing, loading and invalidating answer keys.
+    """
+
+    def setUp(self):
+        """
+        Write a small exercise file into a temporary directory.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.exercise_file = os.path.join(self.tmp_dir.name, 'Exercises.txt')
+        with open(self.exercise_file, 'w', encoding='utf-8') as f_out:
+            f_out.write('1. 1 + 2\n2. 1  / (0)\n3. 1  / (2/4)\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        """
+        Test if a written key loads back with reduced pairs and invalid entries as None.
+        """
+        items = [('1', (3, 1)), ('2', None), ('3', (4, 2))]
+        self.assertTrue(write_answer_key(self.exercise_file, items))
+        answer_key = load_answer_key(self.exercise_file)
+        self.assertEqual(len(answer_key), 3)
+        self.assertEqual(list(answer_key), [('1', (3, 1)), ('2', None), ('3', (2, 1))])
+        self.assertEqual(answer_key[2], (2, 1))
+        with self.assertRaises(IndexError):
+            _ = answer_key[3]
+
+    def test_stale_or_invalid_key(self):
+        """
+        Test if a changed exercise file or unsuitable answers leave no usable key.
+        """
+        self.assertIsNone(load_answer_key(self.exercise_file))
+        self.assertTrue(write_answer_key(self.exercise_file, [('1', (3, 1))]))
+        with open(self.exercise_file, 'a', encoding='utf-8') as f_out:
+            f_out.write('4. 2 + 2\n')
+        # 题目文件改动后摘要不再匹配
+        self.assertIsNone(load_answer_key(self.exercise_file))
+        self.assertFalse(write_answer_key(self.exercise_file, [('1', (3, 1)), ('3', (1, 1))]))
+        self.assertFalse(write_answer_key(self.exercise_file, [('1', (1 << 70, 1))]))
+        self.assertFalse(os.path.exists(answer_key_path(self.exercise_file)))
+
+
+if __name__ == '__main__':
+    unittest.main()
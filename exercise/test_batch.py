@@ -0,0 +1,55 @@
+"""
+Unit tests for the vectorized batch evaluator.
+"""
+
+import unittest
+import random
+from exercise.batch import available, evaluate_many, matches_many
+from exercise.rational import evaluate, equal
+
+
+class TestBatch(unittest.TestCase):
+    """
+    Test class for testing batch evaluation against the exact evaluator.
+    """
+
+    def setUp(self):
+        rng = random.Random(3)
+        self.rows = []
+        for _ in range(2000):
+            width = rng.randint(0, 3)
+            limit = 2 ** 40 if rng.random() < 0.1 else 20  # 部分行会溢出
+            pairs = [(rng.choice([-1, 1]) * rng.randint(1, limit), rng.randint(1, 20))
+                     for _ in range(width + 1)]
+            self.rows.append((pairs, [rng.choice('+-*/') for _ in range(width)]))
+
+    def test_evaluate_many(self):
+        """
+        Test if evaluate_many matches rational.evaluate row by row, overflow included.
+        """
+        rows = self.rows + [([(1, 2), (2 ** 70, 1)], ['+']), ([(1, 2)], ['+'])]
+        results = evaluate_many(rows)
+        for result, (pairs, operators) in zip(results, rows):
+            self.assertTrue(equal(result, evaluate(pairs, operators)))
+
+    def test_matches_many(self):
+        """
+        Test if matches_many flags exactly the rows whose expected value is right.
+        """
+        expected = []
+        for i, (pairs, operators) in enumerate(self.rows):
+            num, den = evaluate(pairs, operators)
+            expected.append((num, den) if i % 2 else (num + den, den))
+        matches = matches_many(self.rows, expected)
+        self.assertEqual(matches, [bool(i % 2) for i in range(len(self.rows))])
+
+    @unittest.skipUnless(available(), 'NumPy is not installed')
+    def test_zero_division_falls_back(self):
+        """
+        Test if division by zero is left to the exact evaluator.
+        """
+        self.assertRaises(ZeroDivisionError, evaluate_many, [([(1, 2), (0, 1)], ['/'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
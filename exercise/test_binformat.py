@@ -0,0 +1,78 @@
+"""
+Unit tests for the binary columnar exercise format.
+"""
+
+import os
+import tempfile
+import unittest
+from exercise.binformat import write_binary, iter_exercise_rows, iter_answer_rows, text_to_binary, \
+    binary_to_text, parse_chain, ColumnReader, EXERCISE_MAGIC, EXERCISE_COLUMNS, GROUP_ROWS
+
+
+class TestBinaryFormat(unittest.TestCase):
+    """
+    Test class for testing binary writing, reading and text conversion.
+    """
+
+    def setUp(self):
+        """
+        Create a temporary directory for the files of a test.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.paths = [os.path.join(self.tmp_dir.name, name) for name in
+                      ('Exercises.bin', 'Answers.bin', 'Exercises.txt', 'Answers.txt')]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_and_read(self):
+        """
+        Test if rows of every length survive a round trip across row groups.
+        """
+        rows = [([(i, 1), (1, 2)], ['+'], (2 * i + 1, 2)) for i in range(GROUP_ROWS + 3)]
+        rows.append(([(5, 1), (1, 1), (1, 2), (5, 1)], ['+', '/', '+'], (34, 2)))
+        rows.append(([(1, 1), (0, 1)], ['/'], None))
+        self.assertEqual(write_binary(rows, *self.paths[:2]), GROUP_ROWS + 5)
+        self.assertEqual(list(iter_exercise_rows(self.paths[0])),
+                         [(pairs, operators) for pairs, operators, _ in rows])
+        answers = list(iter_answer_rows(self.paths[1]))
+        # 答案按最简形式保存，无效答案读回为 None
+        self.assertEqual(answers[-2:], [(17, 1), None])
+        self.assertEqual(answers[1], (3, 2))
+        with self.assertRaises(ValueError):
+            ColumnReader(self.paths[1], EXERCISE_MAGIC, EXERCISE_COLUMNS)
+        with self.assertRaises(ValueError):
+            write_binary([([(1, 1)] * 5, ['+'] * 4, (5, 1))], *self.paths[:2])
+
+    def test_text_conversion(self):
+        """
+        Test if text files convert to binary and back unchanged.
+        """
+        exercises = '1. 5  + 1 / (1/2) + 5\n2. 1’1/3  - (1/3)\n3. 3  * 2\n'
+        answers = '1. 17\n2. 1\n3. x\n'
+        with open(self.paths[2], 'w', encoding='utf-8') as f_out:
+            f_out.write(exercises)
+        with open(self.paths[3], 'w', encoding='utf-8') as f_out:
+            f_out.write(answers)
+        self.assertEqual(text_to_binary(self.paths[2], self.paths[3], *self.paths[:2]), 3)
+        self.assertEqual(binary_to_text(*self.paths), 3)
+        with open(self.paths[2], encoding='utf-8') as f_in:
+            self.assertEqual(f_in.read(), exercises)
+        with open(self.paths[3], encoding='utf-8') as f_in:
+            self.assertEqual(f_in.read(), '1. 17\n2. 1\n3. ?\n')
+        with self.assertRaises(ValueError):
+            parse_chain('1 + (2 * 3)')
+        # 行数不同的文件不能转换，多出的题目或答案不会被静默丢掉
+        for long_path in self.paths[2:]:
+            with open(self.paths[2], 'w', encoding='utf-8') as f_out:
+                f_out.write(exercises)
+            with open(self.paths[3], 'w', encoding='utf-8') as f_out:
+                f_out.write(answers)
+            with open(long_path, 'a', encoding='utf-8') as f_out:
+                f_out.write('4. 1  + 1\n' if long_path == self.paths[2] else '4. 2\n')
+            with self.assertRaises(ValueError):
+                text_to_binary(self.paths[2], self.paths[3], *self.paths[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
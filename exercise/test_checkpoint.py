@@ -0,0 +1,130 @@
+"""
+Unit tests for resumable generation runs.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from exercise.checkpoint import checkpoint_path, hashes_path, write_checkpoint
+from exercise.dedup import ExpressionIndex
+from exercise.need1 import generate_and_write_expressions
+
+
+def read_files():
+    """
+    Return the contents of Exercises.txt and Answers.txt.
+    """
+    contents = []
+    for path in ('Exercises.txt', 'Answers.txt'):
+        with open(path, encoding='utf-8') as f_in:
+            contents.append(f_in.read())
+    return contents
+
+
+class Interrupted(Exception):
+    """
+    Stands for the process being killed in the middle of a run.
+    """
+
+
+class TestCheckpoint(unittest.TestCase):
+    """
+    Test class for testing checkpointed, resumed and extended runs.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_resume_after_interruption(self):
+        """
+        Test if a run cut short and resumed writes the same files as one uninterrupted run.
+        """
+        generate_and_write_expressions(2500, 10, ExpressionIndex(), seed=9)
+        expected = read_files()
+        self.assertEqual(generate_and_write_expressions(1000, 10, ExpressionIndex(), seed=9,
+                                                        checkpoint_every=300), 1000)
+        with open(checkpoint_path('Exercises.txt'), encoding='utf-8') as f_in:
+            state = json.load(f_in)
+        self.assertEqual((state['count'], state['hashes']), (1000, 1000))
+        self.assertEqual(os.path.getsize(hashes_path('Exercises.txt')), 8000)
+        # 模拟检查点之后才写出、还没来得及记录的半行
+        for path in ('Exercises.txt', 'Answers.txt'):
+            with open(path, 'a', encoding='utf-8') as f_out:
+                f_out.write('1001. 1 +')
+        index = ExpressionIndex()
+        self.assertEqual(generate_and_write_expressions(2500, 10, index, resume=True,
+                                                        checkpoint_every=700), 2500)
+        self.assertEqual(len(index), 2500)
+        self.assertEqual(read_files(), expected)
+        # 文件已够数时续写不再生成
+        self.assertEqual(generate_and_write_expressions(2000, 10, ExpressionIndex(),
+                                                        resume=True), 2500)
+        self.assertEqual(read_files(), expected)
+
+    def test_extend_from_below_one_shard(self):
+        """
+        Test if a run shorter than one shard, extended with resume, matches a single longer run.
+        """
+        generate_and_write_expressions(3000, 50, ExpressionIndex(), seed=2)
+        expected = read_files()
+        generate_and_write_expressions(500, 50, ExpressionIndex(), seed=2)
+        # 较短的种子运行是较长运行的前缀
+        self.assertTrue(all(full.startswith(short) for full, short in zip(expected, read_files())))
+        generate_and_write_expressions(500, 50, ExpressionIndex(), seed=2, checkpoint_every=200)
+        self.assertEqual(generate_and_write_expressions(3000, 50, ExpressionIndex(), resume=True),
+                         3000)
+        self.assertEqual(read_files(), expected)
+
+    def test_resume_enumerated_space(self):
+        """
+        Test if a killed run of a small, enumerated range resumes to the same files.
+        """
+        generate_and_write_expressions(3000, 3, ExpressionIndex(), seed=5)
+        expected = read_files()
+        saved = []
+
+        def write_once(exercise_file, state):
+            # 第一次检查点之后模拟进程被杀
+            if saved:
+                raise Interrupted
+            saved.append(state['count'])
+            write_checkpoint(exercise_file, state)
+
+        with patch('exercise.checkpoint.write_checkpoint', write_once):
+            with self.assertRaises(Interrupted):
+                generate_and_write_expressions(3000, 3, ExpressionIndex(), seed=5,
+                                               checkpoint_every=1500)
+        with open(checkpoint_path('Exercises.txt'), encoding='utf-8') as f_in:
+            state = json.load(f_in)
+        self.assertEqual((saved, state['enumerated']), ([1500], [1, 2]))
+        self.assertGreaterEqual(sum(state['drawn'].values()), 1)
+        self.assertEqual(generate_and_write_expressions(3000, 3, ExpressionIndex(), resume=True),
+                         3000)
+        self.assertEqual(read_files(), expected)
+
+    def test_resume_errors(self):
+        """
+        Test if resuming without a checkpoint or with other options is refused.
+        """
+        with self.assertRaises(ValueError):
+            generate_and_write_expressions(10, 10, ExpressionIndex(), resume=True)
+        generate_and_write_expressions(10, 10, None, seed=1, checkpoint_every=5)
+        with self.assertRaises(ValueError):
+            generate_and_write_expressions(20, 10, ExpressionIndex(), resume=True)
+        with self.assertRaises(ValueError):
+            generate_and_write_expressions(20, 20, None, resume=True)
+        self.assertEqual(generate_and_write_expressions(20, 10, None, resume=True), 20)
+        self.assertEqual(read_files()[0].splitlines()[-1].partition('.')[0], '20')
+        self.assertEqual(os.path.getsize(hashes_path('Exercises.txt')), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Unit tests for the compiled expression representation.
+"""
+
+import unittest
+import fractions
+from exercise.compact import CompiledExpression
+
+
+class TestCompiledExpression(unittest.TestCase):
+    """
+    Test class for testing compiling, evaluating and formatting expressions.
+    """
+
+    def test_from_chain(self):
+        """
+        Test if a generated chain evaluates left to right and keeps the text format.
+        """
+        compiled = CompiledExpression.from_chain(
+            [5, 1, fractions.Fraction(1, 2), 5], ['+', '/', '+'])
+        self.assertEqual(fractions.Fraction(*compiled.evaluate()), 17)
+        self.assertEqual(compiled.format(), '5  + 1 / (1/2) + 5')
+        self.assertEqual(compiled.chain(), ([(5, 1), (1, 1), (1, 2), (5, 1)], ['+', '/', '+']))
+        mixed = CompiledExpression.from_chain([fractions.Fraction(4, 3), 1], ['/'])
+        self.assertEqual(mixed.format(), '1’1/3  / (1)')
+
+    def test_from_tokens(self):
+        """
+        Test if parentheses group operands and equal precedence groups to the left.
+        """
+        flat = CompiledExpression.from_tokens([(2, 1), '+', (3, 1), '*', (4, 1)])
+        self.assertEqual(fractions.Fraction(*flat.evaluate()), 20)
+        self.assertEqual(flat, CompiledExpression.from_chain([2, 3, 4], ['+', '*']))
+        grouped = CompiledExpression.from_tokens(
+            [(2, 1), '+', '(', (3, 1), '*', (4, 1), ')'])
+        self.assertEqual(fractions.Fraction(*grouped.evaluate()), 14)
+        self.assertIsNone(grouped.chain())
+        self.assertEqual(grouped.format(), '2  + (3  * 4)')
+        self.assertEqual(CompiledExpression.from_tokens(['(', (1, 2), ')']).format(), '1/2')
+
+    def test_from_tokens_errors(self):
+        """
+        Test if malformed token sequences are rejected.
+        """
+        for tokens in [[(1, 1), '+'], ['(', (1, 1)], [(1, 1), ')'], [(1, 1), (2, 1)],
+                       ['+', (1, 1)], []]:
+            self.assertRaises(ValueError, CompiledExpression.from_tokens, tokens)
+
+
+if __name__ == '__main__':
+    unittest.main()
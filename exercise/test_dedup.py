@@ -0,0 +1,52 @@
+"""
+Unit tests for the canonical-form duplicate index.
+"""
+
+import unittest
+import fractions
+from exercise.dedup import ExpressionIndex, canonical_key
+
+
+class TestExpressionIndex(unittest.TestCase):
+    """
+    Test class for testing canonical forms and the duplicate index.
+    """
+
+    def test_canonical_key(self):
+        """
+        Test if equivalent expressions share one canonical form.
+        """
+        half = fractions.Fraction(1, 2)
+        # 加法、乘法交换
+        self.assertEqual(canonical_key([1, 2], ['+']), canonical_key([2, 1], ['+']))
+        self.assertEqual(canonical_key([3, half], ['*']), canonical_key([half, 3], ['*']))
+        # 加减、乘除重新组合
+        self.assertEqual(canonical_key([5, 2, 1], ['-', '+']),
+                         canonical_key([5, 1, 2], ['+', '-']))
+        self.assertEqual(canonical_key([4, 2, 3], ['/', '*']),
+                         canonical_key([4, 3, 2], ['*', '/']))
+        # 整数与分母为1的分数等价
+        self.assertEqual(canonical_key([fractions.Fraction(2), 1], ['+']),
+                         canonical_key([1, 2], ['+']))
+        # 不等价的表达式
+        self.assertNotEqual(canonical_key([2, 1], ['-']), canonical_key([1, 2], ['-']))
+        self.assertNotEqual(canonical_key([1, 2, 3], ['+', '*']),
+                            canonical_key([1, 3, 2], ['*', '+']))
+
+    def test_index_rejects_duplicates(self):
+        """
+        Test if the index accepts new expressions and counts duplicates.
+        """
+        index = ExpressionIndex(capacity=2)
+        self.assertTrue(index.add([1, 2], ['+']))
+        self.assertFalse(index.add([2, 1], ['+']))
+        self.assertEqual(index.rejected, 1)
+        for i in range(1, 1000):
+            self.assertTrue(index.add([i, 7], ['*']))
+        self.assertEqual(len(index), 1000)
+        self.assertIn(canonical_key([7, 500], ['*']), index)
+        self.assertNotIn(canonical_key([7, 5000], ['*']), index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for compact grade tracking and the grade report.
+"""
+
+import unittest
+from exercise.grades import GradeFlags, iter_run_text, iter_runs
+
+
+class TestGradeFlags(unittest.TestCase):
+    """
+    Test class for testing grade counts, ranges and reports.
+    """
+
+    def test_ranges_and_report(self):
+        """
+        Test if runs of equal grades are reported as ranges and verbose keeps every number.
+        """
+        grades = GradeFlags.from_pairs((idx, idx != 4001) for idx in range(1, 10000))
+        grades.extend(b'\x00\x00\x01')
+        self.assertEqual(list(grades.ranges(True)), [(1, 4000), (4002, 9999), (10002, 10002)])
+        self.assertEqual(grades.report().splitlines(),
+                         ["Correct: 9999 (1-4000, 4002-9999, 10002)",
+                          "Wrong: 3 (4001, 10000-10001)"])
+        small = GradeFlags.from_lists([1, 3, 4], [2, 5])
+        self.assertEqual(small.report(verbose=True), "Correct: 3 (1, 3, 4)\nWrong: 2 (2, 5)\n")
+        self.assertEqual(small.indices(False), [2, 5])
+        # 题号必须恰好是 1 到总数，各出现一次
+        for correct, wrong in (([1, 4], [2]), ([0, 1], [2]), ([1, 2], [2])):
+            with self.assertRaises(ValueError):
+                GradeFlags.from_lists(correct, wrong)
+        self.assertEqual(GradeFlags().report(), "Correct: 0 ()\nWrong: 0 ()\n")
+
+    def test_summary(self):
+        """
+        Test if the summary counts grades and runs without listing numbers.
+        """
+        grades = GradeFlags(b'\x01\x01\x00\x01\x00\x00')
+        self.assertEqual(grades.summary(), {
+            'exercises': 6, 'correct': 3, 'wrong': 3, 'accuracy': 0.5,
+            'correct_ranges': 2, 'wrong_ranges': 2, 'first_wrong': 3})
+        self.assertIsNone(GradeFlags(b'\x01').summary()['first_wrong'])
+
+    def test_report_pieces(self):
+        """
+        Test if a long report is produced in pieces that join to the whole report.
+        """
+        grades = GradeFlags(b'\x01\x00' * 100000)
+        pieces = list(grades.iter_report())
+        self.assertGreater(len(pieces), 6)
+        self.assertEqual(''.join(pieces), grades.report())
+        self.assertTrue(grades.report(verbose=True).startswith("Correct: 100000 (1, 3, 5, "))
+
+    def test_runs_of_a_stream(self):
+        """
+        Test if iter_runs finds the same runs as the flags without keeping them.
+        """
+        pairs = [(idx, idx % 7 != 3) for idx in range(1, 50)]
+        grades = GradeFlags.from_pairs(pairs)
+        runs = list(iter_runs(iter(pairs)))
+        self.assertEqual([(first, last) for value, first, last in runs if value],
+                         list(grades.ranges(True)))
+        self.assertEqual([(first, last) for value, first, last in runs if not value],
+                         list(grades.ranges(False)))
+        self.assertEqual(list(iter_runs([])), [])
+        self.assertEqual(list(iter_run_text(4, 6)), ["4-6"])
+        self.assertEqual(''.join(iter_run_text(4, 6, verbose=True)), "4, 5, 6")
+
+
+if __name__ == '__main__':
+    unittest.main()
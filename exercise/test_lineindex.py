@@ -0,0 +1,76 @@
+"""
+Unit tests for line-offset index sidecars.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from exercise.lineindex import ExerciseReader, build_line_index, line_index_path, \
+    load_line_index, open_line_index
+from exercise.need1 import generate_and_write_expressions
+
+
+class TestLineIndex(unittest.TestCase):
+    """
+    Test class for testing index building, lookups, slices and staleness.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_generated_index_matches_files(self):
+        """
+        Test if need1's index finds every exercise and answer and equals a rebuilt index.
+        """
+        generate_and_write_expressions(300, 10, seed=5, line_index=True)
+        with open('Exercises.txt', encoding='utf-8') as f_ex, \
+                open('Answers.txt', encoding='utf-8') as f_ans:
+            expected = [(ex.rstrip('\n').partition('. ')[2], ans.rstrip('\n').partition('. ')[2])
+                        for ex, ans in zip(f_ex, f_ans)]
+        with open(line_index_path('Answers.txt'), 'rb') as f_index:
+            generated = f_index.read()
+        with ExerciseReader(rebuild=False) as reader:
+            self.assertEqual(len(reader), 300)
+            self.assertEqual(reader.get(1), expected[0])
+            self.assertEqual(reader.get(300), expected[299])
+            self.assertEqual(reader.get_range(120, 130), expected[119:130])
+            self.assertEqual(reader.get_range(295, 400), expected[294:])
+            with self.assertRaises(IndexError):
+                reader.get(301)
+        self.assertEqual(build_line_index('Answers.txt'), 300)
+        with open(line_index_path('Answers.txt'), 'rb') as f_index:
+            self.assertEqual(f_index.read()[40:], generated[40:])
+
+    def test_rebuild_and_stale_index(self):
+        """
+        Test if an edited file invalidates its index and open_line_index rebuilds it.
+        """
+        with open('notes.txt', 'w', encoding='utf-8') as f_out:
+            f_out.write('first\r\nsecond’\n\nlast')
+        self.assertIsNone(load_line_index('notes.txt'))
+        self.assertEqual(build_line_index('notes.txt'), 4)
+        with load_line_index('notes.txt') as line_index:
+            self.assertEqual(line_index.lines(1, 4), ['first', 'second’', '', 'last'])
+            self.assertEqual(line_index.line(2), 'second’')
+        time.sleep(0.01)
+        with open('notes.txt', 'a', encoding='utf-8') as f_out:
+            f_out.write('\nmore\n')
+        self.assertIsNone(load_line_index('notes.txt'))
+        self.assertIsNone(open_line_index('notes.txt', rebuild=False))
+        with open_line_index('notes.txt') as line_index:
+            self.assertEqual(line_index.lines(4, 5), ['last', 'more'])
+        open('empty.txt', 'w').close()
+        self.assertEqual(build_line_index('empty.txt'), 0)
+        with load_line_index('empty.txt') as line_index:
+            self.assertEqual((len(line_index), line_index.lines(1, 3)), (0, []))
+
+
+if __name__ == '__main__':
+    unittest.main()
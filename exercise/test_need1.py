@@ -2,9 +2,18 @@
 Unit tests for the arithmetic expressions generation module.
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open
-from need1 import generate_and_write_expressions, generate_expressions
+import random
+import fractions
+from exercise.need1 import generate_and_write_expressions, generate_expressions, generate_sharded, \
+    write_expressions, build_expression, generate_subtrahend, calculate_expression, \
+    build_chain, format_chain, contains_negative_result, contains_negative_results
+from exercise.binformat import binary_to_text
+from exercise.compact import CompiledExpression
+from exercise.operands import operand_pool
 
 
 class TestArithmeticExpressions(unittest.TestCase):
@@ -28,6 +37,116 @@ class TestArithmeticExpressions(unittest.TestCase):
             self.assertIsInstance(expr, str)
             self.assertIsInstance(answer, str)
 
+    def test_fixed_operator_count(self):
+        """
+        Test if num_operators fixes the operator count, also for seeded shards.
+        """
+        expressions, _ = generate_expressions(20, 10, rng=random.Random(2), num_operators=2)
+        # 每个运算符两侧各有一个空格分隔
+        self.assertTrue(all(len(expr.split()) == 5 for expr in expressions))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                generate_and_write_expressions(20, 10, seed=1, num_operators=3)
+                with open('Exercises.txt', encoding='utf-8') as f_ex:
+                    self.assertTrue(all(len(line.split()) == 8 for line in f_ex))
+            finally:
+                os.chdir(cwd)
+
+    def test_build_expression_never_negative(self):
+        """
+        Test if every intermediate result of a built expression is non-negative.
+        """
+        rng = random.Random(1)
+        for _ in range(500):
+            operands, operators, result = build_expression(5, rng.randint(1, 3), rng)
+            self.assertEqual(fractions.Fraction(*result),
+                             calculate_expression(operands, operators))
+            for end in range(1, len(operators) + 1):
+                self.assertGreaterEqual(
+                    calculate_expression(operands[:end + 1], operators[:end]), 0)
+
+    def test_contains_negative_results(self):
+        """
+        Test if the batch and single checks read need1's fractions, mixed numbers and parentheses.
+        """
+        expressions, _ = generate_expressions(300, 10, rng=random.Random(6))
+        self.assertTrue(any('’' in expression for expression in expressions))
+        self.assertFalse(any(contains_negative_results(expressions)))
+        samples = ['1/2  - (1/3)', '1/3  - (1/2)', '1’1/2  - (2)', '2  - (1’1/2) * 3',
+                   '1 - (2 - 3)', CompiledExpression.from_chain([(1, 2)], [])]
+        expected = [False, True, True, False, False, False]
+        self.assertEqual(contains_negative_results(samples), expected)
+        self.assertEqual([contains_negative_result(sample) for sample in samples], expected)
+
+    def test_format_chain(self):
+        """
+        Test if chains formatted from pool text match CompiledExpression.format.
+        """
+        rng = random.Random(5)
+        pool = operand_pool(7)
+        for _ in range(300):
+            entries, operators, _ = build_chain(pool, rng.randint(1, 3), rng)
+            compiled = CompiledExpression.from_chain([entry[0] for entry in entries], operators)
+            self.assertEqual(format_chain(entries, operators), compiled.format())
+
+    def test_generate_subtrahend_respects_limit(self):
+        """
+        Test if subtrahends never exceed the limit and None is returned when none fit.
+        """
+        rng = random.Random(2)
+        limit = fractions.Fraction(3, 4)
+        for _ in range(200):
+            self.assertLessEqual(generate_subtrahend(10, limit, rng), limit)
+        self.assertIsNone(generate_subtrahend(10, 0, rng))
+        self.assertIsNone(generate_subtrahend(10, fractions.Fraction(1, 11), rng))
+
+    def test_generate_sharded_is_reproducible(self):
+        """
+        Test if a seeded run gives the same exercises for any worker count.
+        """
+        serial = generate_sharded(40, 10, seed=7, workers=1, shard_size=6)
+        parallel = generate_sharded(40, 10, seed=7, workers=3, shard_size=6)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(serial[0]), 40)
+        self.assertEqual(len(set(serial[0])), 40)
+        self.assertNotEqual(serial, generate_sharded(40, 10, seed=8, shard_size=6))
+
+    def test_write_expressions_streams_batches(self):
+        """
+        Test if write_expressions numbers and writes every pair from a generator.
+        """
+        pairs = ((f"{i} + 1", str(i + 1)) for i in range(10))
+        with tempfile.TemporaryDirectory() as tmp:
+            ex_path = os.path.join(tmp, 'Exercises.txt')
+            ans_path = os.path.join(tmp, 'Answers.txt')
+            self.assertEqual(write_expressions(pairs, ex_path, ans_path, batch_size=3), 10)
+            with open(ex_path, encoding='utf-8') as f_ex:
+                self.assertEqual(f_ex.readlines()[-1], "10. 9 + 1\n")
+            with open(ans_path, encoding='utf-8') as f_ans:
+                self.assertEqual(len(f_ans.readlines()), 10)
+
+    def test_binary_format_matches_text(self):
+        """
+        Test if --format bin writes the same seeded exercises as the text format.
+        """
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                self.assertEqual(generate_and_write_expressions(50, 10, seed=3,
+                                                                output_format='bin'), 50)
+                generate_and_write_expressions(50, 10, seed=3)
+                binary_to_text('Exercises.bin', 'Answers.bin', 'Converted.txt', 'Converted2.txt')
+                for text_file, converted in (('Exercises.txt', 'Converted.txt'),
+                                             ('Answers.txt', 'Converted2.txt')):
+                    with open(text_file, encoding='utf-8') as f_text, \
+                            open(converted, encoding='utf-8') as f_converted:
+                        self.assertEqual(f_text.read(), f_converted.read())
+            finally:
+                os.chdir(cwd)
+
     @patch('builtins.open', new_callable=mock_open)  # 使用 new_callable 参数正确地使用 mock_open
     def test_generate_and_write_expressions(self, mock_file):
         """
@@ -35,14 +154,13 @@ class TestArithmeticExpressions(unittest.TestCase):
         """
         num_expressions = 5
         range_limit = 10
-        generate_and_write_expressions(num_expressions, range_limit)
+        written = generate_and_write_expressions(num_expressions, range_limit)
 
+        self.assertEqual(written, num_expressions)
         # 检查 'exercises.txt' 文件是否被正确打开
-        mock_file.assert_any_call(r'E:\com\pythonProject'
-                                  r'\exercise\Exercises.txt', 'w', encoding='utf-8')
+        mock_file.assert_any_call('Exercises.txt', 'w', encoding='utf-8')
         # 检查 'answers.txt' 文件是否被正确打开
-        mock_file.assert_any_call(r'E:\com\pythonProject'
-                                  r'\exercise\Answers.txt', 'w', encoding='utf-8')
+        mock_file.assert_any_call('Answers.txt', 'w', encoding='utf-8')
 
 
 if __name__ == '__main__':
@@ -2,9 +2,21 @@
 Unit tests for the arithmetic exercises parsing and calculation module.
 """
 
+import io
+import os
+import tempfile
 import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
 import fractions
-from need2 import parse_fraction, calculate_expression
+from exercise import need2
+from exercise.need2 import parse_fraction, calculate_expression, check_answers, tokenize, \
+    parse_expression, ExpressionSyntaxError, iter_lines, grade_stream, write_grades, \
+    write_grades_stream, grade_parallel, line_offsets, grade_submissions, list_submissions, \
+    grade_file_names, grade_binary, grade_binary_batched, grade_answers
+from exercise.answerkey import answer_key_path
+from exercise.binformat import write_binary
+from exercise.grades import GradeFlags
 
 
 class TestArithmeticExercises(unittest.TestCase):
@@ -53,6 +65,264 @@ class TestArithmeticExercises(unittest.TestCase):
         self.assertEqual(calculate_expression(operands, operators),
                          fractions.Fraction(14, 3))  # 修正预期结果
 
+    def test_tokenize(self):
+        """
+        Test if tokenize handles fractions, mixed numbers, parentheses and bad input.
+        """
+        self.assertEqual(tokenize('1’1/3  / (1) + 2/5'),
+                         [(4, 3), '/', '(', (1, 1), ')', '+', (2, 5)])
+        with self.assertRaises(ExpressionSyntaxError) as error:
+            tokenize('1 + 2 $ 3')
+        self.assertEqual(error.exception.offset, 6)
+        with self.assertRaises(ExpressionSyntaxError) as error:
+            tokenize('1 + 2/0')
+        self.assertEqual(error.exception.offset, 4)
+        operands, operators = parse_expression('5  + 1 / (1/2) + 5')
+        self.assertEqual(operands, [5, 1, fractions.Fraction(1, 2), 5])
+        self.assertEqual(operators, ['+', '/', '+'])
+
+    def test_check_answers(self):
+        """
+        Test if exercises written by need1 are graded correctly.
+        """
+        exercises = ['1. 5  + 1 / (1/2) + 5\n', '2. 1’1/3  / (1)\n', '3. 3  - (1) / (5) + 2\n',
+                     '4. 1 + $\n', '5. 1  / (0)\n']
+        answers = ['1. 17\n', '2. 1’1/2\n', '3. 2’2/5\n', '4. 1\n', '5. 0\n']
+        self.assertEqual(check_answers(exercises, answers), ([1, 3], [2, 4, 5]))
+
+    def test_check_answers_vectorized(self):
+        """
+        Test if the vectorized path grades exactly like the scalar path.
+        """
+        exercises = ['1. 1 + 2\n', '2. 3 * 4 - 5\n', '3. 7 - 1’1/2\n', '4. 2 + 2\n',
+                     '5. 2 + (3 * 4)\n', '6. 1 / (0)\n', '7. 1 + (\n']
+        answers = ['1. 3\n', '2. 7\n', '3. 5’1/2\n', '4. x\n', '5. 14\n', '6. 0\n', '7. 1\n']
+        self.assertEqual(check_answers(exercises, answers, vectorized=True),
+                         check_answers(exercises, answers))
+
+    def test_unnumbered_exercise_lines(self):
+        """
+        Test if unnumbered and blank exercise lines are graded wrong as parse errors on every path.
+        """
+        exercises = ['1. 1 + 2\n', 'garbage\n', '\n', '4. 2 * 3\n']
+        answers = ['1. 3\n', '2. 1\n', '3. 0\n', '4. 6\n']
+        before = need2.GRADE_STATS['parse_errors']
+        self.assertEqual(check_answers(exercises, answers), ([1, 4], [2, 3]))
+        self.assertEqual(need2.GRADE_STATS['parse_errors'] - before, 2)
+        self.assertEqual(check_answers(exercises, answers, vectorized=True), ([1, 4], [2, 3]))
+        self.assertEqual([is_correct for _, is_correct in grade_stream(exercises, answers)],
+                         [True, False, False, True])
+
+    def test_grade_stream(self):
+        """
+        Test if streamed grading matches check_answers and writes the same grade file.
+        """
+        exercises = ['1. 1 + 2\n', '2. 1’1/3  / (1)\n', '3. 3 * 4\n', '4. 1  / (0)\n']
+        answers = ['1. 3\n', '2. 1’1/3\n', '3. 11\n', '4. 0\n']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, name) for name in
+                     ('Exercises.txt', 'Answers.txt', 'Grade.txt', 'Expected.txt', 'Empty.txt')]
+            for path, lines in zip(paths, (exercises, answers, [], [], [])):
+                with open(path, 'w', encoding='utf-8') as f_out:
+                    f_out.writelines(lines)
+            self.assertEqual(list(iter_lines(paths[0])), exercises)
+            self.assertEqual(list(iter_lines(paths[4])), [])
+            grades = grade_stream(iter_lines(paths[0]), iter_lines(paths[1]))
+            self.assertEqual(write_grades_stream(grades, paths[2]), (2, 2))
+            write_grades(grade_answers(exercises, answers), paths[3])
+            with open(paths[2], encoding='utf-8') as f_streamed, \
+                    open(paths[3], encoding='utf-8') as f_expected:
+                self.assertEqual(f_streamed.read(), f_expected.read())
+            # 较长的成绩流逐段写出，与整体写出的报告一致
+            pairs = [(idx, idx % 1000 != 17) for idx in range(1, 100001)]
+            for verbose in (False, True):
+                self.assertEqual(write_grades_stream(iter(pairs), paths[2], verbose),
+                                 (99900, 100))
+                write_grades(GradeFlags.from_pairs(pairs), paths[3], verbose)
+                with open(paths[2], encoding='utf-8') as f_streamed, \
+                        open(paths[3], encoding='utf-8') as f_expected:
+                    self.assertEqual(f_streamed.read(), f_expected.read())
+            # 仍接受旧的两个题号列表的调用形式
+            write_grades([1, 3], [2], paths[3])
+            with open(paths[3], encoding='utf-8') as f_expected:
+                self.assertEqual(f_expected.read(), "Correct: 2 (1, 3)\nWrong: 1 (2)\n")
+
+    def test_missing_file(self):
+        """
+        Test if a missing input file is reported without grading or writing a grade file.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            grade_file = os.path.join(tmp_dir, 'Grade.txt')
+            with redirect_stdout(io.StringIO()) as output:
+                need2.main(['-e', os.path.join(tmp_dir, 'Exercises.txt'),
+                            '-a', os.path.join(tmp_dir, 'Answers.txt'), '-g', grade_file])
+            self.assertTrue(output.getvalue().startswith("Error: The file was not found"))
+            self.assertFalse(os.path.exists(grade_file))
+
+    def test_answer_key_keeps_grading_rules(self):
+        """
+        Test if grading with an answer key writes the same grade file as grading without one.
+        """
+        exercises = [f"{i}. {i} + 1\n" for i in range(1, 21)]
+        answers = [f"{i}. {i + 1}\n" for i in range(1, 16)]
+        answers[4] = "7. 6\n"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exercise_file = os.path.join(tmp_dir, 'Exercises.txt')
+            answer_file = os.path.join(tmp_dir, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(exercises)
+            with open(answer_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(answers)
+            for options in ([], ['--stream']):
+                reports = []
+                # 先不用缓存，再生成缓存，最后读取已有的缓存
+                for extra in ([], ['--save_key'], []):
+                    grade_file = os.path.join(tmp_dir, f"Grade{len(reports)}.txt")
+                    with redirect_stdout(io.StringIO()):
+                        need2.main(['-e', exercise_file, '-a', answer_file, '-g', grade_file]
+                                   + options + extra)
+                    with open(grade_file, encoding='utf-8') as f_grade:
+                        reports.append(f_grade.read())
+                self.assertEqual(reports, [reports[0]] * 3)
+                os.remove(answer_key_path(exercise_file))
+            self.assertEqual(reports[0], "Correct: 14 (1-4, 6-15)\nWrong: 6 (5, 16-20)\n")
+
+    def test_grade_stream_mismatch(self):
+        """
+        Test if mismatched line numbers and missing answers are graded wrong.
+        """
+        exercises = ['1. 1 + 2\n', '2. 2 + 2\n', '3. 3 + 2\n', '4. 4 + 2\n']
+        answers = ['1. 3\n', '3. 5\n', '3. 5\n']
+        self.assertEqual(list(grade_stream(exercises, answers)),
+                         [(1, True), (2, False), (3, True), (4, False)])
+        self.assertEqual(list(grade_stream(exercises[:1], answers)), [(1, True)])
+
+    def test_grade_parallel(self):
+        """
+        Test if chunked grading matches streamed grading for any chunk size and worker count.
+        """
+        exercises = [f"{i}. {i} + 1’1/2\n" for i in range(1, 41)]
+        answers = [f"{i}. {i + 1}’1/2\n" if i % 3 else f"{i}. 0\n" for i in range(1, 38)]
+        exercises[-1] = exercises[-1].rstrip('\n')  # 最后一行没有换行符
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exercise_file = os.path.join(tmp_dir, 'Exercises.txt')
+            answer_file = os.path.join(tmp_dir, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(exercises)
+            with open(answer_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(answers)
+            self.assertEqual(line_offsets(answer_file, [0, 1, 37, 50]),
+                             [0, len(answers[0].encode()), os.path.getsize(answer_file),
+                              os.path.getsize(answer_file)])
+            expected = list(grade_stream(exercises, answers))
+            self.assertEqual(len(expected), 40)
+            for chunk_size, workers in ((1, 1), (7, 1), (50, 1), (1 << 20, 1), (30, 2)):
+                self.assertEqual(list(grade_parallel(exercise_file, answer_file, workers,
+                                                     chunk_size)), expected)
+
+    def test_grade_parallel_short_answers(self):
+        """
+        Test if chunked grading reports an answer file that ends early once, like the serial path.
+        """
+        exercises = [f"{i}. {i} + 1\n" for i in range(1, 41)]
+        answers = [f"{i}. {i + 1}\n" for i in range(1, 21)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exercise_file = os.path.join(tmp_dir, 'Exercises.txt')
+            answer_file = os.path.join(tmp_dir, 'Answers.txt')
+            with open(exercise_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(exercises)
+            with open(answer_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(answers)
+            runs = []
+            for grade in (lambda: grade_stream(exercises, answers),
+                          lambda: grade_parallel(exercise_file, answer_file, 1, 40),
+                          lambda: grade_parallel(exercise_file, answer_file, 2, 40)):
+                before = need2.GRADE_STATS['line_mismatches']
+                with redirect_stdout(io.StringIO()) as output:
+                    grades = list(grade())
+                runs.append((grades, output.getvalue(),
+                             need2.GRADE_STATS['line_mismatches'] - before))
+            self.assertEqual(runs[0][1], "Line 21: the answer file ends before the exercise file\n")
+            self.assertEqual(runs[0][2], 1)
+            self.assertEqual(runs[1], runs[0])
+            # 子进程的输出不经过 redirect_stdout，只比较成绩与计数
+            self.assertEqual((runs[2][0], runs[2][2]), (runs[0][0], runs[0][2]))
+
+    def test_grade_submissions(self):
+        """
+        Test if many submissions are graded against one answer key evaluated once.
+        """
+        exercises = ['1. 1 + 2\n', '2. 3 * 4\n', '3. 1  / (1/2)\n']
+        submissions = {'alice.txt': ['1. 3\n', '2. 12\n', '3. 2\n'],
+                       'bob.txt': ['1. 3\n', '2. 11\n'],
+                       'notes.md': ['1. 3\n']}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            exercise_file = os.path.join(tmp_dir, 'Exercises.txt')
+            answer_dir = os.path.join(tmp_dir, 'answers')
+            grade_dir = os.path.join(tmp_dir, 'Grades')
+            os.mkdir(answer_dir)
+            with open(exercise_file, 'w', encoding='utf-8') as f_out:
+                f_out.writelines(exercises)
+            for name, lines in submissions.items():
+                with open(os.path.join(answer_dir, name), 'w', encoding='utf-8') as f_out:
+                    f_out.writelines(lines)
+            answer_files = list_submissions([answer_dir])
+            self.assertEqual([os.path.basename(path) for path in answer_files],
+                             ['alice.txt', 'bob.txt'])
+            with patch('exercise.need2.expected_answer', wraps=need2.expected_answer) as evaluate_mock:
+                results = grade_submissions(exercise_file, answer_files, grade_dir)
+            # 每道题只计算一次，与提交份数无关
+            self.assertEqual(evaluate_mock.call_count, 3)
+            self.assertEqual([(correct, wrong) for _, correct, wrong in results], [(3, 0), (1, 2)])
+            with open(os.path.join(grade_dir, 'bob.txt'), encoding='utf-8') as f_grade:
+                self.assertEqual(f_grade.read(), "Correct: 1 (1)\nWrong: 2 (2-3)\n")
+            with open(os.path.join(grade_dir, 'Summary.txt'), encoding='utf-8') as f_summary:
+                self.assertEqual(f_summary.readlines()[-1],
+                                 "Total: 2 submissions, Correct: 4, Wrong: 2\n")
+            # 保存答案文件缓存后，再次判分不再计算任何题目
+            grade_submissions(exercise_file, answer_files, grade_dir, save_key=True)
+            with patch('exercise.need2.expected_answer', wraps=need2.expected_answer) as evaluate_mock:
+                self.assertEqual(grade_submissions(exercise_file, answer_files, grade_dir),
+                                 results)
+            self.assertEqual(evaluate_mock.call_count, 0)
+            # 同名提交与名为 Summary.txt 的提交各自得到不同的分数文件
+            other_dir = os.path.join(tmp_dir, 'other')
+            os.mkdir(other_dir)
+            for name in ('alice.txt', 'summary.txt'):
+                with open(os.path.join(other_dir, name), 'w', encoding='utf-8') as f_out:
+                    f_out.writelines(['1. 0\n'])
+            answer_files += list_submissions([other_dir])
+            self.assertEqual(grade_file_names(answer_files),
+                             ['alice.txt', 'bob.txt', 'alice-2.txt', 'summary-2.txt'])
+            grade_submissions(exercise_file, answer_files, grade_dir)
+            with open(os.path.join(grade_dir, 'alice.txt'), encoding='utf-8') as f_grade:
+                self.assertEqual(f_grade.read(), "Correct: 3 (1-3)\nWrong: 0 ()\n")
+            with open(os.path.join(grade_dir, 'alice-2.txt'), encoding='utf-8') as f_grade:
+                self.assertEqual(f_grade.read(), "Correct: 0 ()\nWrong: 3 (1-3)\n")
+            with open(os.path.join(grade_dir, 'Summary.txt'), encoding='utf-8') as f_summary:
+                self.assertEqual(f_summary.readlines()[-1],
+                                 "Total: 4 submissions, Correct: 4, Wrong: 8\n")
+
+    def test_grade_binary(self):
+        """
+        Test if binary files are graded the same with and without vectorizing.
+        """
+        rows = [([(1, 1), (2, 1)], ['+'], (3, 1)), ([(3, 1), (4, 1), (5, 1)], ['*', '-'], (8, 1)),
+                ([(1, 1), (0, 1)], ['/'], (0, 1)), ([(7, 2)], [], (7, 2)),
+                ([(1, 2), (1, 3)], ['+'], None), ([(1 << 30, 1), (1 << 30, 1)], ['*'], (1, 1))]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [os.path.join(tmp_dir, name) for name in
+                     ('Exercises.bin', 'Answers.bin', 'Short.bin')]
+            write_binary(rows, paths[0], paths[1])
+            write_binary([([(9, 1)], [], answer) for _, _, answer in rows[:2]], paths[2], paths[2]
+                         + '.answers')
+            expected = [(1, True), (2, False), (3, False), (4, True), (5, False), (6, False)]
+            self.assertEqual(list(grade_binary(paths[0], paths[1])), expected)
+            self.assertEqual(list(grade_binary_batched(paths[0], paths[1])), expected)
+            # 答案不够时其余题目判错
+            self.assertEqual(list(grade_binary_batched(paths[0], paths[2] + '.answers')),
+                             [(1, True), (2, False)] + [(i, False) for i in range(3, 7)])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,62 @@
+"""
+Unit tests for the precomputed operand pools.
+"""
+
+import unittest
+import random
+import fractions
+from collections import Counter
+from exercise.operands import OperandPool, operand_pool
+
+
+class TestOperandPool(unittest.TestCase):
+    """
+    Test class for testing operand pool entries and sampling.
+    """
+
+    def test_entries(self):
+        """
+        Test if every position holds its reduced value and need1's text.
+        """
+        pool = OperandPool(5)
+        self.assertEqual(pool.entry(0), ((1, 1), '1', '(1)'))
+        # 4/2 约分为 2，5/3 写成带分数
+        self.assertEqual(pool.entry(4 + 3 * 4 + 0), ((2, 1), '2', '(2)'))
+        self.assertEqual(pool.entry(4 + 3 * 4 + 1), ((4, 3), '1’1/3', '(1’1/3)'))
+        self.assertEqual(pool.number(4 + 1 * 4 + 2), fractions.Fraction(2, 4))
+        self.assertIs(operand_pool(5), operand_pool(5))
+        # 大范围的池不缓存条目
+        self.assertIsNone(OperandPool(1000).entries)
+        self.assertEqual(OperandPool(1000).entry(1), ((2, 1), '2', '(2)'))
+
+    def test_draw_distribution(self):
+        """
+        Test if draws split evenly between integers and fractions and cover every value.
+        """
+        pool = OperandPool(4)
+        rng = random.Random(3)
+        counts = Counter(pool.draw(rng) for _ in range(60000))
+        self.assertEqual(set(counts), set(range(12)))
+        integers = sum(counts[position] for position in range(3))
+        self.assertAlmostEqual(integers / 60000, 0.5, delta=0.02)
+        # 每个整数的概率是每个分数的 3 倍
+        self.assertAlmostEqual(counts[0] / counts[5], 3, delta=0.3)
+
+    def test_draw_at_most(self):
+        """
+        Test if restricted draws respect the limit and keep the relative weights.
+        """
+        pool = OperandPool(10)
+        rng = random.Random(4)
+        limit = fractions.Fraction(3, 2)
+        counts = Counter(pool.draw_at_most(3, 2, rng) for _ in range(20000))
+        for position in counts:
+            self.assertLessEqual(fractions.Fraction(*pool.value(position)), limit)
+        # 整数 1 的权重是任一合法分数的 9 倍
+        self.assertAlmostEqual(counts[0] / counts[9], 9, delta=1.5)
+        self.assertIsNone(pool.draw_at_most(0, 1, rng))
+        self.assertIsNone(pool.draw_at_most(1, 11, rng))
+
+
+if __name__ == '__main__':
+    unittest.main()
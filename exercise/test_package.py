@@ -0,0 +1,48 @@
+"""
+Unit tests for the package API and import hygiene.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+import exercise
+
+
+# 包所在的目录，子进程据此导入 exercise 包
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestPackage(unittest.TestCase):
+    """
+    Test class for testing the importable API and what importing it loads.
+    """
+
+    def test_import_is_side_effect_free(self):
+        """
+        Test if importing the CLI modules neither parses arguments nor loads heavy modules.
+        """
+        code = ("import sys\n"
+                "import exercise, exercise.need1, exercise.need2\n"
+                "heavy = ['argparse', 'cProfile', 'pstats', 'numpy', 'concurrent.futures']\n"
+                "print(' '.join(name for name in heavy if name in sys.modules))\n")
+        # 即使命令行里带着无关参数，导入也不能解析它们
+        result = subprocess.run([sys.executable, '-c', code, '--unknown'], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_generate_and_grade(self):
+        """
+        Test if generated exercises are reproducible and grade as all correct.
+        """
+        expressions, answers = exercise.generate(50, 10, seed=3)
+        self.assertEqual((expressions, answers), exercise.generate(50, 10, seed=3))
+        self.assertEqual(len(set(expressions)), 50)
+        answers[4] = '1000'
+        correct, wrong = exercise.grade(expressions, answers)
+        self.assertEqual(wrong, [5])
+        self.assertEqual(len(correct), 49)
+
+
+if __name__ == '__main__':
+    unittest.main()
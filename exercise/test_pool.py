@@ -0,0 +1,63 @@
+"""
+Unit tests for the pre-generated exercise pool.
+"""
+
+import time
+import unittest
+import exercise
+from exercise.pool import ExercisePool
+
+
+def wait_for(pool, count, timeout=10):
+    """
+    Wait until the pool buffers at least count exercises.
+    """
+    deadline = time.monotonic() + timeout
+    while len(pool) < count:
+        if time.monotonic() > deadline:
+            raise AssertionError('the pool was not refilled in time')
+        time.sleep(0.01)
+
+
+class TestExercisePool(unittest.TestCase):
+    """
+    Test class for testing takes, misses and background refills.
+    """
+
+    def test_take_hits_and_refills(self):
+        """
+        Test if takes from a warm pool are hits and the buffer refills past the low-water mark.
+        """
+        with ExercisePool(10, capacity=100, low_water=20, seed=1, batch_size=30) as pool:
+            wait_for(pool, 100)
+            taken = []
+            for _ in range(9):
+                taken += pool.take(9)
+            # 取到 19 道时已低于低水位，后台应补满
+            wait_for(pool, 100)
+            stats = pool.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['served']), (9, 0, 81))
+        self.assertGreater(stats['refills'], 4)
+        expressions = [expression for expression, _ in taken]
+        self.assertEqual(len(set(expressions)), 81)
+        _, wrong = exercise.grade(expressions, [answer for _, answer in taken])
+        self.assertEqual(wrong, [])
+
+    def test_take_miss(self):
+        """
+        Test if a take larger than the buffer is completed on demand and counted as a miss.
+        """
+        with ExercisePool(20, capacity=10, low_water=2, seed=2) as pool:
+            wait_for(pool, 10)
+            taken = pool.take(25)
+            stats = pool.stats()
+        self.assertEqual(len(taken), 25)
+        self.assertEqual(len(set(taken)), 25)
+        self.assertEqual(stats['misses'], 1)
+        self.assertGreaterEqual(stats['generated_on_demand'], 15)
+        with self.assertRaises(ValueError):
+            ExercisePool(10, capacity=10, low_water=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
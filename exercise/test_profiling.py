@@ -0,0 +1,107 @@
+"""
+Unit tests for the shared --profile support.
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from exercise import need1, need2, profiling
+from exercise.profiling import run_profiled, stage
+
+
+class TestProfiling(unittest.TestCase):
+    """
+    Test class for testing the profilers, stage timers and the CLI option.
+    """
+
+    def setUp(self):
+        """
+        Work in a temporary directory so reports and generated files are discarded.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def run_quietly(self, *args):
+        """
+        Call run_profiled with stdout captured; return the result and the loaded report.
+        """
+        with redirect_stdout(io.StringIO()):
+            result = run_profiled(*args)
+        with open(args[1], encoding='utf-8') as f_report:
+            return result, json.load(f_report)
+
+    def test_profilers(self):
+        """
+        Test if every profiler returns the function's result and writes its JSON section.
+        """
+        def work(count):
+            with stage('build'):
+                values = [str(number) for number in range(count)]
+            with stage('build'):
+                values += values
+            return len(values)
+
+        result, report = self.run_quietly('cprofile', 'cprofile.json', work, 1000)
+        self.assertEqual(result, 2000)
+        self.assertTrue(any('work' in entry['function'] for entry in report['functions']))
+        _, report = self.run_quietly('tracemalloc', 'memory.json', work, 1000)
+        self.assertGreater(report['peak_bytes'], 0)
+        self.assertTrue(report['allocations'])
+        _, report = self.run_quietly('stages', 'stages.json', work, 1000)
+        self.assertEqual([(entry['stage'], entry['calls']) for entry in report['stages']],
+                         [('build', 2)])
+        # 分析结束后阶段计时关闭
+        self.assertIsNone(profiling.STAGE_TIMES)
+
+    def test_cli_profile(self):
+        """
+        Test if --profile on both tools profiles the real code path and keeps its output.
+        """
+        with redirect_stdout(io.StringIO()):
+            need1.main(['-n', '20', '-r', '10', '--seed', '1', '--profile', 'stages',
+                        '--profile-output', 'gen.json'])
+            need2.main(['-e', 'Exercises.txt', '-a', 'Answers.txt', '--profile', 'cprofile'])
+        with open('gen.json', encoding='utf-8') as f_report:
+            stages = {entry['stage'] for entry in json.load(f_report)['stages']}
+        self.assertEqual(stages, {'generate_and_write', 'write', 'shard'})
+        with open('need2_profile.json', encoding='utf-8') as f_report:
+            self.assertEqual(json.load(f_report)['profiler'], 'cprofile')
+        with open('Grade.txt', encoding='utf-8') as f_grade:
+            self.assertTrue(f_grade.readline().startswith('Correct: 20 '))
+
+    def test_cli_stats(self):
+        """
+        Test if --stats exports counters that add up and per-stage histograms.
+        """
+        with redirect_stdout(io.StringIO()):
+            need1.main(['-n', '30', '-r', '10', '--stats-output', 'gen.json'])
+            with open('Answers.txt', 'a', encoding='utf-8') as f_ans:
+                f_ans.write('31. x\n')
+            need2.GRADE_STATS.update(parse_errors=0, line_mismatches=0, lines_graded=0)
+            need2.main(['-e', 'Exercises.txt', '-a', 'Answers.txt', '--stream',
+                        '--stats-output', 'grade.json'])
+        with open('gen.json', encoding='utf-8') as f_report:
+            counters = json.load(f_report)['counters']
+        self.assertEqual(counters['generated'], 30)
+        self.assertEqual(counters['candidates'], 30 + counters['rejected_negative']
+                         + counters['rejected_duplicate'])
+        with open('grade.json', encoding='utf-8') as f_report:
+            report = json.load(f_report)
+        # 多出的一行答案只算行数不符，不参与判分
+        self.assertEqual(report['counters'], {'parse_errors': 0, 'line_mismatches': 1,
+                                              'lines_graded': 30})
+        histogram = {entry['stage']: entry for entry in report['stages']}['grade_and_write']
+        self.assertEqual(sum(bucket['count'] for bucket in histogram['histogram']), 1)
+        self.assertIsNone(profiling.STAGE_HISTOGRAMS)
+
+
+if __name__ == '__main__':
+    unittest.main()
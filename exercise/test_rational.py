@@ -0,0 +1,60 @@
+"""
+Unit tests for the integer-pair rational kernel.
+"""
+
+import unittest
+import random
+import fractions
+from exercise.rational import evaluate, equal, less_than, normalize, format_rational, parse_rational
+
+
+class TestRational(unittest.TestCase):
+    """
+    Test class for testing integer-pair rational arithmetic.
+    """
+
+    def test_evaluate_matches_fraction(self):
+        """
+        Test if evaluate gives exactly the Fraction result for random expressions.
+        """
+        rng = random.Random(5)
+        for _ in range(1000):
+            values = [fractions.Fraction(rng.randint(1, 20), rng.randint(1, 20))
+                      for _ in range(rng.randint(2, 4))]
+            operators = [rng.choice('+-*/') for _ in values[1:]]
+            expected = values[0]
+            for op_symbol, value in zip(operators, values[1:]):
+                expected = {'+': expected + value, '-': expected - value,
+                            '*': expected * value, '/': expected / value}[op_symbol]
+            pairs = [(value.numerator, value.denominator) for value in values]
+            result = evaluate(pairs, operators)
+            self.assertEqual(fractions.Fraction(*result), expected)
+            self.assertTrue(equal(result, (expected.numerator, expected.denominator)))
+            self.assertEqual(normalize(*result), (expected.numerator, expected.denominator))
+
+    def test_compare(self):
+        """
+        Test if comparisons work on unnormalized pairs.
+        """
+        self.assertTrue(equal((2, 4), (1, 2)))
+        self.assertFalse(equal((2, 4), (2, 3)))
+        self.assertTrue(less_than((2, 6), (1, 2)))
+        self.assertFalse(less_than((3, 6), (1, 2)))
+
+    def test_format_and_parse(self):
+        """
+        Test if formatting and parsing round-trip integers, fractions and mixed numbers.
+        """
+        self.assertEqual(format_rational(0, 5), '0')
+        self.assertEqual(format_rational(6, 3), '2')
+        self.assertEqual(format_rational(2, 6), '1/3')
+        self.assertEqual(format_rational(14, 6), '2’1/3')
+        for text in ['7', '3/4', '2’1/3', '1’1/2']:
+            self.assertEqual(format_rational(*parse_rational(text)), text)
+        self.assertEqual(parse_rational(' 1’1/3 '), (4, 3))
+        self.assertRaises(ValueError, parse_rational, 'x/2')
+        self.assertRaises(ZeroDivisionError, parse_rational, '1/0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit tests for the asyncio grading service.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from exercise.service import GradingService, request, start_server
+
+
+class TestGradingService(unittest.TestCase):
+    """
+    Test class for testing grading over HTTP against a warm answer key.
+    """
+
+    def setUp(self):
+        """
+        Write a small exercise file into a temporary directory.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.exercise_file = os.path.join(self.tmp_dir.name, 'Exercises.txt')
+        with open(self.exercise_file, 'w', encoding='utf-8') as f_out:
+            f_out.write('1. 1 + 2\n2. 3  - (1/2)\n3. 2  * 3\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_grade_requests(self):
+        """
+        Test if concurrent submissions get write_grades output and the metrics count them.
+        """
+        service = GradingService(self.exercise_file, concurrency=2)
+
+        async def scenario():
+            server = await start_server(service, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                bodies = ['1. 3\n2. 2’1/2\n3. 6\n', '1. 3\n2. 5/2\n3. 5\n'] * 3
+                results = await asyncio.gather(*(
+                    request('127.0.0.1', port, 'POST', '/grade', body.encode('utf-8'))
+                    for body in bodies))
+                missing = await request('127.0.0.1', port, 'GET', '/nowhere')
+                metrics = await request('127.0.0.1', port, 'GET', '/metrics')
+            return results, missing, metrics
+
+        results, missing, metrics = asyncio.run(scenario())
+        self.assertEqual(results[0], (200, b'Correct: 3 (1-3)\nWrong: 0 ()\n'))
+        self.assertEqual(results[1], (200, b'Correct: 2 (1-2)\nWrong: 1 (3)\n'))
+        self.assertEqual(missing[0], 404)
+        metrics = json.loads(metrics[1])
+        self.assertEqual(metrics['latency']['count'], 6)
+        self.assertEqual(metrics['lines_graded'], 18)
+        self.assertEqual((metrics['in_flight'], metrics['waiting'], metrics['errors']), (0, 0, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
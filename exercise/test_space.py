@@ -0,0 +1,93 @@
+"""
+Unit tests for the enumerated expression space of small ranges.
+"""
+
+import random
+import unittest
+import exercise
+from exercise.dedup import ExpressionIndex
+from exercise.need1 import generate_expressions, iter_sharded, sharded_enumeration
+from exercise.pool import ExercisePool
+from exercise.rational import apply, evaluate, normalize
+from exercise.space import ExpressionSpace, enumerated_operator_counts
+
+
+class TestExpressionSpace(unittest.TestCase):
+    """
+    Test class for testing counting, unranking, sampling and exhausted generation.
+    """
+
+    def test_counts_and_chains(self):
+        """
+        Test if every chain number gives a distinct valid chain with its exact result.
+        """
+        self.assertEqual([len(ExpressionSpace(3, k)) for k in (1, 2, 3)], [90, 1620, 29517])
+        self.assertEqual(len(ExpressionSpace(5, 2)), 42666)
+        space = ExpressionSpace(3, 2)
+        chains = set()
+        for index in range(len(space)):
+            entries, operators, result = space.chain(index)
+            pairs = [entry[0] for entry in entries]
+            num, den = pairs[0]
+            # 每一步的中间结果都不能为负
+            for op_symbol, pair in zip(operators, pairs[1:]):
+                num, den = apply(num, den, op_symbol, *pair)
+                self.assertGreaterEqual(num * den, 0)
+            self.assertEqual(normalize(*result), normalize(*evaluate(pairs, operators)))
+            chains.add((tuple(pairs), tuple(operators)))
+        self.assertEqual(len(chains), len(space))
+        with self.assertRaises(IndexError):
+            space.chain(len(space))
+
+    def test_sample_without_replacement(self):
+        """
+        Test if sampling visits every chain once and iter_unique keeps one per canonical form.
+        """
+        space = ExpressionSpace(5, 1)
+        sampled = [(tuple(entry[0] for entry in entries), tuple(operators))
+                   for entries, operators, _ in space.sample(random.Random(1))]
+        self.assertEqual(len(set(sampled)), 795)
+        self.assertNotEqual(sampled[:10], sorted(sampled[:10]))
+        index = ExpressionIndex()
+        unique = list(space.iter_unique(index, random.Random(1)))
+        self.assertEqual((len(unique), index.rejected), (585, 210))
+
+    def test_enumeration_only_near_the_space_size(self):
+        """
+        Test if spaces are only enumerated when the exercises asked for come close to their size.
+        """
+        self.assertEqual(enumerated_operator_counts(60, 10, [1, 2, 3]), [])
+        self.assertEqual(sharded_enumeration(60, 10), [])
+        self.assertEqual(enumerated_operator_counts(6000, 10, [1, 2, 3]), [1])
+        # 一个分片至少抽取 SHARD_SIZE 道候选题目
+        self.assertEqual(sharded_enumeration(6, 3), [1, 2])
+        self.assertEqual(enumerated_operator_counts(6, 3, [1, 2, 3]), [])
+
+    def test_generation_stops_when_space_is_used_up(self):
+        """
+        Test if generation, seeded shards and the pool end after the last distinct exercise.
+        """
+        expressions, answers = generate_expressions(50000, 3, rng=random.Random(1))
+        self.assertEqual(len(expressions), 70 + 916 + 12392)
+        self.assertEqual(len(set(expressions)), len(expressions))
+        self.assertEqual(exercise.grade(expressions, answers)[1], [])
+        one_operator, _ = generate_expressions(1000, 5, rng=random.Random(2), num_operators=1)
+        self.assertEqual(len(one_operator), 585)
+        sharded = list(iter_sharded(20000, 3, seed=4, workers=2, index=ExpressionIndex()))
+        self.assertEqual(sharded, list(iter_sharded(20000, 3, seed=4, index=ExpressionIndex())))
+        self.assertEqual(len(sharded), 13378)
+        with ExercisePool(2, capacity=50, seed=3) as pool:
+            taken = []
+            with self.assertRaises(ValueError):
+                while True:
+                    taken += pool.take(20)
+            taken += pool.take(len(pool))
+            # 失败的 take 不计入已交出的题目
+            self.assertEqual(pool.stats()['served'], len(taken))
+        # 范围 2 只有操作数 1 和 1/2，一到三个运算符共 13 + 75 + 431 道不同的题目
+        self.assertEqual(len(set(taken)), 13 + 75 + 431)
+        self.assertEqual(len(generate_expressions(1000, 2)[0]), 13 + 75 + 431)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Unit tests for the bulk output writer and its sinks.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from exercise.need1 import generate_and_write_expressions
+from exercise.writer import BulkWriter, TextSink, open_sink
+
+
+class FailingSink(TextSink):
+    """
+    Text sink whose writes always fail.
+    """
+
+    def write(self, text):
+        raise OSError('disk full')
+
+
+class TestBulkWriter(unittest.TestCase):
+    """
+    Test class for testing the background writer with text, gzip and JSONL sinks.
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_sinks_write_the_same_records(self):
+        """
+        Test if text, gzip and JSONL sinks get every record numbered across batches and raw text.
+        """
+        records = [(f"{i} + 1", str(i + 1)) for i in range(100)]
+        sinks = [open_sink('plain.txt'), open_sink('packed.txt.gz', field=1),
+                 open_sink('rows.jsonl')]
+        with BulkWriter(sinks, batch_size=7, max_pending=1) as writer:
+            self.assertEqual(writer.write_records(records[:60]), 60)
+            self.assertEqual(writer.write_records(iter(records[60:])), 100)
+        with open('plain.txt', encoding='utf-8') as f_in:
+            lines = f_in.readlines()
+        self.assertEqual(lines[0], "1. 0 + 1\n")
+        self.assertEqual(lines[-1], "100. 99 + 1\n")
+        with gzip.open('packed.txt.gz', 'rt', encoding='utf-8') as f_in:
+            self.assertEqual(f_in.read().splitlines()[60], "61. 61")
+        with open('rows.jsonl', encoding='utf-8') as f_in:
+            rows = [json.loads(line) for line in f_in]
+        self.assertEqual(rows[99], {'number': 100, 'expression': '99 + 1', 'answer': '100'})
+        with BulkWriter([open_sink('text.txt')]) as writer:
+            writer.write_records([('1 + 1', '2')])
+            writer.write_text('end\n')
+        with open('text.txt', encoding='utf-8') as f_in:
+            self.assertEqual(f_in.read(), "1. 1 + 1\nend\n")
+
+    def test_sink_error_is_raised(self):
+        """
+        Test if an error in the I/O thread is raised in the calling thread.
+        """
+        writer = BulkWriter([FailingSink('failing.txt')], batch_size=2, max_pending=1)
+        with self.assertRaises(OSError):
+            writer.write_records((str(i), str(i)) for i in range(1000))
+            writer.close()
+        writer.close()
+
+    def test_close_after_error_ends_the_thread(self):
+        """
+        Test if close raises an error the I/O thread hit earlier and still ends the thread.
+        """
+        writer = BulkWriter([FailingSink('failing.txt')])
+        # 第一条记录立即交给后台线程，第二条留在缓冲区
+        writer.write_records([('1', '1'), ('2', '2')])
+        writer._queue.join()
+        with self.assertRaises(OSError):
+            writer.close()
+        self.assertFalse(writer._thread.is_alive())
+
+    def test_generate_compressed_and_jsonl(self):
+        """
+        Test if need1's gzip and JSONL formats hold the same seeded exercises as the text format.
+        """
+        generate_and_write_expressions(30, 10, seed=4)
+        self.assertEqual(generate_and_write_expressions(30, 10, seed=4, output_format='gzip'), 30)
+        generate_and_write_expressions(30, 10, seed=4, output_format='jsonl')
+        for text_file in ('Exercises.txt', 'Answers.txt'):
+            with open(text_file, encoding='utf-8') as f_text, \
+                    gzip.open(text_file + '.gz', 'rt', encoding='utf-8') as f_gzip:
+                self.assertEqual(f_text.read(), f_gzip.read())
+        with open('Exercises.txt', encoding='utf-8') as f_text, \
+                open('Exercises.jsonl', encoding='utf-8') as f_jsonl:
+            self.assertEqual([line.rstrip('\n') for line in f_text],
+                             [f"{row['number']}. {row['expression']}"
+                              for row in map(json.loads, f_jsonl)])
+
+
+if __name__ == '__main__':
+    unittest.main()
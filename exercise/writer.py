@@ -0,0 +1,235 @@
+"""
+Bulk output writer with a background I/O thread and pluggable sinks.
+
+A BulkWriter collects records in the calling thread and hands them over
+in batches to a background thread, which formats each batch into one
+large chunk per sink and writes it. File writes and gzip compression
+release the GIL, so they overlap with producing the next records. Batch
+sizes double from one record up to ``batch_size``, so the first records
+reach disk at once, and at most ``max_pending`` batches wait for the I/O
+thread, so memory stays bounded when the disk is slower than the
+producer.
+
+All sinks share one interface: format(first_number, records) returns the
+text of a batch, write(text) writes it and close() closes the file.
+
+- TextSink: numbered ``"{i}. {value}\\n"`` lines of one record field, the
+  layout of Exercises.txt and Answers.txt.
+- GzipSink: the same lines, gzip-compressed.
+- JsonlSink: one JSON object per record, ``{"number": i, field: value, ...}``.
+
+open_sink() picks the sink from the file name. An error raised in the I/O
+thread is raised again by the next call into the writer or by close().
+gzip and json are imported by the sinks that use them.
+"""
+
+import queue
+import threading
+
+from .profiling import stage
+
+
+# 每批最多的记录数
+BATCH_SIZE = 4096
+# 等待后台线程写出的批次上限，超过时生产者阻塞
+MAX_PENDING = 4
+# 记录各字段的名字，JSONL 输出使用
+FIELDS = ('expression', 'answer')
+
+
+class TextSink:
+    """
+    Numbered lines of one record field in a UTF-8 text file; with append, added to its end.
+    """
+
+    def __init__(self, path, field=0, append=False):
+        self.path = path
+        self.field = field
+        self.append = append
+        self._file = self._open(path)
+
+    def _open(self, path):
+        return open(path, 'a' if self.append else 'w', encoding='utf-8')
+
+    def format(self, first_number, records):
+        """
+        Return the numbered lines of a batch of records.
+        """
+        field = self.field
+        return ''.join([f"{number}. {record[field]}\n"
+                        for number, record in enumerate(records, first_number)])
+
+    def write(self, text):
+        """
+        Write a chunk and flush it, so readers see whole batches as they are written.
+        """
+        self._file.write(text)
+        self._file.flush()
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._file.close()
+
+
+class GzipSink(TextSink):
+    """
+    Numbered lines of one record field in a gzip-compressed UTF-8 text file.
+    """
+
+    def _open(self, path):
+        import gzip
+        return gzip.open(path, 'wt', encoding='utf-8')
+
+    def write(self, text):
+        """
+        Write a chunk; flushing every batch would end a deflate block each time and hurt the ratio.
+        """
+        self._file.write(text)
+
+
+class JsonlSink(TextSink):
+    """
+    One JSON object per record, with the record number and the named fields.
+    """
+
+    def __init__(self, path, fields=FIELDS):
+        super().__init__(path)
+        self.fields = fields
+
+    def format(self, first_number, records):
+        """
+        Return the JSON lines of a batch of records.
+        """
+        import json
+        fields = self.fields
+        return ''.join([json.dumps({'number': number, **dict(zip(fields, record))},
+                                   ensure_ascii=False) + '\n'
+                        for number, record in enumerate(records, first_number)])
+
+
+def open_sink(path, field=0):
+    """
+    Open the sink matching the file name: .gz is gzip text, .jsonl is JSON lines, else text.
+    """
+    if path.endswith('.gz'):
+        return GzipSink(path, field)
+    if path.endswith('.jsonl'):
+        return JsonlSink(path)
+    return TextSink(path, field)
+
+
+class BulkWriter:
+    """
+    Write numbered records (or raw text) to several sinks from a background thread.
+    """
+
+    def __init__(self, sinks, batch_size=BATCH_SIZE, max_pending=MAX_PENDING, first_number=1):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        # 已交给后台线程的最后一条记录的编号，续写时从已有的题目数开始
+        self.count = first_number - 1
+        self._records = []
+        self._limit = 1
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._drain, name='exercise-writer', daemon=True)
+        self._thread.start()
+
+    def write_records(self, records):
+        """
+        Number and write every record of an iterable; return the number of the last record.
+        """
+        buffer = self._records
+        for record in records:
+            buffer.append(record)
+            if len(buffer) >= self._limit:
+                self._hand_over()
+                buffer = self._records
+        return self.count + len(buffer)
+
+    def write_text(self, text):
+        """
+        Write raw text to every sink after the records written before it.
+        """
+        if self._records:
+            self._hand_over()
+        self._put((None, text))
+
+    def flush(self):
+        """
+        Hand over the buffered records and wait until every sink has written them.
+        """
+        if self._records:
+            self._hand_over()
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        """
+        Write what is buffered, wait for the I/O thread and close the sinks.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            try:
+                if self._records:
+                    self._hand_over()
+            finally:
+                # 后台线程出错后也要送出结束标记，否则它会一直等待队列
+                self._queue.put(None)
+                self._thread.join()
+        finally:
+            for sink in self.sinks:
+                sink.close()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _hand_over(self):
+        records = self._records
+        self._records = []
+        first_number = self.count + 1
+        self.count += len(records)
+        self._limit = min(self._limit * 2, self.batch_size)
+        self._put((first_number, records))
+
+    def _put(self, item):
+        self._check()
+        self._queue.put(item)
+
+    def _check(self):
+        # 后台线程的错误只抛出一次
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _drain(self):
+        """
+        Format and write queued batches until the end marker; keep draining after an error.
+        """
+        failed = False
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            # 出错后只丢弃剩余批次，让生产者不被阻塞
+            if not failed:
+                first_number, payload = item
+                try:
+                    with stage('write'):
+                        for sink in self.sinks:
+                            sink.write(payload if first_number is None
+                                       else sink.format(first_number, payload))
+                except Exception as e_symbol:
+                    failed = True
+                    self._error = e_symbol
+            self._queue.task_done()